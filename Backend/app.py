@@ -1,8 +1,21 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
+from core import metrics, startup_profile
 
-app = QApplication(sys.argv)
-window = MainWindow()
+startup_profile.set_process("app")
+with startup_profile.timed("import PyQt6"):
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+with startup_profile.timed("import ui.main_window"):
+    from ui.main_window import MainWindow
+
+with startup_profile.timed("QApplication"):
+    app = QApplication(sys.argv)
+with startup_profile.timed("window construction"):
+    window = MainWindow()
 window.show()
+# Opt-in: STEM_SPLITTER_METRICS_FILE / STEM_SPLITTER_METRICS_PORT
+metrics.start_exporter()
+if startup_profile.enabled():
+    # Runs once the event loop has painted the window
+    QTimer.singleShot(0, lambda: (startup_profile.mark("first paint"), startup_profile.write_report()))
 sys.exit(app.exec())
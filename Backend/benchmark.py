@@ -0,0 +1,297 @@
+"""Separation throughput benchmarks.
+
+    python benchmark.py --lengths 10,60 --output results.json --csv results.csv
+    python benchmark.py --baseline baseline.json          # flag regressions
+    python benchmark.py --save-baseline baseline.json     # record a new baseline
+    python benchmark.py --turbo-check --lengths 30        # int8 vs float speed and SDR
+
+Synthetic stereo test signals (deterministic, seeded) of the requested
+lengths are separated on CPU with every model/quality combination. Each case
+runs in a fresh separator.py process; its JSON events give the per-stage
+times (load, separate, save) and the process's peak RSS is taken from the OS.
+Results go to JSON and/or CSV. Against a baseline, a case regresses when its
+real-time factor, a stage time or its peak RSS grows by more than the
+tolerance; the exit code is then 1.
+
+--turbo-check skips the cases and instead separates each input in-process
+with the float model and its int8 version (core.quantize), reporting both
+times and the SDR of every int8 stem against the float one.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+from core import events
+from core.host import separator_script_path
+
+# Model name -> stem count that selects it in separator.py
+MODELS = {"htdemucs": 4, "htdemucs_ft": 2, "htdemucs_6s": 6}
+QUALITIES = ("fast", "balanced", "best", "turbo")
+SAMPLE_RATE = 44100
+
+STAGES = ("load", "separate", "save")
+
+
+def generate_audio(path, seconds, seed=0, samplerate=SAMPLE_RATE):
+    """Write a deterministic stereo test signal: chords, a bass line, clicks and noise"""
+    import numpy as np
+    import soundfile as sf
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    signal = np.zeros((len(t), 2), dtype=np.float32)
+    # Sustained harmonic content, slightly different per channel
+    for i, freq in enumerate((220.0, 277.2, 329.6, 440.0)):
+        pan = 0.3 + 0.4 * (i % 2)
+        tone = 0.08 * np.sin(2 * np.pi * freq * t + rng.uniform(0, np.pi))
+        signal[:, 0] += (1 - pan) * tone
+        signal[:, 1] += pan * tone
+    # Bass line changing every half second
+    notes = rng.choice([55.0, 65.4, 73.4, 82.4], size=int(seconds * 2) + 1)
+    bass_freq = notes[(t * 2).astype(int)]
+    signal += (0.15 * np.sin(2 * np.pi * bass_freq * t))[:, None]
+    # Percussive clicks on a 120 bpm grid
+    beat = (t * 2) % 1.0
+    signal += (0.3 * np.exp(-beat * 40) * rng.standard_normal(len(t)))[:, None].astype(np.float32)
+    signal += 0.01 * rng.standard_normal(signal.shape).astype(np.float32)
+    sf.write(path, np.clip(signal, -1, 1), samplerate)
+
+
+def run_case(input_file, seconds, model, quality, output_dir, threads=0, verbose=False):
+    """Separate input_file once in a fresh process; returns a result dict"""
+    cmd = [sys.executable, "-u", separator_script_path(), input_file, str(MODELS[model]),
+           quality, "wav", "", "cpu", output_dir, "--no-cache", "--stream", "off"]
+    if threads:
+        cmd += ["--threads", str(threads)]
+
+    stages = {}
+    ok = False
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                               stderr=None if verbose else subprocess.DEVNULL,
+                               text=True, bufsize=1)
+    for line in process.stdout:
+        event = events.parse(line)
+        if event is None:
+            continue
+        if event["event"] == "timing":
+            stages[event["stage"]] = stages.get(event["stage"], 0.0) + event["seconds"]
+        elif event["event"] == "done":
+            ok = bool(event.get("ok"))
+
+    peak_rss_mb = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        peak_rss_mb = round(usage.ru_maxrss / divisor, 1)
+    else:
+        process.wait()
+    wall = time.perf_counter() - start
+
+    work = stages.get("separate", 0.0) + stages.get("save", 0.0)
+    return {
+        "ok": ok and process.returncode == 0,
+        "wall": round(wall, 3),
+        "stages": {name: round(value, 3) for name, value in stages.items()},
+        "rtf": round(work / seconds, 4) if seconds else None,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def run_turbo_check(input_file, model_name, repeat=1):
+    """Float vs int8 separation of input_file in this process"""
+    import torch
+    import soundfile as sf
+    from core.quantize import quality_check
+    from core.fake_model import fake_model_requested, load_fake_model, FAKE_MODEL, FAKE_MODEL_6S
+
+    if fake_model_requested():
+        model = load_fake_model(FAKE_MODEL_6S if MODELS[model_name] == 6 else FAKE_MODEL)
+    else:
+        from demucs.pretrained import get_model
+        model = get_model(model_name)
+    data, _ = sf.read(input_file, dtype="float32", always_2d=True)
+    return quality_check(model, torch.from_numpy(data.T.copy()), repeat=repeat)
+
+
+def median_result(runs):
+    """Combine repeated runs of one case by taking the median of every number"""
+    ok_runs = [r for r in runs if r["ok"]] or runs
+    combined = {"ok": all(r["ok"] for r in runs), "runs": len(runs)}
+    for key in ("wall", "rtf", "peak_rss_mb"):
+        values = [r[key] for r in ok_runs if r[key] is not None]
+        combined[key] = round(statistics.median(values), 4) if values else None
+    stages = {}
+    for name in {n for r in ok_runs for n in r["stages"]}:
+        stages[name] = round(statistics.median([r["stages"].get(name, 0.0) for r in ok_runs]), 3)
+    combined["stages"] = stages
+    return combined
+
+
+def compare(results, baseline, tolerance, rss_tolerance):
+    """Regressions of results against baseline as a list of messages"""
+    regressions = []
+    base_cases = baseline.get("cases", {})
+    for case, result in results["cases"].items():
+        base = base_cases.get(case)
+        if base is None or not result["ok"]:
+            if not result["ok"]:
+                regressions.append(f"{case}: failed")
+            continue
+        checks = [("rtf", result.get("rtf"), base.get("rtf"), tolerance),
+                  ("peak_rss_mb", result.get("peak_rss_mb"), base.get("peak_rss_mb"), rss_tolerance)]
+        for stage in STAGES:
+            checks.append((stage, result["stages"].get(stage), base.get("stages", {}).get(stage), tolerance))
+        for name, value, reference, limit in checks:
+            if value is None or not reference:
+                continue
+            change = (value - reference) / reference
+            if change > limit:
+                regressions.append(f"{case}: {name} {reference} -> {value} (+{change:.0%}, limit {limit:.0%})")
+    return regressions
+
+
+def write_csv(path, results):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["case", "model", "quality", "seconds", "ok", "wall", "rtf",
+                         "peak_rss_mb"] + list(STAGES))
+        for case, result in results["cases"].items():
+            model, quality, length = case.split("/")
+            writer.writerow([case, model, quality, length.rstrip("s"), result["ok"], result["wall"],
+                             result["rtf"], result["peak_rss_mb"]]
+                            + [result["stages"].get(stage) for stage in STAGES])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark separation throughput on CPU")
+    parser.add_argument("--models", default=",".join(MODELS),
+                        help=f"comma-separated models (default: {','.join(MODELS)})")
+    parser.add_argument("--qualities", default=",".join(QUALITIES),
+                        help="comma-separated quality presets (default: all)")
+    parser.add_argument("--lengths", default="10,30",
+                        help="comma-separated input lengths in seconds (default: 10,30)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the median is reported")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per run (0 = default)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic audio")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--csv", default=None, help="write results as CSV")
+    parser.add_argument("--baseline", default=None, help="compare against this results JSON")
+    parser.add_argument("--save-baseline", default=None, help="write results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed relative slowdown of rtf and stage times (default 0.15)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.10,
+                        help="allowed relative peak RSS growth (default 0.10)")
+    parser.add_argument("--turbo-check", action="store_true",
+                        help="compare the int8 turbo model with the float model instead of running the cases")
+    parser.add_argument("--fake-model", action="store_true",
+                        help="benchmark the pipeline with the deterministic test model")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show separator output")
+    args = parser.parse_args(argv)
+
+    args.models = [m.strip() for m in args.models.split(",") if m.strip()]
+    args.qualities = [q.strip() for q in args.qualities.split(",") if q.strip()]
+    try:
+        args.lengths = [float(x) for x in args.lengths.split(",") if x.strip()]
+    except ValueError:
+        parser.error("--lengths must be numbers")
+    for model in args.models:
+        if model not in MODELS:
+            parser.error(f"unknown model {model}; choose from {', '.join(MODELS)}")
+    for quality in args.qualities:
+        if quality not in QUALITIES:
+            parser.error(f"unknown quality {quality}; choose from {', '.join(QUALITIES)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.fake_model:
+        # Inherited by every separator.py run
+        os.environ["STEM_SPLITTER_FAKE_MODEL"] = "1"
+    work_dir = tempfile.mkdtemp(prefix="stem-bench-")
+    results = {
+        "created": time.time(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "threads": args.threads,
+        },
+        "cases": {},
+    }
+    if args.turbo_check:
+        results["turbo_check"] = {}
+    try:
+        inputs = {}
+        for seconds in args.lengths:
+            path = os.path.join(work_dir, f"synthetic_{seconds:g}s.wav")
+            generate_audio(path, seconds, seed=args.seed)
+            inputs[seconds] = path
+
+        for model in args.models if args.turbo_check else ():
+            for seconds in args.lengths:
+                case = f"{model}/{seconds:g}s"
+                print(f"[BENCH] {case} float vs int8 ...", flush=True)
+                check = run_turbo_check(inputs[seconds], model, repeat=args.repeat)
+                results["turbo_check"][case] = check
+                sdr = ", ".join(f"{name} {'identical' if value is None else f'{value} dB'}"
+                                for name, value in check["sdr"].items())
+                print(f"[BENCH] {case}: {check['quantized_layers']} int8 layers, "
+                      f"{check['float_seconds']}s -> {check['int8_seconds']}s "
+                      f"({check['speedup']}x), SDR vs float: {sdr}", flush=True)
+
+        for model in args.models if not args.turbo_check else ():
+            for quality in args.qualities:
+                for seconds in args.lengths:
+                    case = f"{model}/{quality}/{seconds:g}s"
+                    print(f"[BENCH] {case} ...", flush=True)
+                    runs = []
+                    for _ in range(max(1, args.repeat)):
+                        output_dir = os.path.join(work_dir, "out")
+                        runs.append(run_case(inputs[seconds], seconds, model, quality, output_dir,
+                                             threads=args.threads, verbose=args.verbose))
+                        shutil.rmtree(output_dir, ignore_errors=True)
+                    result = median_result(runs)
+                    results["cases"][case] = result
+                    status = "ok" if result["ok"] else "FAILED"
+                    print(f"[BENCH] {case}: {status} rtf={result['rtf']} wall={result['wall']}s "
+                          f"rss={result['peak_rss_mb']}MB stages={result['stages']}", flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"[OK] Results written to {path}")
+    if args.csv:
+        write_csv(args.csv, results)
+        print(f"[OK] CSV written to {args.csv}")
+
+    failed = [case for case, result in results["cases"].items() if not result["ok"]]
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.rss_tolerance)
+        if regressions:
+            print(f"[ERROR] {len(regressions)} regressions against {args.baseline}:")
+            for message in regressions:
+                print(f"  - {message}")
+            return 1
+        print(f"[OK] No regressions against {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,6 +30,9 @@ def main():
         '--hidden-import=core.separator',
         '--hidden-import=core.worker',
         '--hidden-import=ui.main_window',
+        # Resource sampling on Windows (no /proc) and GPU figures
+        '--hidden-import=psutil',
+        '--hidden-import=pynvml',
         # Critical imports to fix jaraco error
         '--hidden-import=pkg_resources',
         '--hidden-import=setuptools',
@@ -0,0 +1,281 @@
+"""Headless batch separation, without Qt.
+
+    python cli.py songs/ "more/**/*.flac" --stems 4 --quality best -o out/ --jobs 2
+
+Inputs can be files, directories (searched recursively) and glob patterns.
+Separations run on warm separation hosts (core/separator.py --serve), so this
+process never imports torch or PyQt6 and starts instantly. Logs go to stderr;
+--json prints a machine-readable summary to stdout. With --manifest the state
+of every file is kept in a JSON file, and --resume skips files it records as
+done with the same settings.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+from core import metrics
+from core.job_manager import JobManager, HostExecutorFactory, DONE, FAILED, CANCELLED
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a")
+
+MANIFEST_VERSION = 1
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def is_audio_file(path):
+    return path.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def collect_inputs(patterns):
+    """Expand files, directories and glob patterns into a sorted, de-duplicated file list"""
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                found += [os.path.join(root, name) for name in names if is_audio_file(name)]
+        elif os.path.isfile(pattern):
+            found.append(pattern)
+        else:
+            matches = glob.glob(pattern, recursive=True)
+            if not matches:
+                log(f"[WARNING] No files match {pattern}")
+            for match in matches:
+                if os.path.isdir(match):
+                    found += collect_inputs([match])
+                elif is_audio_file(match):
+                    found.append(match)
+
+    files = []
+    seen = set()
+    for path in found:
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            files.append(path)
+    return sorted(files)
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log(f"[WARNING] Ignoring unreadable manifest {path}: {e}")
+        return None
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files", {}), dict):
+        log(f"[WARNING] Ignoring manifest {path}: not a stem-splitter manifest")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def already_done(manifest, file, settings):
+    """True if the manifest has a finished result for file with these settings"""
+    if manifest is None:
+        return False
+    entry = manifest.get("files", {}).get(file)
+    if not isinstance(entry, dict) or entry.get("state") != DONE or entry.get("settings") != settings:
+        return False
+    output_path = entry.get("output_path")
+    return bool(output_path) and os.path.isdir(output_path)
+
+
+def job_settings(args):
+    return {
+        "stems": args.stems,
+        "quality": args.quality,
+        "audio_format": args.format,
+        "bitrate": args.bitrate,
+        "device": args.device,
+        "output_dir": os.path.abspath(args.output_dir) if args.output_dir else "",
+        "stream": args.stream,
+        "cache": not args.no_cache,
+        "parallel_shifts": args.parallel_shifts,
+        "clip_batch": args.clip_batch,
+        "profile": args.profile,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Separate audio files into stems without the GUI")
+    parser.add_argument("inputs", nargs="+",
+                        help="audio files, directories (searched recursively) or glob patterns")
+    parser.add_argument("-o", "--output-dir", default="",
+                        help="output folder (default: separated/ in the home folder)")
+    parser.add_argument("--stems", type=int, choices=[2, 4, 6], default=4)
+    parser.add_argument("--quality", choices=["fast", "balanced", "best", "turbo"], default="balanced",
+                        help="turbo: fast with an int8-quantized model on CPU")
+    parser.add_argument("--format", choices=["wav", "mp3"], default="wav")
+    parser.add_argument("--bitrate", default="", help="MP3 bitrate in kbps (default 320)")
+    parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto")
+    parser.add_argument("--stream", choices=["auto", "on", "off"], default="auto")
+    parser.add_argument("--parallel-shifts", choices=["auto", "on", "off"], default="auto")
+    parser.add_argument("--no-cache", action="store_true", help="skip the local result cache")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="files separated at once, each on its own host with a "
+                             "share of the CPU cores (default 1; 0 = as many as fit in "
+                             "free memory and cores)")
+    parser.add_argument("--batch", type=int, default=1,
+                        help="files each host pipelines together (decode/infer/encode overlap)")
+    parser.add_argument("--clip-batch", type=int, default=0,
+                        help="separate up to N short clips in one forward pass")
+    parser.add_argument("--manifest", default=None,
+                        help="JSON file recording the state of every input")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip inputs the manifest records as done with the same settings")
+    parser.add_argument("--fake-model", action="store_true",
+                        help="use the deterministic test model (for load-testing without weights)")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=None,
+                        help="inference backend on CPU; onnx needs the onnx and onnxruntime packages")
+    parser.add_argument("--compile", action="store_true",
+                        help="run the model through torch.compile on CPU (kernels cached on disk)")
+    parser.add_argument("--profile", choices=["torch", "cprofile"], default=None,
+                        help="save a torch.profiler or cProfile trace of each file next to its stems")
+    parser.add_argument("--metrics-file", default=None,
+                        help="write Prometheus metrics of the run to this file (updated while running)")
+    parser.add_argument("--json", action="store_true",
+                        help="print a JSON summary to stdout when finished")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not echo separation logs")
+    args = parser.parse_args(argv)
+    if args.resume and not args.manifest:
+        parser.error("--resume needs --manifest")
+    if args.clip_batch > 1 and "on" in (args.stream, args.parallel_shifts):
+        parser.error("--clip-batch cannot be combined with --stream on or --parallel-shifts on")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 (auto) or more")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Host and executor logs are printed; keep stdout for the JSON summary
+    summary_out = sys.stdout
+    sys.stdout = sys.stderr
+    settings = job_settings(args)
+    if args.fake_model:
+        # Inherited by the separation hosts
+        os.environ["STEM_SPLITTER_FAKE_MODEL"] = "1"
+    if args.compile:
+        os.environ["STEM_SPLITTER_COMPILE"] = "1"
+    if args.backend:
+        os.environ["STEM_SPLITTER_BACKEND"] = args.backend
+    if metrics.start_exporter(path=args.metrics_file):
+        from core.resources import start_sampling
+
+        # CPU, memory and IO of the separation hosts, for the metrics
+        start_sampling()
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        log("[ERROR] No audio files found")
+        return 2
+
+    manifest = None
+    if args.manifest:
+        manifest = load_manifest(args.manifest) if args.resume else None
+        if manifest is None:
+            manifest = {"version": MANIFEST_VERSION, "files": {}}
+
+    skipped = [f for f in files if args.resume and already_done(manifest, f, settings)]
+    todo = [f for f in files if f not in skipped]
+    log(f"[INFO] {len(files)} files found, {len(skipped)} already done, {len(todo)} to separate")
+    if args.jobs == 0:
+        from core.autotune import audio_info, max_concurrent_jobs
+
+        durations = [(audio_info(f) or (0.0,))[0] for f in todo]
+        args.jobs = 1 if args.device == "cuda" else max_concurrent_jobs(durations, args.stems, args.quality)
+        log(f"[INFO] Separating {args.jobs} files at once (fits free memory and cores)")
+    if args.jobs > 1 and args.device != "cpu":
+        log("[WARNING] --jobs > 1 is meant for CPU runs; GPU runs share one device")
+
+    factory = HostExecutorFactory(echo=not args.quiet, partition_threads=args.jobs > 1,
+                                  batch_size=args.batch)
+    manager = JobManager(factory, max_concurrent=args.jobs)
+    finished = []
+
+    def on_event(event, job):
+        if event == "started":
+            log(f"[START] {job.name}")
+        elif event == "finished":
+            finished.append(job)
+            seconds = (job.finished_at or time.time()) - (job.started_at or job.created_at)
+            if job.state == DONE:
+                log(f"[OK] ({len(finished)}/{len(todo)}) {job.name} in {seconds:.1f}s -> {job.output_path}")
+            else:
+                log(f"[{job.state.upper()}] ({len(finished)}/{len(todo)}) {job.name}: {job.error or ''}")
+            if manifest is not None:
+                manifest["files"][job.file] = {
+                    "state": job.state,
+                    "settings": settings,
+                    "output_path": job.output_path,
+                    "error": job.error,
+                    "seconds": round(seconds, 3),
+                }
+                try:
+                    save_manifest(args.manifest, manifest)
+                except OSError as e:
+                    log(f"[WARNING] Could not write manifest: {e}")
+
+    manager.add_listener(on_event)
+    for file in todo:
+        manager.submit(file, settings)
+
+    start = time.time()
+    interrupted = False
+    try:
+        manager.start()
+        # Short waits keep Ctrl+C responsive
+        while not manager.wait(timeout=0.5):
+            pass
+    except KeyboardInterrupt:
+        interrupted = True
+        log("[INFO] Interrupted, cancelling remaining jobs")
+        manager.cancel_all()
+    finally:
+        factory.stop()
+        metrics.write_textfile()
+
+    jobs = manager.jobs()
+    counts = {state: sum(1 for j in jobs if j.state == state) for state in (DONE, FAILED, CANCELLED)}
+    elapsed = time.time() - start
+    log(f"[INFO] Done in {elapsed:.1f}s: {counts[DONE]} separated, {counts[FAILED]} failed, "
+        f"{counts[CANCELLED]} cancelled, {len(skipped)} skipped")
+
+    if args.json:
+        summary = {
+            "settings": settings,
+            "elapsed": round(elapsed, 3),
+            "counts": dict(counts, skipped=len(skipped)),
+            "files": [
+                {"file": j.file, "state": j.state, "output_path": j.output_path, "error": j.error}
+                for j in jobs
+            ] + [{"file": f, "state": "skipped"} for f in skipped],
+        }
+        summary_out.write(json.dumps(summary, indent=2) + "\n")
+        summary_out.flush()
+
+    if interrupted:
+        return 130
+    return 0 if counts[FAILED] == 0 and counts[CANCELLED] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Memory-aware choice of separation parameters and concurrency on CPU.
+
+tune() picks segment, overlap, split and streaming for one input from its
+duration and channel count, the model's stem count, and the free memory in
+/proc/meminfo (psutil elsewhere, when installed). max_concurrent_jobs()
+picks how many files to separate at once from the same estimate and the
+number of cores.
+
+A separation's peak memory is roughly:
+    runtime + model weights                      fixed per process
+    + activations of one segment                 fixed per segment length
+    + full-length buffers: input, shifted copy, output accumulator and stems,
+      growing with duration x channels x stems
+
+HTDemucs pads every chunk to its training segment, so a shorter segment
+saves no activation memory, only adds chunks; segment therefore stays at
+the model's maximum. What the tuner changes instead:
+    split=False for inputs that fit in one segment (with room for the shift),
+        avoiding the second, overlapping chunk split mode would cut
+    stream=True when the full-length buffers would not fit: windowed
+        separation keeps them bounded whatever the input length
+    overlap at Demucs' 0.25, or 0.1 when streaming: a machine short on
+        memory is usually short on cores too, and the smaller overlap cuts
+        the chunks to separate by about a sixth
+    concurrency: as many files as fit in the memory budget, at most one per
+        two cores (core.threads.max_parallel_files)
+
+The constants are estimates for float32 HTDemucs on CPU; the budget leaves
+headroom for the OS and the app. Set STEM_SPLITTER_AUTOTUNE=0 to keep
+Demucs' defaults.
+"""
+import os
+import math
+
+ENV_VAR = "STEM_SPLITTER_AUTOTUNE"
+
+SAMPLE_RATE = 44100
+BYTES_PER_SAMPLE = 4  # float32
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+
+RUNTIME_BYTES = 400 * MB                 # python, torch and the demucs modules
+MODEL_BYTES = 170 * MB                   # weights of one HTDemucs model
+ACTIVATION_BYTES_PER_SECOND = 160 * MB   # peak activations per second of segment
+
+# Share of the available memory separations may take
+MEMORY_BUDGET = 0.8
+
+DEFAULT_OVERLAP = 0.25
+LOW_MEMORY_OVERLAP = 0.1
+# Streamed windows (core.streaming) are this long
+STREAM_WINDOW_SECONDS = 30.0
+
+# Stem count -> (sources, models in the bag) and quality -> shifts,
+# see separator.resolve_settings
+MODEL_SHAPES = {2: (4, 4), 4: (4, 1), 6: (6, 1)}
+QUALITY_SHIFTS = {"fast": 0, "balanced": 1, "best": 2, "turbo": 0}
+
+
+def enabled():
+    return os.environ.get(ENV_VAR, "1").lower() not in ("0", "false", "no", "off")
+
+
+def read_meminfo(path="/proc/meminfo"):
+    """/proc/meminfo as {field: bytes}"""
+    info = {}
+    with open(path, "r", encoding="ascii") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            parts = value.split()
+            if not parts:
+                continue
+            amount = int(parts[0])
+            info[name] = amount * 1024 if len(parts) > 1 and parts[1] == "kB" else amount
+    return info
+
+
+def available_memory():
+    """Bytes that can be allocated without swapping, or None if unknown"""
+    try:
+        info = read_meminfo()
+    except (OSError, ValueError):
+        info = None
+    if info:
+        if "MemAvailable" in info:
+            return info["MemAvailable"]
+        # Kernels before 3.14
+        return info.get("MemFree", 0) + info.get("Cached", 0) + info.get("Buffers", 0)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.virtual_memory().available
+
+
+def audio_info(path):
+    """(duration seconds, channels) of an audio file, or None if unknown"""
+    try:
+        import soundfile as sf
+
+        info = sf.info(path)
+    except Exception:
+        return None
+    if not info.samplerate:
+        return None
+    return info.frames / info.samplerate, info.channels
+
+
+def estimate_bytes(duration, channels=2, sources=4, segment=7.8, models=1, shifts=1, stream=False):
+    """Approximate peak memory of one separation"""
+    if stream:
+        duration = min(duration, STREAM_WINDOW_SECONDS)
+    frames = duration * SAMPLE_RATE
+    # Demucs works on stereo whatever the input
+    channels = max(2, channels)
+    # Input and its normalized copy; output accumulator and returned stems;
+    # with shifts, a padded input and a second accumulator
+    buffers = 2 + 2 * sources
+    if shifts:
+        buffers += 1 + sources
+    if models > 1:
+        # Per-model estimate next to the bag's running sum
+        buffers += sources
+    full_length = frames * channels * BYTES_PER_SAMPLE * buffers
+    return int(RUNTIME_BYTES + models * MODEL_BYTES
+               + segment * ACTIVATION_BYTES_PER_SECOND + full_length)
+
+
+def fits_one_segment(duration, segment, shifts):
+    """True if the input (with room for a random shift) fits in one segment"""
+    return duration + (0.5 if shifts else 0.0) <= segment
+
+
+def tune(duration, channels=2, sources=4, segment=7.8, models=1, shifts=1, available=None):
+    """Separation parameters for one input.
+
+    Returns a dict with segment, overlap, split, stream, the estimated peak
+    bytes and the budget it was checked against (None if memory is unknown).
+    """
+    if available is None:
+        available = available_memory()
+    budget = int(available * MEMORY_BUDGET) if available else None
+
+    stream = False
+    peak = estimate_bytes(duration, channels, sources, segment, models, shifts)
+    if budget is not None and peak > budget:
+        streamed = estimate_bytes(duration, channels, sources, segment, models, shifts, stream=True)
+        # Short inputs are over budget on fixed costs alone; streaming won't help
+        if streamed < peak:
+            stream = True
+            peak = streamed
+
+    return {
+        "segment": segment,
+        "overlap": LOW_MEMORY_OVERLAP if stream else DEFAULT_OVERLAP,
+        "split": stream or not fits_one_segment(duration, segment, shifts),
+        "stream": stream,
+        "peak_bytes": peak,
+        "budget_bytes": budget,
+    }
+
+
+def max_concurrent_jobs(durations, stem_count=4, quality="balanced", cpu_limit=None, available=None,
+                        segment=7.8):
+    """How many of these inputs to separate at once.
+
+    Sized for the longest input, so any mix of the queued files fits. Never
+    more than cpu_limit (default: core.threads.max_parallel_files()).
+    """
+    from core.threads import max_parallel_files
+
+    if cpu_limit is None:
+        cpu_limit = max_parallel_files()
+    if available is None:
+        available = available_memory()
+    if not available:
+        return max(1, cpu_limit)
+
+    sources, models = MODEL_SHAPES.get(stem_count, MODEL_SHAPES[4])
+    shifts = QUALITY_SHIFTS.get(quality, 1)
+    longest = max([d for d in durations if d] or [0.0])
+    budget = available * MEMORY_BUDGET
+    peak = estimate_bytes(longest, 2, sources, segment, models, shifts)
+    if peak > budget:
+        # Such an input gets streamed, with bounded buffers
+        peak = estimate_bytes(longest, 2, sources, segment, models, shifts, stream=True)
+    return max(1, min(cpu_limit, int(math.floor(budget / peak))))
+
+
+def describe(tuning):
+    parts = [f"segment {tuning['segment']:.1f}s", f"overlap {tuning['overlap']}",
+             f"split {'on' if tuning['split'] else 'off'}"]
+    if tuning["stream"]:
+        parts.append("streaming")
+    line = ", ".join(parts)
+    if tuning["budget_bytes"]:
+        line += (f" (est. peak {tuning['peak_bytes'] / GB:.1f} GB of "
+                 f"{tuning['budget_bytes'] / GB:.1f} GB budget)")
+    return line
@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+
+# Bump when the layout of cached results changes
+CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3  # 10 GB
+
+META_FILE = "meta.json"
+
+
+def default_cache_dir():
+    """Cache root, overridable with STEM_SPLITTER_CACHE_DIR"""
+    override = os.environ.get("STEM_SPLITTER_CACHE_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "StemSplitter", "cache", "results")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "stem-splitter", "results")
+
+
+def default_max_bytes():
+    """Size limit, overridable with STEM_SPLITTER_CACHE_MAX_GB"""
+    try:
+        return int(float(os.environ["STEM_SPLITTER_CACHE_MAX_GB"]) * 1024 ** 3)
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_BYTES
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(input_file, settings):
+    """Key for a separation result: input file hash plus the settings that shape the output"""
+    payload = json.dumps({
+        "version": CACHE_VERSION,
+        "audio": hash_file(input_file),
+        "settings": settings,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _dir_size(path):
+    total = 0
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if os.path.isfile(full):
+            total += os.path.getsize(full)
+    return total
+
+
+# ioctl cloning a whole file (Linux btrfs/XFS copy-on-write)
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """Copy-on-write clone of src at dst; False where the filesystem can't"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def _place(src, dst):
+    """Reflink or copy src to dst.
+
+    Never a hard link: a later run writing the same output path would
+    truncate the shared file and corrupt the cache entry.
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    if not _reflink(src, dst):
+        shutil.copy2(src, dst)
+
+
+class ResultCache:
+    """Size-bounded LRU cache of separated stems, keyed by cache_key().
+
+    Each entry is a directory holding the stem files and a meta.json with the
+    entry size and last-use time used for eviction.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or default_cache_dir()
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry_dir, meta):
+        tmp = os.path.join(entry_dir, META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(entry_dir, META_FILE))
+
+    def lookup(self, key):
+        """Return the entry's meta dict (marking it as used) or None on a miss"""
+        entry_dir = self._entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+        if not all(os.path.exists(os.path.join(entry_dir, name)) for name in meta.get("files", [])):
+            return None
+        meta["last_used"] = time.time()
+        meta["hits"] = meta.get("hits", 0) + 1
+        try:
+            self._write_meta(entry_dir, meta)
+        except OSError:
+            pass
+        return meta
+
+    def materialize(self, key, output_path):
+        """Copy a cached entry's stems into output_path; returns the file list"""
+        entry_dir = self._entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            raise KeyError(key)
+        os.makedirs(output_path, exist_ok=True)
+        placed = []
+        for name in meta.get("files", []):
+            dst = os.path.join(output_path, name)
+            _place(os.path.join(entry_dir, name), dst)
+            placed.append(dst)
+        return placed
+
+    def store(self, key, files, info=None):
+        """Add the given stem files under key, then evict down to max_bytes"""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = entry_dir + f".tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            names = []
+            for path in files:
+                name = os.path.basename(path)
+                # Copy so the cache owns its data even if the output is edited in place
+                shutil.copy2(path, os.path.join(tmp_dir, name))
+                names.append(name)
+            now = time.time()
+            meta = {
+                "key": key,
+                "files": names,
+                "size": _dir_size(tmp_dir),
+                "created": now,
+                "last_used": now,
+                "hits": 0,
+            }
+            if info:
+                meta.update(info)
+            self._write_meta(tmp_dir, meta)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self):
+        """Meta dicts of all entries, least recently used first"""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                meta = self._read_meta(os.path.join(prefix_dir, key))
+                if meta is not None:
+                    result.append(meta)
+        result.sort(key=lambda m: m.get("last_used", 0))
+        return result
+
+    def total_size(self):
+        return sum(meta.get("size", 0) for meta in self.entries())
+
+    def remove(self, key):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits; returns removed count"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(meta.get("size", 0) for meta in entries)
+        removed = 0
+        for meta in entries:
+            if total <= limit:
+                break
+            self.remove(meta["key"])
+            total -= meta.get("size", 0)
+            removed += 1
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024.0
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or prune the separation result cache")
+    parser.add_argument("--dir", default=None, help="cache directory (default: per-user cache folder)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="show entry count and total size")
+    sub.add_parser("list", help="list entries, least recently used first")
+    prune = sub.add_parser("prune", help="evict least recently used entries")
+    prune.add_argument("--max-size", type=float, default=None,
+                       help="target size in GB (default: configured limit)")
+    sub.add_parser("clear", help="delete every entry")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.dir)
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(meta.get("size", 0) for meta in entries)
+        print(f"Cache directory: {cache.root}")
+        print(f"Entries: {len(entries)}")
+        print(f"Size: {_format_size(total)} of {_format_size(cache.max_bytes)}")
+    elif args.command == "list":
+        for meta in cache.entries():
+            last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta.get("last_used", 0)))
+            print(f"{meta['key'][:16]}  {_format_size(meta.get('size', 0)):>10}  "
+                  f"{last_used}  hits={meta.get('hits', 0)}  {meta.get('input', '')}")
+    elif args.command == "prune":
+        max_bytes = None if args.max_size is None else int(args.max_size * 1024 ** 3)
+        removed = cache.evict(max_bytes)
+        print(f"Removed {removed} entries; cache size now {_format_size(cache.total_size())}")
+    elif args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Opt-in torch.compile execution of the model on CPU.
+
+    python core/separator.py song.mp3 4 balanced wav "" cpu out --compile
+    STEM_SPLITTER_COMPILE=1 python app.py
+
+compile_model() replaces the forward of the model (of every model in a bag,
+for htdemucs_ft) with a torch.compile'd version and runs it once on silence,
+so the compilation happens while the model loads rather than inside the
+first chunk. Inductor writes the generated kernels to a cache directory
+keyed by model, segment length and torch version:
+
+    <model cache>/compiled/htdemucs-seg7.8-torch2.5.1-v1/
+
+The first run on a machine pays the full compilation (minutes on a small
+CPU); later runs, in any process, reuse the cached kernels and only re-trace
+the model. HTDemucs pads every chunk to its training segment, so one compiled
+graph serves every input length.
+
+Compilation needs a working C++ compiler; if it fails the model stays in
+eager mode with a warning. Only CPU is compiled.
+"""
+import os
+import time
+
+import torch
+
+ENV_VAR = "STEM_SPLITTER_COMPILE"
+
+# Bump when the compile settings change, to start from a fresh cache
+COMPILE_VERSION = 1
+
+
+def enabled():
+    return os.environ.get(ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+def model_segment(model):
+    """Segment length the model runs on, as apply_model chunks it"""
+    # Bags of models only expose the smallest segment of their members
+    segment = getattr(model, "max_allowed_segment", None)
+    if segment is None or segment == float("inf"):
+        segment = model.segment
+    return float(segment)
+
+
+def cache_dir(model_name, segment):
+    """Inductor cache of one model, segment length and torch version"""
+    from core.quantize import model_cache_dir
+
+    version = torch.__version__.replace("+", "_")
+    name = f"{model_name}-seg{segment:g}-torch{version}-v{COMPILE_VERSION}"
+    return os.path.join(model_cache_dir(), "compiled", name)
+
+
+def _members(model):
+    return list(getattr(model, "models", None) or [model])
+
+
+def compile_model(model_name, model):
+    """Compile model's forward in place and warm it up; returns True on success"""
+    segment = model_segment(model)
+    path = cache_dir(model_name, segment)
+    os.makedirs(path, exist_ok=True)
+    # Read by inductor whenever it looks up or writes a kernel
+    os.environ["TORCHINDUCTOR_CACHE_DIR"] = path
+    try:
+        import torch._inductor.config as inductor_config
+
+        inductor_config.fx_graph_cache = True
+    except (ImportError, AttributeError):
+        pass
+
+    members = _members(model)
+    eager = [member.forward for member in members]
+    start = time.time()
+    try:
+        for member in members:
+            member.forward = torch.compile(member.forward, dynamic=False)
+        # Same grad mode and shape as apply_model's calls
+        silence = torch.zeros(1, model.audio_channels, int(segment * model.samplerate))
+        with torch.no_grad():
+            for member in members:
+                member(silence)
+    except Exception as e:
+        for member, forward in zip(members, eager):
+            member.forward = forward
+        print(f"[WARNING] torch.compile failed, running in eager mode: {e}")
+        return False
+    print(f"[INFO] Model compiled in {time.time() - start:.1f}s (cache: {path})")
+    return True
@@ -0,0 +1,100 @@
+"""JSON-lines progress protocol between separator.py and its callers.
+
+When separator.py runs as a subprocess, stdout carries nothing but events,
+one JSON object per line, and all human-readable output (prints, tqdm bars)
+goes to stderr. In-process callers (frozen builds, headless tools) register a
+sink function instead.
+
+Events (every event has an "event" key):
+    {"event": "ready"}                                  host is accepting jobs
+    {"event": "stage", "stage": "load"}                 load/separate/save/stream
+    {"event": "progress", "percent": 42}
+    {"event": "timing", "stage": "load", "seconds": 1.2}
+    {"event": "output", "path": "/out/htdemucs/song"}
+    {"event": "audio", "seconds": 183.4, "elapsed": 41.2}   input length and separate+save time
+    {"event": "error", "message": "..."}
+    {"event": "file_done", "file": "song.mp3", "ok": true, "output_path": "..."}
+    {"event": "done", "ok": true, "output_path": "/out/htdemucs/song"}
+
+In batch runs (several inputs in one job) stage, progress, timing,
+output, error and audio events carry a "file" key naming the input they
+belong to, and each input ends with a "file_done" event before the job's final "done".
+"""
+import sys
+import json
+import threading
+
+_sink = None
+_tap = None
+_channel = None
+_lock = threading.Lock()
+
+
+def set_sink(sink):
+    """Send events to sink(event_dict) instead of the stdout channel"""
+    global _sink
+    _sink = sink
+
+
+def set_tap(tap):
+    """Also pass every event to tap(event_dict), e.g. metrics.record_event"""
+    global _tap
+    _tap = tap
+
+
+def open_channel():
+    """Reserve stdout for events and route everything else to stderr.
+
+    Called once at separator.py startup when it runs as a subprocess.
+    """
+    global _channel
+    if _channel is None:
+        _channel = sys.stdout
+        sys.stdout = sys.stderr
+
+
+def emit(event, **fields):
+    """Send one event to the sink or channel; a no-op when neither is set"""
+    message = {"event": event}
+    message.update(fields)
+    if _tap is not None:
+        _tap(message)
+    if _sink is not None:
+        _sink(message)
+        return
+    if _channel is None:
+        return
+    line = json.dumps(message)
+    with _lock:
+        _channel.write(line + "\n")
+        _channel.flush()
+
+
+def parse(line):
+    """Decode one protocol line; returns None for anything that is not an event"""
+    line = line.strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        message = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or "event" not in message:
+        return None
+    return message
+
+
+def drain_lines(stream, callback):
+    """Read a text stream line by line on a daemon thread, calling callback(line)"""
+    def reader():
+        try:
+            for line in stream:
+                line = line.rstrip("\r\n")
+                if line:
+                    callback(line)
+        except (OSError, ValueError):
+            pass
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    return thread
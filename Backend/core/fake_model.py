@@ -0,0 +1,221 @@
+"""Deterministic stand-in for the Demucs models, for offline testing.
+
+FakeSeparator has the parts of demucs.api.Separator this app uses
+(separate_tensor, separate_audio_file, _load_audio, update_parameter,
+samplerate, audio_channels, model and the chunk callback), so every code
+path above the model - job manager, hosts, caches, pipelines, writers -
+can be exercised in seconds without downloaded weights.
+
+Stems come from fixed moving-average filters (bass: low band, vocals: mid
+band, drums: high band, other: the remainder, so stems sum to the input).
+Select it with the model names "fake" (4 sources) or "fake_6s" (6 sources),
+or set STEM_SPLITTER_FAKE_MODEL=1 to replace every model. Extra compute per
+second of audio can be added with STEM_SPLITTER_FAKE_COST (seconds of busy
+CPU work per audio second, default 0), to simulate a heavier model.
+"""
+import os
+import time
+
+import torch
+import torch.nn.functional as F
+
+FAKE_MODEL = "fake"
+FAKE_MODEL_6S = "fake_6s"
+
+ENV_FAKE = "STEM_SPLITTER_FAKE_MODEL"
+ENV_COST = "STEM_SPLITTER_FAKE_COST"
+
+SOURCES = ["drums", "bass", "other", "vocals"]
+SOURCES_6S = ["drums", "bass", "other", "vocals", "guitar", "piano"]
+
+
+def is_fake_model(model_name):
+    return model_name in (FAKE_MODEL, FAKE_MODEL_6S)
+
+
+def fake_model_requested():
+    return os.environ.get(ENV_FAKE, "").lower() in ("1", "true", "yes", "on")
+
+
+def fake_cost():
+    """Busy seconds per audio second from STEM_SPLITTER_FAKE_COST"""
+    try:
+        return max(0.0, float(os.environ.get(ENV_COST, "0")))
+    except ValueError:
+        return 0.0
+
+
+def _burn(seconds):
+    """Spend roughly `seconds` of CPU time in torch ops; results are discarded"""
+    if seconds <= 0:
+        return
+    deadline = time.perf_counter() + seconds
+    a = torch.ones(128, 128)
+    while time.perf_counter() < deadline:
+        a = torch.tanh(a @ a * 1e-3)
+
+
+def _smooth(x, width):
+    """Moving average over the last axis with 'same' length output"""
+    channels = x.shape[-2]
+    kernel = torch.full((channels, 1, width), 1.0 / width, dtype=x.dtype, device=x.device)
+    padded = F.pad(x, (width // 2, width - 1 - width // 2), mode="replicate")
+    return F.conv1d(padded, kernel, groups=channels)
+
+
+class FakeModel(torch.nn.Module):
+    """Model with Demucs' attributes; forward maps (B, C, T) to (B, S, C, T).
+
+    Being a plain nn.Module, it also works with demucs.apply.apply_model.
+    """
+
+    def __init__(self, sources=None, samplerate=44100, audio_channels=2, segment=7.8):
+        super().__init__()
+        self.sources = list(sources or SOURCES)
+        self.samplerate = samplerate
+        self.audio_channels = audio_channels
+        self.segment = segment
+
+    def forward(self, mix):
+        low = _smooth(mix, 64)
+        mid = _smooth(mix, 8) - low
+        high = mix - _smooth(mix, 8)
+        stems = {"bass": low, "drums": high}
+        if "guitar" in self.sources:
+            stems["vocals"] = 0.5 * mid
+            stems["guitar"] = 0.25 * mid
+            stems["piano"] = 0.125 * mid
+        else:
+            stems["vocals"] = 0.75 * mid
+        stems["other"] = mix - sum(stems.values())
+        _burn(fake_cost() * mix.shape[0] * mix.shape[-1] / self.samplerate)
+        return torch.stack([stems[name] for name in self.sources], dim=1)
+
+
+def apply_fake_model(model, mix, **kwargs):
+    """apply_model stand-in: the fake model needs no chunking, shifts or padding"""
+    with torch.no_grad():
+        return model(mix)
+
+
+def load_fake_model(model_name):
+    return FakeModel(SOURCES_6S if model_name == FAKE_MODEL_6S else SOURCES)
+
+
+class FakeSeparator:
+    """Drop-in for demucs.api.Separator backed by FakeModel"""
+
+    def __init__(self, model=FAKE_MODEL, repo=None, device="cpu", shifts=1, overlap=0.25,
+                 split=True, segment=None, jobs=0, progress=False, callback=None,
+                 callback_arg=None):
+        self._model = load_fake_model(model)
+        self._model.eval()
+        self._device = device
+        self._shifts = shifts
+        self._overlap = overlap
+        self._split = split
+        self._segment = segment
+        self._jobs = jobs
+        self._progress = progress
+        self._callback = callback
+        self._callback_arg = callback_arg
+        print(f"[FAKE] Using deterministic test model ({model}), "
+              f"cost {fake_cost():.2f}s per audio second")
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def samplerate(self):
+        return self._model.samplerate
+
+    @property
+    def audio_channels(self):
+        return self._model.audio_channels
+
+    def update_parameter(self, device=None, shifts=None, overlap=None, split=None,
+                         segment=None, jobs=None, progress=None, callback=None,
+                         callback_arg=None, **kwargs):
+        if device is not None:
+            self._device = device
+        if shifts is not None:
+            self._shifts = shifts
+        if overlap is not None:
+            self._overlap = overlap
+        if split is not None:
+            self._split = split
+        if segment is not None:
+            self._segment = segment
+        if jobs is not None:
+            self._jobs = jobs
+        if progress is not None:
+            self._progress = progress
+        if callback is not None:
+            self._callback = callback
+        if callback_arg is not None:
+            self._callback_arg = callback_arg
+
+    def _convert(self, wav, samplerate):
+        """Match the model's channel count and sample rate"""
+        if wav.dim() == 1:
+            wav = wav[None]
+        if wav.shape[0] == 1 and self.audio_channels == 2:
+            wav = wav.expand(2, -1)
+        elif wav.shape[0] > self.audio_channels:
+            wav = wav[:self.audio_channels]
+        if samplerate and samplerate != self.samplerate:
+            length = int(round(wav.shape[-1] * self.samplerate / samplerate))
+            wav = F.interpolate(wav[None], size=length, mode="linear", align_corners=False)[0]
+        return wav.contiguous().float()
+
+    def _load_audio(self, track):
+        import soundfile as sf
+
+        try:
+            data, samplerate = sf.read(str(track), dtype="float32", always_2d=True)
+        except Exception as e:
+            raise RuntimeError(f"Could not load file {track}: {e}")
+        return self._convert(torch.from_numpy(data.T.copy()), samplerate)
+
+    def _notify(self, state, shift_idx, offset, length):
+        if self._callback is None:
+            return
+        info = dict(self._callback_arg or {})
+        info.update({
+            "model_idx_in_bag": 0,
+            "shift_idx": shift_idx,
+            "segment_offset": offset,
+            "audio_length": length,
+            "models": 1,
+            "state": state,
+        })
+        self._callback(info)
+
+    def separate_tensor(self, wav, sr=None):
+        """Same contract as Separator.separate_tensor: (input, {source: stem})"""
+        wav = self._convert(wav, sr)
+        ref = wav.mean(0)
+        mean = ref.mean()
+        std = ref.std() + 1e-8
+        mix = (wav - mean) / std
+        length = mix.shape[-1]
+        segment_length = int(self.samplerate * float(self._segment or self._model.segment))
+        # The output is shift-invariant, so extra shift passes only add cost
+        passes = max(1, self._shifts)
+
+        out = None
+        with torch.no_grad():
+            for shift_idx in range(passes):
+                pieces = []
+                for offset in range(0, length, segment_length):
+                    self._notify("start", shift_idx, offset, length)
+                    pieces.append(self._model(mix[None, :, offset:offset + segment_length]))
+                    self._notify("end", shift_idx, offset, length)
+                result = torch.cat(pieces, dim=-1) if pieces else self._model(mix[None])
+                out = result if out is None else out + result
+        out = out / passes * std + mean
+        return wav, dict(zip(self._model.sources, out[0]))
+
+    def separate_audio_file(self, file):
+        return self.separate_tensor(self._load_audio(file), self.samplerate)
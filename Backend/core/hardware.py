@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+
+# Bump when the probe records different fields
+HARDWARE_CACHE_VERSION = 2
+
+
+def hardware_cache_path():
+    """Probe cache file, overridable with STEM_SPLITTER_HARDWARE_CACHE"""
+    override = os.environ.get("STEM_SPLITTER_HARDWARE_CACHE")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "StemSplitter", "cache", "hardware.json")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "stem-splitter", "hardware.json")
+
+
+def _torch_version():
+    """Installed torch version without importing torch"""
+    try:
+        from importlib.metadata import version
+        return version("torch")
+    except Exception:
+        # Packaged builds have no metadata; the executable changes with torch
+        try:
+            stat = os.stat(sys.executable)
+            return f"exe:{stat.st_size}:{int(stat.st_mtime)}"
+        except OSError:
+            return None
+
+
+def _driver_version():
+    """Cheap NVIDIA driver fingerprint (no CUDA initialisation)"""
+    if sys.platform == "win32":
+        system_dir = os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32")
+        for name in ("nvcuda.dll", "nvml.dll"):
+            try:
+                stat = os.stat(os.path.join(system_dir, name))
+                return f"{name}:{stat.st_size}:{int(stat.st_mtime)}"
+            except OSError:
+                continue
+        return None
+    try:
+        with open("/proc/driver/nvidia/version", "r") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def hardware_fingerprint():
+    """Everything that, when changed, makes a cached probe stale"""
+    return {
+        "version": HARDWARE_CACHE_VERSION,
+        "python": sys.executable,
+        "torch": _torch_version(),
+        "driver": _driver_version(),
+        "cuda_visible_devices": os.environ.get("CUDA_VISIBLE_DEVICES"),
+        "cpus": os.cpu_count(),
+    }
+
+
+def probe_hardware():
+    """Query torch and CUDA for the devices this machine can separate on.
+
+    Returns a plain dict so it can be handed between threads and processes:
+    gpu_available, gpu_name, gpu_memory_gb (first GPU), devices (every GPU),
+    torch_version, cuda_version, cpu_count (the machine's logical CPUs) and
+    error (set when torch could not be queried).
+
+    The result is shared by every process through the cache, so nothing here
+    depends on the CPU affinity of the process that probed: thread counts
+    come from core.threads, which reads the affinity of the caller.
+    """
+    info = {
+        "gpu_available": False,
+        "gpu_name": None,
+        "gpu_memory_gb": None,
+        "devices": [],
+        "torch_version": None,
+        "cuda_version": None,
+        "cpu_count": os.cpu_count(),
+        "error": None,
+    }
+    try:
+        import torch
+
+        info["torch_version"] = torch.__version__
+        info["cuda_version"] = torch.version.cuda
+        if torch.cuda.is_available():
+            for index in range(torch.cuda.device_count()):
+                props = torch.cuda.get_device_properties(index)
+                info["devices"].append({
+                    "index": index,
+                    "name": props.name,
+                    "memory_gb": round(props.total_memory / 1e9, 1),
+                    "capability": f"{props.major}.{props.minor}",
+                })
+            info["gpu_available"] = bool(info["devices"])
+            if info["devices"]:
+                info["gpu_name"] = info["devices"][0]["name"]
+                info["gpu_memory_gb"] = info["devices"][0]["memory_gb"]
+    except Exception as e:
+        info["error"] = str(e)
+    return info
+
+
+def load_cached_hardware(path=None):
+    """Cached probe result, or None when missing or stale"""
+    path = path or hardware_cache_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("fingerprint") != hardware_fingerprint():
+        return None
+    return cached.get("info")
+
+
+def save_cached_hardware(info, path=None):
+    path = path or hardware_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + f".tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": hardware_fingerprint(), "probed_at": time.time(), "info": info},
+                      f, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[WARNING] Could not save hardware cache: {e}")
+
+
+def get_hardware_info(refresh=False):
+    """Hardware info from the on-disk cache, probing (and caching) when needed"""
+    if not refresh:
+        info = load_cached_hardware()
+        if info is not None:
+            return info
+    info = probe_hardware()
+    # A failed probe (e.g. torch missing) is not worth remembering
+    if info.get("error") is None:
+        save_cached_hardware(info)
+    return info
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the cached hardware probe")
+    parser.add_argument("--refresh", action="store_true", help="probe again and update the cache")
+    args = parser.parse_args(argv)
+
+    info = get_hardware_info(refresh=args.refresh)
+    print(f"Cache file: {hardware_cache_path()}")
+    print(json.dumps(info, indent=2))
+
+
+if __name__ == "__main__":
+    main()
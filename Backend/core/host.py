@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import platform
+import time
+import subprocess
+import threading
+
+from core import events
+from core.threads import thread_env, interop_threads_for, format_cpulist
+
+
+def separator_script_path():
+    """Absolute path of core/separator.py"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "separator.py")
+
+
+class SeparationHost:
+    """Long-lived separator.py process that keeps the Demucs model loaded.
+
+    Jobs are written to the host's stdin as JSON lines. The host answers with
+    JSON-lines events on stdout (see core.events) and ends every job with a
+    "done" event; its log output arrives on stderr. Only one job runs at a
+    time per host.
+
+    threads limits the host's torch/OpenMP thread pools (0 = torch default),
+    so several hosts can run side by side without oversubscribing the CPU.
+    cpus optionally pins the host to those CPU ids (see core.threads).
+    """
+
+    def __init__(self, threads=0, cpus=None):
+        self.threads = threads
+        self.cpus = cpus
+        self.process = None
+        self.on_log = None  # Receives stderr lines of the running job
+        self._lock = threading.Lock()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """Start the host process if it is not already running"""
+        if self.is_alive():
+            return
+
+        creation_flags = 0
+        if platform.system() == "Windows":
+            creation_flags = subprocess.CREATE_NO_WINDOW
+
+        cmd = [sys.executable, "-u", separator_script_path(), "--serve"]
+        if self.threads > 0:
+            cmd += ["--threads", str(self.threads),
+                    "--interop-threads", str(interop_threads_for(self.threads))]
+        if self.cpus:
+            cmd += ["--cpus", format_cpulist(self.cpus)]
+        print(f"[HOST] Starting separation host: {' '.join(cmd)}")
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            universal_newlines=True,
+            env=thread_env(self.threads),
+            creationflags=creation_flags
+        )
+        events.drain_lines(self.process.stderr, self._log)
+
+    def _log(self, line):
+        on_log = self.on_log
+        if on_log is not None:
+            on_log(line)
+        else:
+            print(f"[HOST] {line}")
+
+    def run_job(self, job, on_event=None, on_log=None):
+        """Send one job to the host and block until its "done" event.
+
+        job is a dict with the same fields as separator.py's arguments.
+        on_event is called with every event of the job, on_log with every
+        log line. Returns the "done" event ({"ok": ..., "output_path": ...}),
+        with an "error" message when the job failed.
+        """
+        with self._lock:
+            self.start()
+            process = self.process
+            self.on_log = on_log
+            error = None
+            try:
+                process.stdin.write(json.dumps(job) + "\n")
+                process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self.process = None
+                self.on_log = None
+                return {"ok": False, "output_path": None, "error": f"Host not reachable: {e}"}
+
+            try:
+                for line in process.stdout:
+                    event = events.parse(line)
+                    if event is None:
+                        continue
+                    kind = event["event"]
+                    if kind == "ready":
+                        continue
+                    if kind == "error":
+                        error = event.get("message")
+                    if on_event is not None:
+                        on_event(event)
+                    if kind == "done":
+                        if not event.get("ok") and error:
+                            event["error"] = error
+                        return event
+            finally:
+                self.on_log = None
+
+            # stdout closed: host died or was stopped mid-job
+            return_code = process.wait()
+            self.process = None
+            return {"ok": False, "output_path": None,
+                    "error": error or f"Separation host exited with return code {return_code}"}
+
+    def cancel(self):
+        """Abort the running job; the host restarts on the next job"""
+        self.stop()
+
+    def terminate(self):
+        """Ask the host process to exit without waiting; returns it for reap()"""
+        process = self.process
+        self.process = None
+        if process is None:
+            return None
+        try:
+            if process.stdin:
+                process.stdin.close()
+        except Exception:
+            pass
+        try:
+            process.terminate()
+        except Exception:
+            pass
+        return process
+
+    def stop(self):
+        process = self.terminate()
+        if process is not None:
+            reap([process])
+
+
+def reap(processes, timeout=5):
+    """Wait for terminated host processes together; kill those still running after timeout"""
+    deadline = time.time() + timeout
+    for process in processes:
+        try:
+            process.wait(timeout=max(0, deadline - time.time()))
+        except Exception:
+            try:
+                process.kill()
+            except Exception:
+                pass
@@ -0,0 +1,549 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+
+from core import metrics
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+# Settings every job carries; mirrors separator.py's arguments
+DEFAULT_SETTINGS = {
+    "stems": 4,
+    "quality": "balanced",
+    "audio_format": "wav",
+    "bitrate": "",
+    "device": "auto",
+    "output_dir": "",
+    "stream": "auto",
+    "cache": True,
+    "parallel_shifts": "auto",
+    "clip_batch": 0,  # > 1: separate short clips from queued files together
+    "profile": None,  # "torch" or "cprofile": save a trace next to the stems
+}
+
+# Values separator.py accepts for the settings that take a fixed set
+SETTING_CHOICES = {
+    "stems": (2, 4, 6),
+    "quality": ("fast", "balanced", "best", "turbo"),
+    "audio_format": ("wav", "mp3"),
+    "device": ("auto", "cpu", "cuda"),
+    "stream": ("auto", "on", "off"),
+    "parallel_shifts": ("auto", "on", "off"),
+    "profile": (None, "torch", "cprofile"),
+}
+
+_job_ids = itertools.count(1)
+
+
+class Job:
+    """One file to separate, with its own settings and state"""
+
+    def __init__(self, file, settings=None, priority=0):
+        self.id = next(_job_ids)
+        self.file = file
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.priority = priority
+        self.state = PENDING
+        self.progress = 0
+        self.output_path = None
+        self.error = None
+        self.slot = None  # Concurrency slot index while running
+        self.executor = None
+        self.leader = None  # Job whose executor runs this one (claim_similar)
+        self._batchable = None  # Cached batchable(self)
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.file)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "file": self.file,
+            "settings": dict(self.settings),
+            "priority": self.priority,
+            "state": self.state,
+            "progress": self.progress,
+            "output_path": self.output_path,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.name} {self.state}>"
+
+
+def batchable(job):
+    """True if the pipelined batch path (several inputs per host job) honours job's settings.
+
+    That path decodes whole files and runs shift passes in sequence, so jobs
+    that stream (stream "on", or "auto" with an input long enough to
+    stream), run shifts in parallel (parallel_shifts "on") or are profiled
+    run on their own.
+    """
+    if job._batchable is None:
+        settings = job.settings
+        if settings.get("profile") or "on" in (settings.get("stream"), settings.get("parallel_shifts")):
+            job._batchable = False
+        elif settings.get("stream", "auto") == "auto":
+            from core.streaming import should_stream
+
+            job._batchable = not should_stream(job.file, "auto")
+        else:
+            job._batchable = True
+    return job._batchable
+
+
+class JobManager:
+    """Priority job queue that runs up to max_concurrent jobs at once.
+
+    The manager does not run separations itself. executor_factory(job, manager)
+    must return an object with start() and cancel(); the executor reports back
+    through job_progress(), job_output() and job_finished(). This keeps the
+    manager usable both from the Qt UI (SplitterWorker) and headless
+    (HostExecutor).
+
+    Listeners are called as listener(event, job) with event one of
+    "queued", "started", "progress", "output", "finished" and "idle" (job is
+    None for "idle"). They run on whichever thread reported the change.
+    """
+
+    def __init__(self, executor_factory, max_concurrent=1):
+        self.executor_factory = executor_factory
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._heap = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._running = {}  # slot -> Job
+        self._listeners = []
+        self._paused = True
+
+    # ----- listeners -----
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, job):
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.state == PENDING)
+            running = sum(1 for j in self._jobs.values() if j.state == RUNNING)
+        metrics.record_job(event, job, pending, running)
+        for listener in list(self._listeners):
+            try:
+                listener(event, job)
+            except Exception as e:
+                print(f"[WARNING] Job listener failed on {event}: {e}")
+
+    # ----- queue -----
+
+    def submit(self, file, settings=None, priority=0):
+        """Queue a file and return its Job. Higher priority runs first."""
+        job = Job(file, settings, priority)
+        with self._lock:
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+        self._notify("queued", job)
+        self._dispatch()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All jobs in submission order"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.id)
+
+    def pending_count(self):
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.state == PENDING)
+
+    def running_count(self):
+        with self._lock:
+            return len(self._running)
+
+    def is_idle(self):
+        with self._lock:
+            return not self._running and not any(j.state == PENDING for j in self._jobs.values())
+
+    def set_max_concurrent(self, max_concurrent):
+        with self._lock:
+            self.max_concurrent = max(1, int(max_concurrent))
+        self._dispatch()
+
+    def clear_finished(self, keep=0):
+        """Forget jobs that reached a final state, except the keep most recent"""
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.state in FINAL_STATES),
+                              key=lambda j: (j.finished_at or 0, j.id))
+            for job in finished[:max(0, len(finished) - keep)]:
+                del self._jobs[job.id]
+
+    # ----- control -----
+
+    def start(self):
+        """Start dispatching queued jobs"""
+        with self._lock:
+            self._paused = False
+        self._dispatch()
+
+    def pause(self):
+        """Stop starting new jobs; running jobs continue"""
+        with self._lock:
+            self._paused = True
+
+    def cancel(self, job_id):
+        """Cancel a pending or running job. Returns False if already final.
+
+        Cancelling a batch leader cancels the jobs it claimed; a claimed job
+        is dropped from its leader's batch.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINAL_STATES:
+                return False
+            was_running = job.state == RUNNING
+            now = time.time()
+            job.state = CANCELLED
+            job.finished_at = now
+            if was_running and self._running.get(job.slot) is job:
+                self._running.pop(job.slot)
+            executor = job.executor
+            leader = job.leader
+            members = [j for j in self._jobs.values() if j.leader is job and j.state == RUNNING]
+            for member in members:
+                member.state = CANCELLED
+                member.finished_at = now
+
+        if was_running:
+            try:
+                if executor is not None:
+                    executor.cancel()
+                elif leader is not None and leader.executor is not None:
+                    leader.executor.drop(job)
+            except Exception as e:
+                print(f"[WARNING] Error cancelling job {job.id}: {e}")
+        for member in members:
+            self._notify("finished", member)
+        self._notify("finished", job)
+        self._dispatch()
+        return True
+
+    def cancel_all(self):
+        """Cancel every pending and running job and pause the queue"""
+        self.pause()
+        for job in self.jobs():
+            self.cancel(job.id)
+
+    def wait(self, timeout=None):
+        """Block until no job is pending or running. Returns True when idle."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._idle:
+            while not self.is_idle():
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def claim_similar(self, job, limit):
+        """Start up to limit pending jobs with the same settings as a running job.
+
+        Used by executors that separate several files in one pipelined run.
+        The claimed jobs share the leader's slot and are reported through
+        the usual callbacks; the slot is only freed when the leader finishes.
+        Cancelling a claimed job calls drop(job) on the leader's executor.
+        Jobs the batch path cannot run as asked (see batchable) are skipped.
+        """
+        claimed = []
+        with self._lock:
+            if job.state != RUNNING or limit <= 0:
+                return claimed
+            files = {job.file}
+            for _, _, candidate in sorted(self._heap):
+                if len(claimed) >= limit:
+                    break
+                if (candidate.state != PENDING or candidate.settings != job.settings
+                        or candidate.file in files or not batchable(candidate)):
+                    continue
+                candidate.state = RUNNING
+                candidate.slot = job.slot
+                candidate.leader = job
+                candidate.started_at = time.time()
+                files.add(candidate.file)
+                claimed.append(candidate)
+        for candidate in claimed:
+            self._notify("started", candidate)
+        return claimed
+
+    # ----- executor callbacks -----
+
+    def job_progress(self, job, percent):
+        with self._lock:
+            if job.state != RUNNING or percent <= job.progress:
+                return
+            job.progress = min(100, int(percent))
+        self._notify("progress", job)
+
+    def job_output(self, job, output_path):
+        with self._lock:
+            if job.state != RUNNING:
+                return
+            job.output_path = output_path
+        self._notify("output", job)
+
+    def job_finished(self, job, ok, error=None):
+        """Called by an executor when its job ends (success or failure)"""
+        with self._lock:
+            if job.state != RUNNING:
+                # Already cancelled or reported
+                return
+            job.state = DONE if ok else FAILED
+            job.error = error
+            if ok:
+                job.progress = 100
+            job.finished_at = time.time()
+            if self._running.get(job.slot) is job:
+                self._running.pop(job.slot)
+        self._notify("finished", job)
+        self._dispatch()
+
+    # ----- scheduling -----
+
+    def _free_slot(self):
+        for slot in range(self.max_concurrent):
+            if slot not in self._running:
+                return slot
+        return None
+
+    def _dispatch(self):
+        """Start pending jobs while slots are free"""
+        while True:
+            with self._lock:
+                if self._paused:
+                    break
+                slot = self._free_slot()
+                if slot is None:
+                    break
+                job = None
+                while self._heap:
+                    _, _, candidate = heapq.heappop(self._heap)
+                    if candidate.state == PENDING:
+                        job = candidate
+                        break
+                if job is None:
+                    break
+                job.state = RUNNING
+                job.slot = slot
+                job.started_at = time.time()
+                self._running[slot] = job
+
+            self._notify("started", job)
+            try:
+                job.executor = self.executor_factory(job, self)
+                job.executor.start()
+            except Exception as e:
+                print(f"[ERROR] Failed to start job {job.id}: {e}")
+                self.job_finished(job, False, f"Failed to start: {e}")
+
+        with self._lock:
+            idle = self.is_idle()
+            if idle:
+                self._idle.notify_all()
+        if idle:
+            self._notify("idle", None)
+
+
+class HostExecutor:
+    """Runs a job on a SeparationHost in a background thread (no Qt needed).
+
+    With batch_size > 1 the executor also claims up to batch_size - 1 pending
+    jobs with identical settings and sends them to the host as one pipelined
+    job, so decoding, inference and encoding of consecutive files overlap.
+    The host cannot skip a file mid-job, so drop() aborts the host's job and
+    the members still running are sent again without the dropped one.
+    """
+
+    def __init__(self, job, manager, host, echo=True, batch_size=1):
+        self.job = job
+        self.manager = manager
+        self.host = host
+        self.echo = echo
+        self.batch_size = max(1, int(batch_size))
+        self.batch = [job]
+        self._thread = None
+        self._lock = threading.Lock()
+        self._resend = False
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self.host.cancel()
+
+    def drop(self, job):
+        """Stop separating a claimed job (already cancelled by the manager)"""
+        with self._lock:
+            self._resend = True
+        self.host.cancel()
+
+    def _on_log(self, line):
+        if self.echo:
+            print(f"[JOB {self.job.id}] {line}")
+
+    def _job_for(self, event):
+        """Batch member an event belongs to, by its "file" key"""
+        file = event.get("file")
+        for job in self.batch:
+            if job.file == file:
+                return job
+        # Untagged events (e.g. from the one-file-at-a-time fallback) go to
+        # the first member still running
+        for job in self.batch:
+            if job.state == RUNNING and job.id not in self._results:
+                return job
+        return self.job
+
+    def _on_event(self, event):
+        metrics.record_event(event)
+        kind = event["event"]
+        job = self._job_for(event)
+        if kind == "progress":
+            self.manager.job_progress(job, event.get("percent", 0))
+        elif kind == "output" and event.get("path"):
+            self.manager.job_output(job, event["path"])
+        elif kind == "error" and event.get("file"):
+            self._errors[job.id] = event.get("message")
+        elif kind == "file_done":
+            self._results[job.id] = bool(event.get("ok"))
+            if event.get("output_path"):
+                self.manager.job_output(job, event["output_path"])
+            # The leader keeps the slot until the whole batch is done
+            if job is not self.job:
+                self.manager.job_finished(job, bool(event.get("ok")), self._errors.get(job.id))
+
+    def _run(self):
+        self._results = {}
+        self._errors = {}
+        settings = self.job.settings
+        # Clip batching needs the clips of several queued files in one host job
+        batch_size = max(self.batch_size, int(settings.get("clip_batch") or 1))
+        if not batchable(self.job):
+            # Streamed, parallel-shift and profiled jobs run alone
+            batch_size = 1
+        if batch_size > 1:
+            self.batch += self.manager.claim_similar(self.job, batch_size - 1)
+        request = {
+            "stem_count": settings["stems"],
+            "quality": settings["quality"],
+            "audio_format": settings["audio_format"],
+            "bitrate": settings["bitrate"],
+            "device": settings["device"],
+            "output_dir": settings["output_dir"],
+            "stream": settings["stream"],
+            "cache": settings["cache"],
+            "parallel_shifts": settings["parallel_shifts"],
+            "profile": settings["profile"],
+        }
+        if len(self.batch) > 1:
+            request["clip_batch"] = settings.get("clip_batch", 0)
+            print(f"[INFO] Pipelining {len(self.batch)} files on one host")
+        remaining = self.batch
+        while True:
+            request = dict(request, input_file=remaining[0].file)
+            if len(self.batch) > 1:
+                request["inputs"] = [job.file for job in remaining]
+            try:
+                result = self.host.run_job(request, on_event=self._on_event, on_log=self._on_log)
+            except Exception as e:
+                result = {"ok": False, "error": str(e)}
+            with self._lock:
+                resend, self._resend = self._resend, False
+            if not resend:
+                break
+            # A claimed job was dropped: carry on with the ones left
+            remaining = [job for job in self.batch if job.state == RUNNING and job.id not in self._results]
+            if not remaining:
+                break
+
+        if len(self.batch) == 1:
+            if result.get("output_path"):
+                self.manager.job_output(self.job, result["output_path"])
+            self.manager.job_finished(self.job, bool(result.get("ok")), result.get("error"))
+            return
+
+        # Members without a file_done event were cut off (host died or cancelled)
+        for job in self.batch[1:]:
+            if job.id not in self._results:
+                self.manager.job_finished(job, False, result.get("error") or "Batch did not complete")
+        if self.job.id in self._results:
+            ok = self._results[self.job.id]
+            error = self._errors.get(self.job.id)
+        else:
+            ok = False
+            error = result.get("error") or "Batch did not complete"
+        self.manager.job_finished(self.job, ok, error)
+
+
+class HostExecutorFactory:
+    """Executor factory giving each concurrency slot its own warm host.
+
+    With partition_threads=True every slot's host gets a disjoint share of
+    the CPU cores, sized from the manager's max_concurrent, and is pinned to
+    it where the OS allows (core.threads.pinning_enabled). batch_size > 1
+    lets each executor pipeline that many queued files with equal settings.
+    """
+
+    def __init__(self, echo=True, partition_threads=False, batch_size=1):
+        self.echo = echo
+        self.partition_threads = partition_threads
+        self.batch_size = batch_size
+        self.hosts = {}
+
+    def __call__(self, job, manager):
+        from core.host import SeparationHost
+        from core.threads import partition_cores, pinning_enabled
+
+        threads = 0
+        cpus = None
+        if self.partition_threads and manager.max_concurrent > 1:
+            cores = partition_cores(manager.max_concurrent)[job.slot]
+            threads = len(cores)
+            if pinning_enabled():
+                cpus = cores
+
+        host = self.hosts.get(job.slot)
+        if host is not None and (host.threads != threads or host.cpus != cpus):
+            host.stop()
+            host = None
+        if host is None:
+            host = self.hosts[job.slot] = SeparationHost(threads=threads, cpus=cpus)
+        return HostExecutor(job, manager, host, echo=self.echo, batch_size=self.batch_size)
+
+    def stop(self):
+        for host in self.hosts.values():
+            host.stop()
+        self.hosts.clear()
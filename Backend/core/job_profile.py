@@ -0,0 +1,90 @@
+"""Opt-in profiling of single separation jobs.
+
+    python core/separator.py song.mp3 4 best wav "" cpu out --profile torch
+
+wraps the separation of one file in torch.profiler (CPU activities) or
+cProfile and saves the trace next to the stems, named after the input:
+
+    out/htdemucs/song/song.torch-trace.json   chrome://tracing or Perfetto
+    out/htdemucs/song/song.prof               python -m pstats / snakeviz
+
+A short summary of the most expensive operators or functions is printed as
+well. With profiling off, profiled() is an empty with-block. The app
+profiles every job when STEM_SPLITTER_PROFILE_JOBS is torch or cprofile.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+MODES = ("torch", "cprofile")
+
+ENV_VAR = "STEM_SPLITTER_PROFILE_JOBS"
+
+# Rows of the printed summary
+SUMMARY_ROWS = 15
+
+
+def requested_mode():
+    """Profiler mode asked for in the environment, or None"""
+    mode = os.environ.get(ENV_VAR, "").strip().lower()
+    return mode if mode in MODES else None
+
+
+def trace_path(mode, input_file, output_path):
+    """Where the trace of input_file is saved"""
+    name = os.path.splitext(os.path.basename(input_file))[0]
+    suffix = ".torch-trace.json" if mode == "torch" else ".prof"
+    return os.path.join(output_path, name + suffix)
+
+
+def _save(mode, prof, path):
+    """Write the trace and print a summary; returns path, or None on failure"""
+    try:
+        if mode == "torch":
+            prof.export_chrome_trace(path)
+            print(prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=SUMMARY_ROWS))
+        else:
+            import pstats
+
+            prof.dump_stats(path)
+            pstats.Stats(prof).sort_stats("cumulative").print_stats(SUMMARY_ROWS)
+    except Exception as e:
+        print(f"[WARNING] Could not save {mode} profile: {e}")
+        return None
+    return path
+
+
+@contextmanager
+def profiled(mode, input_file, output_path):
+    """Profile the with-block when mode is "torch" or "cprofile".
+
+    The trace is also written when the block raises, since failing or slow
+    jobs are the ones worth looking at.
+    """
+    if mode not in MODES:
+        yield
+        return
+
+    print(f"[PROFILE] Profiling with {mode}")
+    if mode == "torch":
+        from torch.profiler import profile, ProfilerActivity
+
+        prof = profile(activities=[ProfilerActivity.CPU])
+        prof.start()
+    else:
+        import cProfile
+
+        prof = cProfile.Profile()
+        prof.enable()
+    start = time.time()
+    try:
+        yield
+    finally:
+        if mode == "torch":
+            prof.stop()
+        else:
+            prof.disable()
+        elapsed = time.time() - start
+        path = _save(mode, prof, trace_path(mode, input_file, output_path))
+        if path:
+            print(f"[PROFILE] {elapsed:.1f}s profiled, trace saved to {path}")
@@ -0,0 +1,275 @@
+"""Prometheus metrics for long-running separation sessions.
+
+Counters, gauges and histograms are kept in memory, for example:
+
+    stem_splitter_jobs_started_total
+    stem_splitter_jobs_finished_total{state="done"}
+    stem_splitter_jobs_pending / stem_splitter_jobs_running
+    stem_splitter_audio_seconds_total
+    stem_splitter_stage_seconds{stage="separate"}    histogram
+    stem_splitter_realtime_factor                    histogram
+    stem_splitter_job_seconds                        histogram
+    stem_splitter_separator_resident_memory_bytes    gauge (also CPU, IO and GPU)
+
+Stage names are the ones of separator.py's "timing" events: load (model
+load), hash, decode, separate (inference), stream (windowed separation) and
+save (encode and write, which happen block by block together).
+
+Job counters come from JobManager, stage times and audio seconds from the
+separator's events (record_event), so the app, cli.py and server.py get them
+whether the model runs in a subprocess, a warm host or in-process. Nothing
+is exposed unless asked for:
+
+    STEM_SPLITTER_METRICS_FILE=/var/lib/node_exporter/stem_splitter.prom
+    STEM_SPLITTER_METRICS_PORT=9464      # http://127.0.0.1:9464/metrics
+
+The file is rewritten atomically every few seconds (node_exporter's
+textfile collector format). Standalone separator.py runs can write their own
+file with --metrics-file.
+"""
+import os
+import time
+import atexit
+import threading
+
+ENV_FILE = "STEM_SPLITTER_METRICS_FILE"
+ENV_PORT = "STEM_SPLITTER_METRICS_PORT"
+ENV_INTERVAL = "STEM_SPLITTER_METRICS_INTERVAL"
+
+PREFIX = "stem_splitter_"
+
+# Seconds; covers cache lookups up to long CPU separations
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+# Processing seconds per audio second; below 1 is faster than real time
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1, 1.5, 2, 4, 8)
+
+_lock = threading.Lock()
+_metrics = {}  # name -> metric, in registration order
+_exporter = {"file": None, "server": None, "thread": None}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.values = {}
+
+    def inc(self, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, key, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with _lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self.values = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        for key, (counts, total, count) in self.values.items():
+            for bound, bucket in zip(self.buckets, counts):
+                yield self.name + "_bucket", key + (("le", _format_value(bound)),), bucket
+            yield self.name + "_sum", key, total
+            yield self.name + "_count", key, count
+
+
+def _register(metric):
+    _metrics[metric.name] = metric
+    return metric
+
+
+jobs_started = _register(Counter(PREFIX + "jobs_started_total", "Jobs that started running"))
+jobs_finished = _register(Counter(PREFIX + "jobs_finished_total", "Jobs that reached a final state"))
+jobs_pending = _register(Gauge(PREFIX + "jobs_pending", "Jobs waiting in the queue"))
+jobs_running = _register(Gauge(PREFIX + "jobs_running", "Jobs currently running"))
+job_seconds = _register(Histogram(PREFIX + "job_seconds", "Wall time of finished jobs", STAGE_BUCKETS))
+audio_seconds = _register(Counter(PREFIX + "audio_seconds_total", "Seconds of input audio separated"))
+stage_seconds = _register(Histogram(PREFIX + "stage_seconds", "Time spent per separation stage", STAGE_BUCKETS))
+realtime_factor = _register(Histogram(PREFIX + "realtime_factor",
+                                      "Processing seconds per second of audio", RTF_BUCKETS))
+# Separator processes, from core.resources
+cpu_percent = _register(Gauge(PREFIX + "separator_cpu_percent", "CPU use of the separator processes, 100 = one core"))
+cpu_seconds = _register(Counter(PREFIX + "separator_cpu_seconds_total", "CPU time of the separator processes"))
+rss_bytes = _register(Gauge(PREFIX + "separator_resident_memory_bytes", "Resident memory of the separator processes"))
+io_bytes = _register(Counter(PREFIX + "separator_io_bytes_total", "Disk bytes read and written by the separator processes"))
+gpu_memory_bytes = _register(Gauge(PREFIX + "gpu_memory_used_bytes", "GPU memory in use"))
+gpu_percent = _register(Gauge(PREFIX + "gpu_utilization_percent", "GPU utilisation"))
+
+
+def record_job(event, job, pending, running):
+    """Update job metrics from a JobManager notification"""
+    if event == "started":
+        jobs_started.inc()
+    elif event == "finished":
+        jobs_finished.inc(state=job.state)
+        if job.started_at and job.finished_at:
+            job_seconds.observe(job.finished_at - job.started_at)
+    jobs_pending.set(pending)
+    jobs_running.set(running)
+
+
+def record_event(event):
+    """Update stage and audio metrics from one separator protocol event"""
+    kind = event.get("event")
+    if kind == "timing":
+        stage_seconds.observe(float(event.get("seconds") or 0.0), stage=event.get("stage", ""))
+    elif kind == "audio":
+        duration = float(event.get("seconds") or 0.0)
+        audio_seconds.inc(duration)
+        if duration > 0 and event.get("elapsed") is not None:
+            realtime_factor.observe(float(event["elapsed"]) / duration)
+
+
+def record_resources(sample):
+    """Update the resource metrics from one core.resources sample"""
+    if "cpu_percent" in sample:
+        cpu_percent.set(sample["cpu_percent"])
+        cpu_seconds.inc(sample["cpu_seconds"])
+        rss_bytes.set(sample["rss_bytes"])
+        io_bytes.inc(sample["read_bytes"], direction="read")
+        io_bytes.inc(sample["write_bytes"], direction="write")
+    if "gpu_used_bytes" in sample:
+        gpu_memory_bytes.set(sample["gpu_used_bytes"])
+        gpu_percent.set(sample["gpu_percent"])
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        for metric in _metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path=None):
+    """Write render() to path (default: the configured file) atomically"""
+    path = path or _exporter["file"]
+    if not path:
+        return None
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(temp, path)
+    except OSError as e:
+        print(f"[WARNING] Could not write metrics file: {e}")
+        return None
+    return path
+
+
+def _write_periodically(interval):
+    while True:
+        write_textfile()
+        time.sleep(interval)
+
+
+def serve_http(port, host="127.0.0.1"):
+    """Serve GET /metrics on a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_exporter(path=None, port=None):
+    """Expose metrics as configured by the arguments or environment.
+
+    Safe to call more than once; returns True if anything is exported.
+    """
+    path = path or os.environ.get(ENV_FILE) or None
+    if port is None:
+        try:
+            port = int(os.environ.get(ENV_PORT) or 0)
+        except ValueError:
+            print(f"[WARNING] Ignoring invalid {ENV_PORT}")
+            port = 0
+
+    if port and _exporter["server"] is None:
+        try:
+            _exporter["server"] = serve_http(port)
+            print(f"[INFO] Metrics on http://127.0.0.1:{_exporter['server'].server_address[1]}/metrics")
+        except OSError as e:
+            print(f"[WARNING] Could not serve metrics on port {port}: {e}")
+
+    if path and _exporter["file"] is None:
+        _exporter["file"] = path
+        try:
+            interval = max(1.0, float(os.environ.get(ENV_INTERVAL) or 15))
+        except ValueError:
+            interval = 15.0
+        _exporter["thread"] = threading.Thread(target=_write_periodically, args=(interval,), daemon=True)
+        _exporter["thread"].start()
+        atexit.register(write_textfile)
+        print(f"[INFO] Writing metrics to {path}")
+
+    return bool(_exporter["file"] or _exporter["server"])
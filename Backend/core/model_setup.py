@@ -0,0 +1,91 @@
+"""Loading and CPU execution options of a separation model.
+
+get_separator (in-process) and the parallel shift workers (core.shift_worker)
+both go through prepare_model, so a model runs the same way wherever it is
+loaded: int8 for turbo (core.quantize), then ONNX Runtime
+(core.onnx_backend) or torch.compile (core.compiled) when asked for. This
+module only imports torch, so worker processes start without the rest of
+the separator.
+
+A cached int8 model is a complete pickled module, so cached_model() loads
+it instead of the float model; the float weights are only read to create
+the cache.
+"""
+from core import compiled, onnx_backend
+
+
+def cached_model(model_name, quantize=False):
+    """Model that is ready without loading the float weights, or None"""
+    from core.fake_model import is_fake_model
+
+    if not quantize or is_fake_model(model_name):
+        return None
+    from core.quantize import load_cached
+    return load_cached(model_name)
+
+
+def preloaded(Separator, model):
+    """Subclass of a demucs Separator class that uses model instead of loading one by name"""
+
+    class PreloadedSeparator(Separator):
+        def _load_model(self):
+            self._model = model
+            self._audio_channels = model.audio_channels
+            self._samplerate = model.samplerate
+
+    return PreloadedSeparator
+
+
+def load_model(model_name, quantize=False):
+    """Bare model (or bag of models) by name, without a Separator around it.
+
+    With quantize, the cached int8 model when there is one.
+    """
+    from core.fake_model import is_fake_model, load_fake_model
+
+    cached = cached_model(model_name, quantize)
+    if cached is not None:
+        return cached
+    if is_fake_model(model_name):
+        model = load_fake_model(model_name)
+    else:
+        from demucs.pretrained import get_model
+        model = get_model(model_name)
+    model.eval()
+    return model
+
+
+def backend_options(quantize=False):
+    """(quantize, backend, compile) for prepare_model, from the environment"""
+    return quantize, onnx_backend.requested(), compiled.enabled()
+
+
+def execution_settings(device, quantize=False):
+    """How prepare_model will run a model on device, for the result cache key.
+
+    ONNX and compile only apply on CPU, ONNX only with onnxruntime installed.
+    """
+    quantize, backend, compile = backend_options(quantize)
+    if device != "cpu" or (backend == "onnx" and not onnx_backend.available()):
+        backend = "torch"
+    return {
+        "backend": backend,
+        "compile": bool(compile) and device == "cpu" and backend != "onnx",
+        "int8": bool(quantize),
+    }
+
+
+def prepare_model(model_name, model, device, quantize=False, backend="torch", compile=False):
+    """Apply the execution options to a loaded model; returns the model to run"""
+    if quantize:
+        from core.quantize import quantize_and_cache, quantized_layers
+
+        # Models from cached_model() are quantized already
+        if not quantized_layers(model):
+            model = quantize_and_cache(model_name, model)
+    on_onnx = False
+    if device == "cpu" and backend == "onnx":
+        on_onnx = onnx_backend.use_onnx(model_name, model)
+    if device == "cpu" and compile and not on_onnx:
+        compiled.compile_model(model_name, model)
+    return model
@@ -0,0 +1,186 @@
+"""ONNX Runtime execution of the model on CPU.
+
+    python core/separator.py song.mp3 4 balanced wav "" cpu out --backend onnx
+    STEM_SPLITTER_BACKEND=onnx python app.py
+
+use_onnx() exports the model (every model of a bag, for htdemucs_ft) to
+ONNX once and replaces its forward with an ONNX Runtime session on the CPU
+execution provider, with all graph optimisations on. ONNX has no complex
+tensors, so for HTDemucs the STFT, the spectrogram mask and the iSTFT stay in
+torch: the graph takes the padded waveform and its magnitude spectrogram and
+returns the time branch's waveform and the frequency branch's output.
+Chunking, shifts and overlap-add are still done by demucs' apply_model.
+Other model types stay in torch.
+
+Exports are cached under <model cache>/onnx/, keyed by model, segment
+length and torch version. Sessions use as many threads as torch's intra-op
+pool (separator.py --threads). Needs the optional onnx and onnxruntime
+packages; without them, or if the export fails, the model runs in torch.
+"""
+import os
+import time
+import warnings
+
+import torch
+import torch.nn.functional as F
+
+ENV_VAR = "STEM_SPLITTER_BACKEND"
+BACKENDS = ("torch", "onnx")
+
+# Bump when the exported graphs change, to re-export cached models
+EXPORT_VERSION = 1
+OPSET = 17
+
+# HTDemucs methods kept out of the graph
+_SPECTRAL = ("_spec", "_magnitude", "_mask", "_ispec")
+
+
+def requested():
+    """Backend asked for in the environment: "torch" or "onnx" """
+    backend = os.environ.get(ENV_VAR, "").strip().lower()
+    return backend if backend in BACKENDS else "torch"
+
+
+def available():
+    try:
+        import onnx  # noqa: F401  (needed by the exporter)
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def is_spectral(model):
+    """True for HTDemucs: fixed-length input with the STFT inside forward"""
+    return all(hasattr(model, name) for name in _SPECTRAL) and getattr(model, "use_train_segment", False)
+
+
+class _WithoutSpectrogram(torch.nn.Module):
+    """HTDemucs forward from (waveform, magnitude) to (time output, frequency output).
+
+    The spectral methods are swapped out while tracing: _spec hands over the
+    magnitude computed outside, _mask captures the frequency branch's output
+    and _ispec adds nothing, so forward() returns the time branch alone.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, mix, mag):
+        model = self.model
+        held = {}
+
+        def capture(z, m):
+            held["spec"] = m
+            return z
+
+        model._spec = lambda x: mag
+        model._magnitude = lambda z: z
+        model._mask = capture
+        model._ispec = lambda z, length: z.new_zeros(())
+        try:
+            wave = model(mix)
+        finally:
+            for name in _SPECTRAL:
+                delattr(model, name)
+        return wave, held["spec"]
+
+
+def export_path(model_name, index, segment):
+    from core.quantize import model_cache_dir
+
+    version = torch.__version__.replace("+", "_")
+    name = f"{model_name}-{index}-seg{segment:g}-torch{version}-v{EXPORT_VERSION}.onnx"
+    return os.path.join(model_cache_dir(), "onnx", name)
+
+
+def export(model, path):
+    """Export one HTDemucs model to path (atomically)"""
+    frames = int(float(model.segment) * model.samplerate)
+    mix = torch.zeros(1, model.audio_channels, frames)
+    with torch.no_grad():
+        mag = model._magnitude(model._spec(mix))
+    inputs, outputs = ["mix", "mag"], ["wave", "spec"]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.tmp"
+    # The fused attention kernel used in eval mode has no ONNX equivalent
+    fastpath = torch.backends.mha.get_fastpath_enabled()
+    torch.backends.mha.set_fastpath_enabled(False)
+    try:
+        # The tracer warns about every shape turned into a constant
+        with torch.no_grad(), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            torch.onnx.export(_WithoutSpectrogram(model), (mix, mag), temp,
+                              input_names=inputs, output_names=outputs,
+                              dynamic_axes={name: {0: "batch"} for name in inputs + outputs},
+                              opset_version=OPSET, dynamo=False)
+        os.replace(temp, path)
+    finally:
+        torch.backends.mha.set_fastpath_enabled(fastpath)
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def create_session(path):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = torch.get_num_threads()
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+def _run(session, **inputs):
+    feed = {name: tensor.detach().cpu().contiguous().numpy() for name, tensor in inputs.items()}
+    return [torch.from_numpy(output) for output in session.run(None, feed)]
+
+
+def onnx_forward(model, session):
+    """Replacement for model.forward running the network in session"""
+
+    def forward(mix):
+        # As HTDemucs.forward: every chunk is padded to the training segment
+        length = mix.shape[-1]
+        training_length = int(float(model.segment) * model.samplerate)
+        if length < training_length:
+            mix = F.pad(mix, (0, training_length - length))
+        z = model._spec(mix)
+        wave, spec = _run(session, mix=mix, mag=model._magnitude(z))
+        out = wave + model._ispec(model._mask(z, spec), training_length)
+        return out[..., :length]
+
+    return forward
+
+
+def use_onnx(model_name, model):
+    """Run model (and the models of a bag) through ONNX Runtime; returns True on success"""
+    if not available():
+        print("[WARNING] ONNX backend needs the onnx and onnxruntime packages; using torch")
+        return False
+
+    members = list(getattr(model, "models", None) or [model])
+    if not all(is_spectral(member) for member in members):
+        print(f"[INFO] ONNX backend supports HTDemucs models only; {model_name} runs in torch")
+        return False
+    eager = [member.forward for member in members]
+    start = time.time()
+    try:
+        for index, member in enumerate(members):
+            member.eval()
+            path = export_path(model_name, index, float(member.segment))
+            if not os.path.exists(path):
+                print(f"[INFO] Exporting {model_name} to ONNX (once per machine)")
+                export(member, path)
+            member.forward = onnx_forward(member, create_session(path))
+    except Exception as e:
+        for member, forward in zip(members, eager):
+            member.forward = forward
+        print(f"[WARNING] ONNX backend unavailable, using torch: {e}")
+        return False
+    print(f"[INFO] ONNX Runtime sessions ready in {time.time() - start:.1f}s "
+          f"({torch.get_num_threads()} threads)")
+    return True
@@ -0,0 +1,141 @@
+import os
+import sys
+import random
+import importlib.util
+from contextlib import contextmanager
+
+import torch
+import torch.nn.functional as F
+
+from core import shift_worker
+
+# Worker pool kept alive between jobs; rebuilt when model, options or sizing change
+_pool = None
+_pool_key = None
+
+
+def available_threads():
+    """Threads this process may use (honours --threads / partitioning)"""
+    return torch.get_num_threads()
+
+
+def should_parallelize(mode, shifts, device):
+    """Decide whether to run shift passes in worker processes.
+
+    mode is "on", "off" or "auto"; auto only kicks in on CPU when every
+    pass can get at least two threads.
+    """
+    if mode == "off" or shifts < 2 or device != "cpu":
+        return False
+    if getattr(sys, "frozen", False):
+        # Spawned workers would start another copy of the app
+        if mode == "on":
+            print("[WARNING] Parallel shifts are not available in packaged builds")
+        return False
+    if mode == "on":
+        return True
+    return available_threads() >= 2 * shifts
+
+
+@contextmanager
+def _worker_main():
+    """Make processes spawned in this block run core.shift_worker as __main__.
+
+    Spawned children re-run the parent's __main__ (separator.py, with all its
+    imports) before anything else; a module spec on __main__ makes them
+    import the named module instead.
+    """
+    main = sys.modules["__main__"]
+    saved = getattr(main, "__spec__", None)
+    main.__spec__ = importlib.util.find_spec(shift_worker.__name__)
+    try:
+        yield
+    finally:
+        main.__spec__ = saved
+
+
+def get_pool(model_name, workers, threads, options):
+    """Return a warm process pool for model_name, starting one if needed.
+
+    options is (quantize, backend, compile), see core.model_setup; every
+    worker loads the model with them, as get_separator does in-process.
+    """
+    global _pool, _pool_key
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    key = (model_name, workers, threads, options)
+    if _pool is not None and _pool_key == key:
+        return _pool
+    shutdown_pool()
+
+    print(f"[INFO] Starting {workers} shift workers ({threads} threads each)")
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=shift_worker.init_worker,
+        initargs=(model_name, threads, os.getpid(), options),
+    )
+    try:
+        # Workers are spawned as tasks arrive: start them all here
+        with _worker_main():
+            started = [pool.submit(shift_worker.ready) for _ in range(workers)]
+        for future in started:
+            future.result()
+    except Exception:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    _pool = pool
+    _pool_key = key
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_key
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _pool_key = None
+
+
+def separate_shifts_parallel(separator, model_name, wav, shifts, on_pass=None, quantize=False):
+    """Separate wav like separator.separate_tensor, one shift pass per process.
+
+    Mirrors demucs' shift trick: the normalized input is padded by half a
+    second on both sides, every pass separates a randomly offset window of
+    it, and the realigned outputs are averaged. The passes are independent,
+    so on a multi-core CPU they run side by side, each worker with an equal
+    share of this process's threads. Workers load the model with the same
+    options as the separator's (quantize, STEM_SPLITTER_BACKEND,
+    STEM_SPLITTER_COMPILE). on_pass(done, total) is called as passes
+    finish. Returns {source: (channels, frames)}.
+    """
+    from concurrent.futures import as_completed
+    from core.model_setup import backend_options
+
+    workers = max(1, min(shifts, available_threads()))
+    threads = max(1, available_threads() // workers)
+    pool = get_pool(model_name, workers, threads, backend_options(quantize))
+
+    ref = wav.mean(0)
+    mean = ref.mean()
+    std = ref.std() + 1e-8
+    max_shift = int(0.5 * separator.samplerate)
+    padded = F.pad((wav - mean) / std, (max_shift, max_shift)).numpy()
+
+    futures = [
+        pool.submit(shift_worker.run_pass, padded, random.randint(0, max_shift), max_shift,
+                    separator._split, separator._overlap, separator._segment)
+        for _ in range(shifts)
+    ]
+    del padded
+
+    total = None
+    for done, future in enumerate(as_completed(futures), 1):
+        out = torch.from_numpy(future.result())
+        total = out if total is None else total + out
+        if on_pass is not None:
+            on_pass(done, shifts)
+
+    total = total / shifts * std + mean
+    return dict(zip(separator.model.sources, total))
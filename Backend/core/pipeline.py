@@ -0,0 +1,102 @@
+import queue
+import threading
+
+# Returned by a decode function to take an item out of the pipeline (e.g. a cache hit)
+SKIP = object()
+
+_END = object()
+
+
+def run_pipeline(items, decode, infer, encode, max_pending=1, on_error=None):
+    """Run decode -> infer -> encode over items with the three stages overlapped.
+
+    decode(item) runs on a decoder thread and encode(item, result) on an
+    encoder thread, while infer(item, decoded) runs on the calling thread
+    (the one that owns the model). So while item N is in inference, item
+    N+1 is being decoded and item N-1 encoded. Each hand-over queue holds at
+    most max_pending items, which bounds how much audio sits in memory.
+
+    An exception in any stage only fails that item: on_error(item, exc) is
+    called and the remaining items continue. Returns {index: exception} for
+    the items that failed.
+    """
+    items = list(items)
+    max_pending = max(1, int(max_pending))
+    decoded_queue = queue.Queue(maxsize=max_pending)
+    inferred_queue = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    errors = {}
+
+    def fail(index, error):
+        errors[index] = error
+        if on_error is not None:
+            try:
+                on_error(items[index], error)
+            except Exception as e:
+                print(f"[WARNING] Pipeline error handler failed: {e}")
+
+    def decoder():
+        for index, item in enumerate(items):
+            if stop.is_set():
+                break
+            try:
+                decoded = decode(item)
+            except Exception as e:
+                fail(index, e)
+                continue
+            if decoded is SKIP:
+                continue
+            decoded_queue.put((index, decoded))
+        decoded_queue.put(_END)
+
+    def encoder():
+        while True:
+            entry = inferred_queue.get()
+            if entry is _END:
+                break
+            index, result = entry
+            entry = None
+            if stop.is_set():
+                continue
+            try:
+                encode(items[index], result)
+            except Exception as e:
+                fail(index, e)
+            result = None
+
+    decode_thread = threading.Thread(target=decoder, daemon=True)
+    encode_thread = threading.Thread(target=encoder, daemon=True)
+    decode_thread.start()
+    encode_thread.start()
+
+    try:
+        while True:
+            entry = decoded_queue.get()
+            if entry is _END:
+                break
+            index, decoded = entry
+            # Drop our references so the input can be freed once inference is done
+            entry = None
+            try:
+                result = infer(items[index], decoded)
+            except Exception as e:
+                fail(index, e)
+                continue
+            finally:
+                decoded = None
+            inferred_queue.put((index, result))
+            result = None
+    except BaseException:
+        stop.set()
+        # Unblock the decoder if it is waiting on a full queue
+        while decode_thread.is_alive():
+            try:
+                decoded_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise
+    finally:
+        inferred_queue.put(_END)
+        encode_thread.join()
+
+    return errors
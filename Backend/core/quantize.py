@@ -0,0 +1,175 @@
+"""Dynamic int8 quantization for the "turbo" CPU quality.
+
+quantize_model() swaps the model's nn.Linear layers (the transformer's
+attention projections and feed-forward layers) and LSTMs for dynamically
+quantized versions: weights are stored as int8 and activations are quantized
+on the fly. Convolutions stay in float32, so the speed-up depends on how much
+of the model's time goes to its transformer, and the stems differ slightly
+from the float model's. quality_check() measures both on a reference clip:
+
+    python benchmark.py --turbo-check
+
+Quantized models are cached on disk as whole pickled modules, keyed by
+model name, torch and demucs versions, so later runs load the int8 model
+directly: neither the quantization step nor the float weights are needed
+(see core.model_setup). The cache lives next to the result cache and can be
+moved with STEM_SPLITTER_MODEL_CACHE. Quantized kernels only exist for CPU;
+on GPU the float model is used.
+"""
+import os
+import sys
+import time
+
+import torch
+
+ENV_CACHE = "STEM_SPLITTER_MODEL_CACHE"
+
+# Bump when the quantization recipe changes, to skip older cached models
+QUANTIZE_VERSION = 1
+
+
+def supported():
+    """True if torch has an int8 engine for this CPU"""
+    engines = [e for e in torch.backends.quantized.supported_engines if e != "none"]
+    return bool(engines)
+
+
+def model_cache_dir():
+    """Quantized model cache, overridable with STEM_SPLITTER_MODEL_CACHE"""
+    override = os.environ.get(ENV_CACHE)
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "StemSplitter", "cache", "models")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "stem-splitter", "models")
+
+
+def _demucs_version():
+    """Installed demucs version; the pickled models hold its classes"""
+    try:
+        import demucs
+    except ImportError:
+        return "none"
+    return getattr(demucs, "__version__", "unknown")
+
+
+def cache_path(model_name):
+    version = torch.__version__.replace("+", "_")
+    name = f"{model_name}-int8-v{QUANTIZE_VERSION}-torch{version}-demucs{_demucs_version()}.pt"
+    return os.path.join(model_cache_dir(), name)
+
+
+def quantize_model(model, inplace=False):
+    """Model with its Linear and LSTM layers dynamically quantized to int8"""
+    from torch.ao.quantization import quantize_dynamic
+
+    model.eval()
+    return quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8, inplace=inplace)
+
+
+def quantized_layers(model):
+    """Number of dynamically quantized layers in model"""
+    return sum(1 for m in model.modules() if type(m).__module__.startswith("torch.ao.nn.quantized.dynamic"))
+
+
+def load_cached(model_name):
+    """Quantized model from the disk cache, or None"""
+    path = cache_path(model_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        start = time.time()
+        # Written by save below, not downloaded: full unpickling is fine
+        quantized = torch.load(path, map_location="cpu", weights_only=False)
+        quantized.eval()
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable quantized model {path}: {e}")
+        return None
+    print(f"[INFO] Loaded int8 model from cache in {time.time() - start:.1f}s")
+    return quantized
+
+
+def quantize_and_cache(model_name, model):
+    """Quantize model in place and cache the result on disk"""
+    start = time.time()
+    quantized = quantize_model(model, inplace=True)
+    count = quantized_layers(quantized)
+    print(f"[INFO] Quantized {count} layers to int8 in {time.time() - start:.1f}s")
+    if count:
+        save(quantized, cache_path(model_name))
+    return quantized
+
+
+def load_quantized(model_name, model):
+    """Quantized version of model: from the disk cache, or quantized (in place) and cached"""
+    quantized = load_cached(model_name)
+    if quantized is not None:
+        return quantized
+    return quantize_and_cache(model_name, model)
+
+
+def save(model, path):
+    """Write model to path atomically; failures only warn"""
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.save(model, temp)
+        os.replace(temp, path)
+    except Exception as e:
+        print(f"[WARNING] Could not cache quantized model: {e}")
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def sdr(reference, estimate):
+    """Signal-to-distortion ratio of estimate against reference in dB, None if identical"""
+    noise = torch.sum((reference - estimate) ** 2).item()
+    signal = torch.sum(reference ** 2).item()
+    if noise == 0:
+        return None
+    return round(10 * torch.log10(torch.tensor((signal + 1e-8) / noise)).item(), 2)
+
+
+def quality_check(model, wav, repeat=1):
+    """Separate wav (channels, frames) with model in float32 and int8.
+
+    Returns {"float_seconds", "int8_seconds", "speedup", "sdr": {source: dB}},
+    the SDR of every int8 stem measured against the float stem. Times are the
+    best of repeat runs.
+    """
+    import copy
+    from core.fake_model import FakeModel, apply_fake_model
+
+    if isinstance(model, FakeModel):
+        apply_model = apply_fake_model
+    else:
+        from demucs.apply import apply_model
+
+    model.eval()
+    quantized = quantize_model(copy.deepcopy(model))
+
+    # Normalized like demucs.api does before separating
+    ref = wav.mean(0)
+    mix = ((wav - ref.mean()) / ref.std())[None]
+
+    def run(m):
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            with torch.no_grad():
+                out = apply_model(m, mix, shifts=0, split=True, overlap=0.25, progress=False)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return out[0], best
+
+    reference, float_seconds = run(model)
+    estimate, int8_seconds = run(quantized)
+    return {
+        "quantized_layers": quantized_layers(quantized),
+        "float_seconds": round(float_seconds, 3),
+        "int8_seconds": round(int8_seconds, 3),
+        "speedup": round(float_seconds / int8_seconds, 3) if int8_seconds else None,
+        "sdr": {name: sdr(reference[i], estimate[i]) for i, name in enumerate(model.sources)},
+    }
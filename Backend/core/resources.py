@@ -0,0 +1,272 @@
+"""Resource usage of the separator processes, sampled without subprocesses.
+
+ResourceSampler sums CPU time, resident memory and disk IO over a process
+and all of its descendants: separation hosts, separator.py subprocesses and
+parallel shift workers. On Linux everything is read from /proc; elsewhere
+psutil is used (see requirements.txt). GPU memory and utilisation come from
+NVML through pynvml (the nvidia-ml-py package) and are left out without it;
+the separators load torch, this process does not have to.
+Figures that cannot be measured are left out of the sample rather than
+reported as zero.
+
+Each sample() returns a dict:
+    processes        number of processes measured
+    cpu_percent      since the previous sample, 100 = one core
+    rss_bytes        resident memory, summed
+    read_bytes / write_bytes            bytes read/written since the previous sample
+    read_rate / write_rate              the same per second
+    (cpu_percent to write_rate are missing where neither /proc nor psutil
+    is available)
+    gpu_used_bytes, gpu_total_bytes, gpu_percent   (only with pynvml and a GPU)
+
+The sampling interval defaults to STEM_SPLITTER_SAMPLE_INTERVAL (seconds,
+1.5 if unset).
+"""
+import os
+import time
+import threading
+
+ENV_INTERVAL = "STEM_SPLITTER_SAMPLE_INTERVAL"
+DEFAULT_INTERVAL = 1.5
+
+_nvml = {"handle": None, "failed": False}
+
+
+def sample_interval():
+    try:
+        return max(0.1, float(os.environ.get(ENV_INTERVAL) or DEFAULT_INTERVAL))
+    except ValueError:
+        return DEFAULT_INTERVAL
+
+
+def has_proc():
+    return os.path.isdir("/proc/self")
+
+
+def _read(path):
+    with open(path, "r", encoding="ascii", errors="replace") as f:
+        return f.read()
+
+
+def _proc_children():
+    """Parent pid -> list of child pids, from /proc/<pid>/stat"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = _read(f"/proc/{entry}/stat")
+        except OSError:
+            continue
+        # The command name may contain spaces and parentheses
+        fields = stat[stat.rfind(")") + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def process_tree(root_pid, include_root=True):
+    """root_pid and all of its descendants"""
+    if not has_proc():
+        try:
+            import psutil
+        except ImportError:
+            return [root_pid] if include_root else []
+        try:
+            descendants = [p.pid for p in psutil.Process(root_pid).children(recursive=True)]
+        except psutil.Error:
+            descendants = []
+        return ([root_pid] if include_root else []) + descendants
+
+    children = _proc_children()
+    pids = [root_pid] if include_root else []
+    stack = list(children.get(root_pid, ()))
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, ()))
+    return pids
+
+
+_page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def read_process(pid):
+    """(cpu seconds, rss bytes, read bytes, write bytes) of one process, or None.
+
+    IO counters are None where they cannot be read (other users' processes,
+    macOS).
+    """
+    if not has_proc():
+        try:
+            import psutil
+        except ImportError:
+            return None
+        try:
+            process = psutil.Process(pid)
+            times = process.cpu_times()
+            rss = process.memory_info().rss
+            try:
+                io = process.io_counters()
+                read, write = io.read_bytes, io.write_bytes
+            except (psutil.Error, AttributeError):
+                read = write = None
+        except psutil.Error:
+            return None
+        return times.user + times.system, rss, read, write
+
+    try:
+        stat = _read(f"/proc/{pid}/stat")
+        statm = _read(f"/proc/{pid}/statm")
+    except OSError:
+        return None
+    fields = stat[stat.rfind(")") + 2:].split()
+    # utime and stime are fields 14 and 15 of stat, counted from 1
+    cpu = (int(fields[11]) + int(fields[12])) / _clock_ticks
+    rss = int(statm.split()[1]) * _page_size
+    read = write = None
+    try:
+        for line in _read(f"/proc/{pid}/io").splitlines():
+            name, _, value = line.partition(":")
+            if name == "read_bytes":
+                read = int(value)
+            elif name == "write_bytes":
+                write = int(value)
+    except OSError:
+        pass
+    return cpu, rss, read, write
+
+
+def can_measure_processes():
+    """True if per-process CPU, memory and IO can be read (/proc or psutil)"""
+    if has_proc():
+        return True
+    try:
+        import psutil  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def read_gpu(index=0):
+    """(used bytes, total bytes, utilisation percent) via pynvml, or None"""
+    if _nvml["failed"]:
+        return None
+    try:
+        import pynvml
+
+        if _nvml["handle"] is None:
+            pynvml.nvmlInit()
+            _nvml["handle"] = pynvml.nvmlDeviceGetHandleByIndex(index)
+        memory = pynvml.nvmlDeviceGetMemoryInfo(_nvml["handle"])
+        utilization = pynvml.nvmlDeviceGetUtilizationRates(_nvml["handle"])
+    except Exception:
+        # No pynvml, driver or GPU; don't try again
+        _nvml["failed"] = True
+        return None
+    return memory.used, memory.total, utilization.gpu
+
+
+class ResourceSampler:
+    """Samples the process tree under root_pid (default: this process).
+
+    With include_root=False only the descendants are measured, e.g. the
+    separator processes started by the app but not the app itself.
+    """
+
+    def __init__(self, root_pid=None, include_root=False, gpu=True):
+        self.root_pid = root_pid or os.getpid()
+        self.include_root = include_root
+        self.gpu = gpu
+        self.measure = can_measure_processes()
+        self._previous = {}  # pid -> (cpu, read, write)
+        self._last_time = None
+
+    def sample(self):
+        now = time.perf_counter()
+        elapsed = now - self._last_time if self._last_time is not None else 0.0
+        self._last_time = now
+
+        current = {}
+        cpu_delta = 0.0
+        rss = read_delta = write_delta = 0
+        pids = process_tree(self.root_pid, self.include_root) if self.measure else []
+        for pid in pids:
+            info = read_process(pid)
+            if info is None:
+                continue
+            cpu, process_rss, read, write = info
+            rss += process_rss
+            current[pid] = (cpu, read, write)
+            before = self._previous.get(pid)
+            if before is None:
+                # New process: its usage so far is not attributed to this interval
+                continue
+            cpu_delta += max(0.0, cpu - before[0])
+            if read is not None and before[1] is not None:
+                read_delta += max(0, read - before[1])
+            if write is not None and before[2] is not None:
+                write_delta += max(0, write - before[2])
+        self._previous = current
+
+        sample = {"time": time.time(), "processes": len(current)}
+        if self.measure:
+            sample.update({
+                "cpu_percent": round(100.0 * cpu_delta / elapsed, 1) if elapsed > 0 else 0.0,
+                "cpu_seconds": cpu_delta,
+                "rss_bytes": rss,
+                "read_bytes": read_delta,
+                "write_bytes": write_delta,
+                "read_rate": read_delta / elapsed if elapsed > 0 else 0.0,
+                "write_rate": write_delta / elapsed if elapsed > 0 else 0.0,
+            })
+        gpu = read_gpu() if self.gpu else None
+        if gpu is not None:
+            sample["gpu_used_bytes"], sample["gpu_total_bytes"], sample["gpu_percent"] = gpu
+        return sample
+
+
+def format_sample(sample):
+    """One-line summary for the status label; empty if nothing was measured"""
+    gb = 1024 ** 3
+    mb = 1024 ** 2
+    parts = []
+    if "cpu_percent" in sample:
+        parts += [
+            f"CPU {sample['cpu_percent']:.0f}%",
+            f"RAM {sample['rss_bytes'] / gb:.2f} GB",
+            f"IO {sample['read_rate'] / mb:.1f}/{sample['write_rate'] / mb:.1f} MB/s",
+        ]
+    if "gpu_used_bytes" in sample:
+        parts.append(f"GPU {sample['gpu_used_bytes'] / gb:.2f}/{sample['gpu_total_bytes'] / gb:.2f} GB "
+                     f"({sample['gpu_percent']}%)")
+    return "  ·  ".join(parts)
+
+
+def sample_until(stop, sampler, interval=None, on_sample=None):
+    """Sample every interval seconds until the stop Event is set.
+
+    Every sample goes to the metrics and to on_sample(sample).
+    """
+    from core import metrics
+
+    interval = interval or sample_interval()
+    sampler.sample()  # Baseline for the first interval
+    while not stop.wait(interval):
+        try:
+            sample = sampler.sample()
+        except Exception as e:
+            print(f"[WARNING] Resource sampling failed: {e}")
+            continue
+        metrics.record_resources(sample)
+        if on_sample is not None:
+            on_sample(sample)
+
+
+def start_sampling(on_sample=None, interval=None, root_pid=None, include_root=False):
+    """sample_until() on a daemon thread; set the returned Event to stop"""
+    stop = threading.Event()
+    sampler = ResourceSampler(root_pid=root_pid, include_root=include_root)
+    threading.Thread(target=sample_until, args=(stop, sampler, interval, on_sample),
+                     daemon=True).start()
+    return stop
@@ -0,0 +1,85 @@
+import random
+
+import torch
+
+
+def segment_length(separator):
+    """Samples in one model segment at the model's sample rate"""
+    segment = separator._segment
+    if segment is None:
+        model = separator.model
+        # Bags of models only expose the smallest segment of their members
+        segment = getattr(model, "max_allowed_segment", None) or model.segment
+    return int(separator.samplerate * float(segment))
+
+
+def shift_range(separator, shifts):
+    """Random shift range used by demucs for shifts > 0 (half a second)"""
+    return int(0.5 * separator.samplerate) if shifts else 0
+
+
+def fits_segment(separator, wav, shifts=0):
+    """True if a clip (with room for random shifts) fits in one model segment"""
+    return wav.shape[-1] + shift_range(separator, shifts) <= segment_length(separator)
+
+
+def separate_clips(separator, clips, shifts=0):
+    """Separate several short clips with one forward pass per shift.
+
+    clips are (channels, frames) tensors at separator.samplerate that each
+    pass fits_segment(). Every clip is normalized like
+    Separator.separate_tensor does, zero-padded to one segment (centered,
+    the way demucs pads a single short chunk) and stacked into a batch.
+    With shifts > 0 all clips move by the same random offset per pass and
+    the passes are averaged, as in demucs' apply_model.
+
+    Returns one {source: (channels, frames)} dict per clip, in order.
+    """
+    from core.fake_model import FakeModel, apply_fake_model
+
+    if isinstance(separator.model, FakeModel):
+        apply_model = apply_fake_model
+    else:
+        from demucs.apply import apply_model
+
+    length = segment_length(separator)
+    max_shift = shift_range(separator, shifts)
+    channels = separator.audio_channels
+
+    normalized = []
+    scales = []
+    for wav in clips:
+        ref = wav.mean(0)
+        mean = ref.mean()
+        std = ref.std() + 1e-8
+        normalized.append((wav - mean) / std)
+        scales.append((mean, std))
+
+    passes = max(1, shifts)
+    sums = [None] * len(clips)
+    for _ in range(passes):
+        offset = random.randint(0, max_shift) if shifts else 0
+        batch = torch.zeros(len(clips), channels, length)
+        starts = []
+        for index, wav in enumerate(normalized):
+            start = (length - wav.shape[-1] - max_shift) // 2 + offset
+            batch[index, :, start:start + wav.shape[-1]] = wav
+            starts.append(start)
+
+        with torch.no_grad():
+            estimates = apply_model(separator.model, batch, shifts=0, split=False,
+                                    device=separator._device, segment=separator._segment)
+        estimates = estimates.cpu()
+        del batch
+
+        for index, start in enumerate(starts):
+            piece = estimates[index, ..., start:start + normalized[index].shape[-1]]
+            sums[index] = piece.clone() if sums[index] is None else sums[index] + piece
+        del estimates
+
+    results = []
+    sources = separator.model.sources
+    for total, (mean, std) in zip(sums, scales):
+        stems = total / passes * std + mean
+        results.append(dict(zip(sources, stems)))
+    return results
@@ -1,153 +1,440 @@
 import sys
 import os
-import torch
-import torchaudio
-import soundfile as sf
 import time
 
+# Allow "from core import ..." when run as a script (python core/separator.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import startup_profile
+
+startup_profile.set_process("separator")
+with startup_profile.timed("import torch"):
+    import torch
+with startup_profile.timed("import torchaudio"):
+    import torchaudio
+
+from core import events, metrics, job_profile, compiled, onnx_backend
+from core.streaming import can_stream, should_stream, separate_streaming
+from core.parallel_shifts import should_parallelize
+from core.writer import StemWriter, open_audio_file, write_blocks
+from core.model_setup import backend_options, cached_model, execution_settings, preloaded, prepare_model
+
 def custom_save(filepath, src, sample_rate, **kwargs):
-    src = src.detach().cpu().numpy().T
-    sf.write(filepath, src, sample_rate)
+    # Written in blocks so no full-length transposed copy of the stem is made
+    channels = src.shape[0] if src.dim() > 1 else 1
+    with open_audio_file(filepath, sample_rate, channels) as handle:
+        write_blocks(handle, src)
 
 torchaudio.save = custom_save
 
 def check_gpu_availability():
-    """Check if CUDA GPU is available"""
-    try:
-        if torch.cuda.is_available():
-            gpu_name = torch.cuda.get_device_name(0)
-            gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1e9
-            return True, f"{gpu_name} ({gpu_memory:.1f}GB)"
-        else:
-            return False, "No GPU available"
-    except:
+    """Check if CUDA GPU is available (cached on disk between runs)"""
+    from core.hardware import get_hardware_info
+
+    info = get_hardware_info()
+    if info.get("error"):
         return False, "Error checking GPU"
+    if info.get("gpu_available"):
+        return True, f"{info['gpu_name']} ({info['gpu_memory_gb']:.1f}GB)"
+    return False, "No GPU available"
+
+# Quality presets accepted on the command line, see resolve_settings
+QUALITIES = ("fast", "balanced", "best", "turbo")
+
+# Loaded demucs Separator kept alive between jobs in the same process
+_loaded_separator = None
+_loaded_key = None
+
+# State for turning demucs chunk callbacks into progress events
+_progress = {"shifts": 0, "last": -1, "enabled": True, "file": None}
+
+def reset_progress(shifts, file=None):
+    """Start progress reporting for a new file; file tags events in batch runs"""
+    _progress["shifts"] = shifts
+    _progress["last"] = -1
+    _progress["enabled"] = True
+    _progress["file"] = file
+    _progress["started"] = time.time()
+
+def report_progress(percent):
+    """Emit a progress event if the percentage went up"""
+    percent = max(0, min(100, int(percent)))
+    if percent > _progress["last"]:
+        _progress["last"] = percent
+        if _progress["file"] is not None:
+            events.emit("progress", percent=percent, file=_progress["file"])
+        else:
+            events.emit("progress", percent=percent)
+
+def on_chunk(info):
+    """demucs.api callback, called when a chunk starts or ends"""
+    if info.get("state") != "end":
+        return
+    startup_profile.record_once("first segment", time.time() - _progress.get("started", time.time()))
+    if not _progress["enabled"]:
+        return
+    length = info.get("audio_length") or 0
+    if not length:
+        return
+    passes = max(1, _progress["shifts"])
+    total = max(1, info.get("models", 1)) * passes
+    done = info.get("model_idx_in_bag", 0) * passes + info.get("shift_idx", 0)
+    done += min(1.0, (info.get("segment_offset", 0) + 1) / length)
+    report_progress(100 * done / total)
+
+def get_separator(model_name, device, shifts, quantize=False):
+    """Return a demucs Separator, reusing the loaded one if settings match.
+
+    With quantize, the model's linear layers run in int8 (see core.quantize).
+    """
+    global _loaded_separator, _loaded_key
+    from core.fake_model import is_fake_model, FakeSeparator
+    if is_fake_model(model_name):
+        Separator = FakeSeparator
+    else:
+        with startup_profile.timed("import demucs.api"):
+            from demucs.api import Separator
+
+    key = (model_name, device, shifts, quantize)
+    if _loaded_separator is not None and _loaded_key == key:
+        print(f"Reusing loaded model ({model_name}{' int8' if quantize else ''}, {device}, {shifts} shifts)")
+        return _loaded_separator
+
+    # Drop the previous model before loading a new one so both never sit in memory
+    if _loaded_separator is not None:
+        print(f"Settings changed, unloading {_loaded_key[0]}")
+        _loaded_separator = None
+        _loaded_key = None
+        if device == "cuda" and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    print(f"Loading model...")
+    start_load = time.time()
+    # A cached int8 model replaces the float one, which is then never loaded
+    cached = cached_model(model_name, quantize)
+    if cached is not None:
+        Separator = preloaded(Separator, cached)
+    separator = Separator(
+        model=model_name,
+        device=device,
+        shifts=shifts,
+        progress=True,
+        callback=on_chunk
+    )
+    separator._model = prepare_model(model_name, separator._model, device, *backend_options(quantize))
+    print(f"Model loaded in {time.time() - start_load:.1f}s")
+    startup_profile.record("model load", time.time() - start_load, model=model_name, device=device)
 
-def separate_with_api(input_file, stem_count, quality, audio_format, bitrate, requested_device, output_dir):
-    """Use demucs Python API for separation"""
+    _loaded_separator = separator
+    _loaded_key = key
+    return separator
+
+def stem_output_files(sources, stem_count, output_path, ext):
+    """Map model source names to the output files they are saved as"""
+    output_files = {}
+    for stem in sources:
+        if stem_count == 2 and stem != "vocals":
+            # For 2-stem mode, we want "vocals" and "other" becomes "instrumental"
+            if stem != "other":
+                continue
+            output_files[stem] = os.path.join(output_path, f"instrumental{ext}")
+        else:
+            output_files[stem] = os.path.join(output_path, f"{stem}{ext}")
+    return output_files
+
+def resolve_settings(stem_count, quality, audio_format, bitrate, requested_device):
+    """Turn UI-level settings into model name, shifts, device and output format"""
+    from core.fake_model import fake_model_requested, FAKE_MODEL, FAKE_MODEL_6S
+    
+    # Determine model name
+    if fake_model_requested():
+        model_name = FAKE_MODEL_6S if stem_count == 6 else FAKE_MODEL
+        print(f"Model: Fake test model ({model_name})")
+    elif stem_count == 2:
+        model_name = "htdemucs_ft"
+        print(f"Model: HTDemucs FT (2 stems: vocals + instrumental)")
+    elif stem_count == 6:
+        model_name = "htdemucs_6s"
+        print(f"Model: HTDemucs 6S (6 stems)")
+    else:
+        model_name = "htdemucs"
+        print(f"Model: HTDemucs (4 stems: vocals, drums, bass, other)")
+
+    # Determine shifts
+    if quality == "fast":
+        shifts = 0
+        print(f"Quality: Fast (0 shifts)")
+    elif quality == "best":
+        shifts = 2
+        print(f"Quality: Best (2 shifts)")
+    elif quality == "turbo":
+        shifts = 0
+        print(f"Quality: Turbo (0 shifts, int8 model on CPU)")
+    else:  # balanced
+        shifts = 1
+        print(f"Quality: Balanced (1 shift)")
+
+    # Determine device
+    gpu_available, gpu_info = check_gpu_availability()
+    if requested_device == "cuda":
+        if gpu_available:
+            device = "cuda"
+            print(f"Device: GPU - {gpu_info}")
+        else:
+            device = "cpu"
+            print(f"⚠️  GPU requested but not available. Falling back to CPU.")
+            print(f"Device: CPU")
+    elif requested_device == "cpu":
+        device = "cpu"
+        print("Device: CPU")
+    else:  # auto
+        if gpu_available:
+            device = "cuda"
+            print(f"Device: Auto-selected GPU - {gpu_info}")
+        else:
+            device = "cpu"
+            print("Device: Auto-selected CPU (GPU not available)")
+
+    # Int8 kernels are CPU-only; turbo on GPU is fast quality with the float model
+    quantize = False
+    if quality == "turbo":
+        from core.quantize import supported
+        quantize = device == "cpu" and supported()
+        if not quantize:
+            print(f"⚠️  Turbo needs int8 support on CPU; using the float model.")
+
+    # Set output format
+    if audio_format == "mp3":
+        ext = ".mp3"
+        bitrate_str = bitrate if bitrate else "320"
+        print(f"Format: MP3 ({bitrate_str} kbps)")
+    else:
+        ext = ".wav"
+        bitrate_str = None
+        print(f"Format: WAV (Lossless)")
+    
+    return {
+        "model_name": model_name,
+        "shifts": shifts,
+        "quantize": quantize,
+        "device": device,
+        "ext": ext,
+        "bitrate": bitrate_str,
+    }
+
+def output_path_for(input_file, output_dir, model_name):
+    """Folder the stems of input_file are written to: <output_dir>/<model>/<track>"""
+    if output_dir and output_dir != "":
+        base_output = output_dir
+    else:
+        base_output = os.path.join(os.path.expanduser("~"), "separated")
+    return os.path.join(base_output, model_name, os.path.splitext(os.path.basename(input_file))[0])
+
+def cache_settings_for(stem_count, audio_format, settings):
+    """Settings that shape the output, for the result cache key"""
+    cache_settings = {
+        "model": settings["model_name"],
+        "stems": stem_count,
+        "shifts": settings["shifts"],
+        "format": audio_format,
+        "bitrate": settings["bitrate"],
+    }
+    # int8, ONNX and compiled kernels give slightly different stems
+    cache_settings.update(execution_settings(settings["device"], settings.get("quantize", False)))
+    return cache_settings
+
+def lookup_cached_result(input_file, settings, output_path):
+    """Place cached stems in output_path; returns (cache, key, hit)"""
+    from core.cache import ResultCache, cache_key
+
+    try:
+        cache = ResultCache()
+        start_hash = time.time()
+        key = cache_key(input_file, settings)
+        events.emit("timing", stage="hash", seconds=round(time.time() - start_hash, 3))
+        if cache.lookup(key) is None:
+            return cache, key, False
+        cache.materialize(key, output_path)
+        return cache, key, True
+    except Exception as e:
+        print(f"[WARNING] Result cache unavailable: {e}")
+        return None, None, False
+
+def store_cached_result(cache, key, output_files, input_file, settings, audio_format):
+    """Add freshly written stems to the result cache; failures only warn"""
+    try:
+        cache.store(key, list(output_files.values()),
+                    {"input": os.path.basename(input_file), "model": settings["model_name"],
+                     "shifts": settings["shifts"], "format": audio_format})
+    except Exception as e:
+        print(f"[WARNING] Could not add result to cache: {e}")
+
+def apply_tuning(separator, device, shifts, duration, channels=2):
+    """Set segment, overlap and split for this input (CPU only, see core.autotune).
+
+    Returns the tuning dict, or None when tuning is off or the duration is unknown.
+    """
+    from core import autotune
+    
+    if device != "cpu" or duration is None or not autotune.enabled():
+        return None
+    model = separator.model
+    models = len(getattr(model, "models", None) or [model])
+    # Bags of models only expose the smallest segment of their members
+    segment = getattr(model, "max_allowed_segment", None)
+    if segment is None or segment == float("inf"):
+        segment = model.segment
+    tuning = autotune.tune(duration, channels, len(model.sources), float(segment), models, shifts)
+    separator.update_parameter(segment=tuning["segment"], overlap=tuning["overlap"],
+                               split=tuning["split"])
+    print(f"Auto-tuned: {autotune.describe(tuning)}")
+    return tuning
+
+def separate_shifts_in_workers(separator, model_name, input_file, shifts, quantize=False):
+    """Run the shift passes in parallel worker processes; None if that fails"""
+    from core.parallel_shifts import separate_shifts_parallel
+
+    print(f"Running {shifts} shift passes in parallel worker processes")
+    _progress["enabled"] = False
     try:
-        from demucs.api import Separator
-        from demucs.audio import save_audio
+        wav = separator._load_audio(input_file)
+        return separate_shifts_parallel(
+            separator, model_name, wav, shifts,
+            on_pass=lambda done, total: report_progress(100 * done / total),
+            quantize=quantize
+        )
+    except Exception as e:
+        print(f"[WARNING] Parallel shifts failed ({e}); running passes in sequence")
+        return None
+    finally:
+        _progress["enabled"] = True
+
+def separate_with_api(input_file, stem_count, quality, audio_format, bitrate, requested_device, output_dir, stream="auto", use_cache=True, parallel_shifts="auto", profile=None):
+    """Use demucs Python API for separation.
+
+    stream is "on", "off" or "auto"; streaming separates in overlapping
+    windows so memory stays bounded for very long inputs. With use_cache,
+    results are looked up in and added to the local result cache.
+    parallel_shifts ("on", "off" or "auto") runs the shift passes of
+    multi-shift qualities in worker processes on CPU. profile ("torch" or
+    "cprofile") saves a trace of the separation next to the stems.
+    """
+    try:
+        from core.fake_model import is_fake_model
         
         print(f"[API] Using demucs Python API for separation")
         
-        # Determine model name
-        if stem_count == 2:
-            model_name = "htdemucs_ft"
-            print(f"Model: HTDemucs FT (2 stems: vocals + instrumental)")
-        elif stem_count == 6:
-            model_name = "htdemucs_6s"
-            print(f"Model: HTDemucs 6S (6 stems)")
-        else:
-            model_name = "htdemucs"
-            print(f"Model: HTDemucs (4 stems: vocals, drums, bass, other)")
+        settings = resolve_settings(stem_count, quality, audio_format, bitrate, requested_device)
+        model_name = settings["model_name"]
+        if not is_fake_model(model_name):
+            # Fail early (and fall back to the CLI) when the API is missing
+            from demucs.api import Separator
+        shifts = settings["shifts"]
+        device = settings["device"]
+        ext = settings["ext"]
+        bitrate_str = settings["bitrate"]
         
-        # Determine shifts
-        if quality == "fast":
-            shifts = 0
-            print(f"Quality: Fast (0 shifts)")
-        elif quality == "best":
-            shifts = 2
-            print(f"Quality: Best (2 shifts)")
-        else:  # balanced
-            shifts = 1
-            print(f"Quality: Balanced (1 shift)")
-        
-        # Determine device
-        gpu_available, gpu_info = check_gpu_availability()
-        if requested_device == "cuda":
-            if gpu_available:
-                device = "cuda"
-                print(f"Device: GPU - {gpu_info}")
-            else:
-                device = "cpu"
-                print(f"⚠️  GPU requested but not available. Falling back to CPU.")
-                print(f"Device: CPU")
-        elif requested_device == "cpu":
-            device = "cpu"
-            print("Device: CPU")
-        else:  # auto
-            if gpu_available:
-                device = "cuda"
-                print(f"Device: Auto-selected GPU - {gpu_info}")
-            else:
-                device = "cpu"
-                print("Device: Auto-selected CPU (GPU not available)")
+        output_path = output_path_for(input_file, output_dir, model_name)
+        os.makedirs(output_path, exist_ok=True)
+        print(f"Output directory: {output_path}")
         
-        # Set output format
-        if audio_format == "mp3":
-            ext = ".mp3"
-            bitrate_str = bitrate if bitrate else "320"
-            print(f"Format: MP3 ({bitrate_str} kbps)")
-        else:
-            ext = ".wav"
-            bitrate_str = None
-            print(f"Format: WAV (Lossless)")
+        # Same audio with the same settings: reuse the stems from an earlier run
+        cache = cache_key_value = None
+        if use_cache:
+            cache_settings = cache_settings_for(stem_count, audio_format, settings)
+            cache, cache_key_value, hit = lookup_cached_result(input_file, cache_settings, output_path)
+            if hit:
+                print(f"✅ Cache hit - reused stems from an earlier run")
+                print(f"Output saved to: {output_path}")
+                report_progress(100)
+                events.emit("output", path=output_path)
+                return output_path
         
-        # Create separator
-        print(f"Loading model...")
+        # Create separator (reused across jobs when running as a host)
+        events.emit("stage", stage="load")
         start_load = time.time()
-        separator = Separator(
-            model=model_name, 
-            device=device, 
-            shifts=shifts,
-            progress=True
-        )
+        separator = get_separator(model_name, device, shifts, settings["quantize"])
         load_time = time.time() - start_load
-        print(f"Model loaded in {load_time:.1f}s")
+        events.emit("timing", stage="load", seconds=round(load_time, 3))
+        reset_progress(shifts)
         
-        # Set output directory
-        if output_dir and output_dir != "":
-            base_output = output_dir
-        else:
-            base_output = os.path.join(os.path.expanduser("~"), "separated")
+        from core.autotune import audio_info
+        duration, channels = audio_info(input_file) or (None, 2)
+        tuning = apply_tuning(separator, device, shifts, duration, channels)
+        if tuning and tuning["stream"] and stream == "auto":
+            print(f"Input does not fit in memory at once; streaming it")
+            stream = "on"
         
-        output_path = os.path.join(base_output, model_name, os.path.splitext(os.path.basename(input_file))[0])
-        os.makedirs(output_path, exist_ok=True)
-        print(f"Output directory: {output_path}")
+        output_files = stem_output_files(separator.model.sources, stem_count, output_path, ext)
         
         # Process the file
         print(f"{'='*50}")
-        print(f"Starting separation...")
-        start_sep = time.time()
-        
-        # This is where the actual separation happens
-        origin, separated = separator.separate_audio_file(input_file)
-        
-        sep_time = time.time() - start_sep
-        print(f"Separation completed in {sep_time:.1f}s")
-        
-        # Save outputs
-        print("Saving stems...")
-        start_save = time.time()
-        
-        for stem, source in separated.items():
-            if stem_count == 2 and stem != "vocals":
-                # For 2-stem mode, we want "vocals" and "other" becomes "instrumental"
-                if stem != "other":
-                    continue
-                output_file = os.path.join(output_path, f"instrumental{ext}")
-                stem_display = "instrumental"
+        with job_profile.profiled(profile, input_file, output_path):
+            if should_stream(input_file, stream):
+                # Long input: decode, separate and write window by window
+                print(f"Starting streaming separation...")
+                events.emit("stage", stage="stream")
+                start_sep = time.time()
+                # Chunk callbacks restart for every window; the stream reports its own progress
+                _progress["enabled"] = False
+                separate_streaming(separator, input_file, output_files, bitrate=bitrate_str,
+                                   on_progress=report_progress)
+                sep_time = time.time() - start_sep
+                save_time = 0.0
+                duration = can_stream(input_file) or 0.0
+                events.emit("timing", stage="stream", seconds=round(sep_time, 3))
+                print(f"Streaming separation completed in {sep_time:.1f}s")
+                for stem in output_files:
+                    print(f"  ✓ Saved: {os.path.splitext(os.path.basename(output_files[stem]))[0]}")
             else:
-                output_file = os.path.join(output_path, f"{stem}{ext}")
-                stem_display = stem
-            
-            # Configure save parameters for MP3
-            save_kwargs = {}
-            if audio_format == "mp3" and bitrate_str:
-                save_kwargs["bitrate"] = bitrate_str
+                print(f"Starting separation...")
+                events.emit("stage", stage="separate")
+                start_sep = time.time()
+                
+                # This is where the actual separation happens
+                separated = None
+                if should_parallelize(parallel_shifts, shifts, device):
+                    separated = separate_shifts_in_workers(separator, model_name, input_file, shifts,
+                                                           settings["quantize"])
+                if separated is None:
+                    origin, separated = separator.separate_audio_file(input_file)
+                else:
+                    origin = None
+                duration = next(iter(separated.values())).shape[-1] / separator.samplerate
+                
+                sep_time = time.time() - start_sep
+                print(f"Separation completed in {sep_time:.1f}s")
+                events.emit("timing", stage="separate", seconds=round(sep_time, 3))
+                
+                # Save outputs block by block; each stem is encoded on the writer
+                # thread while the next one is handed over
+                print("Saving stems...")
+                events.emit("stage", stage="save")
+                start_save = time.time()
+                
+                with StemWriter(output_files, separator.samplerate, separator.audio_channels,
+                                bitrate=bitrate_str, background=True) as writer:
+                    for stem, output_file in output_files.items():
+                        writer.write({stem: separated.pop(stem)}, rescale=True)
+                        print(f"  ✓ Saved: {os.path.splitext(os.path.basename(output_file))[0]}")
+                del separated, origin
+                
+                save_time = time.time() - start_save
+                events.emit("timing", stage="save", seconds=round(save_time, 3))
             
-            save_audio(source, output_file, samplerate=separator.samplerate, **save_kwargs)
-            print(f"  ✓ Saved: {stem_display}")
-        
-        save_time = time.time() - start_save
-        
         total_time = time.time() - start_load
         print(f"{'='*50}")
         print(f"✅ Separation completed successfully!")
         print(f"Total time: {total_time:.1f}s (load: {load_time:.1f}s, separate: {sep_time:.1f}s, save: {save_time:.1f}s)")
         print(f"Output saved to: {output_path}")
         
+        if cache is not None:
+            store_cached_result(cache, cache_key_value, output_files, input_file, settings, audio_format)
+        
+        events.emit("audio", seconds=round(duration, 3), elapsed=round(sep_time + save_time, 3))
+        report_progress(100)
+        events.emit("output", path=output_path)
+        
         return output_path
         
     except ImportError as e:
@@ -159,6 +446,18 @@ def separate_with_api(input_file, stem_count, quality, audio_format, bitrate, re
         traceback.print_exc()
         raise
 
+def extract_percentage(line):
+    """Extract a tqdm percentage ("14%|####  | 23.4/169.65") from demucs CLI output"""
+    import re
+
+    match = re.search(r'(\d+)%', line)
+    if match:
+        try:
+            return int(match.group(1))
+        except ValueError:
+            pass
+    return None
+
 def separate_with_subprocess(input_file, stem_count, quality, audio_format, bitrate, requested_device, output_dir):
     """Fallback to subprocess method if API fails"""
     import subprocess
@@ -183,6 +482,10 @@ def separate_with_subprocess(input_file, stem_count, quality, audio_format, bitr
     if quality == "fast":
         cmd += ["--shifts", "0"]
         print("Quality: Fast (0 shifts)")
+    elif quality == "turbo":
+        # The demucs CLI has no int8 mode
+        cmd += ["--shifts", "0"]
+        print("Quality: Turbo (0 shifts, float model)")
     elif quality == "best":
         cmd += ["--shifts", "2"]
         print("Quality: Best (2 shifts)")
@@ -265,16 +568,27 @@ def separate_with_subprocess(input_file, stem_count, quality, audio_format, bitr
             creationflags=creationflags
         )
         
-        # Print output in real-time
+        # Print output in real-time and forward tqdm percentages as events
+        reset_progress(0)
         for line in process.stdout:
             line = line.strip()
             if line:
                 print(line)
+                percent = extract_percentage(line)
+                if percent is not None:
+                    report_progress(percent)
         
         process.wait()
         
         if process.returncode == 0:
             print(f"\n✅ Separation completed successfully with {actual_device.upper()}!")
+            # demucs CLI writes to <out>/<model>/<track>, "separated" by default
+            output_path = os.path.join(
+                output_dir or "separated", cmd[2],
+                os.path.splitext(os.path.basename(input_file))[0]
+            )
+            if os.path.exists(output_path):
+                events.emit("output", path=os.path.abspath(output_path))
             return True
         else:
             print(f"\n⚠️  Separation completed with return code: {process.returncode}")
@@ -284,15 +598,8 @@ def separate_with_subprocess(input_file, stem_count, quality, audio_format, bitr
         print(f"\n❌ Error during separation: {e}")
         return False
 
-def main():
-    input_file = sys.argv[1]
-    stem_count = int(sys.argv[2])
-    quality = sys.argv[3]
-    audio_format = sys.argv[4]
-    bitrate = sys.argv[5]
-    requested_device = sys.argv[6]
-    output_dir = sys.argv[7]
-    
+def process_file(input_file, stem_count, quality, audio_format, bitrate, requested_device, output_dir, stream="auto", use_cache=True, parallel_shifts="auto", profile=None):
+    """Separate one file, trying the API first and the demucs CLI as fallback"""
     print(f"\n{'='*50}")
     print(f"STEM SPLITTER - Processing: {os.path.basename(input_file)}")
     print(f"{'='*50}")
@@ -301,9 +608,11 @@ def main():
     try:
         output_path = separate_with_api(
             input_file, stem_count, quality, audio_format, 
-            bitrate, requested_device, output_dir
+            bitrate, requested_device, output_dir, stream=stream, use_cache=use_cache,
+            parallel_shifts=parallel_shifts, profile=profile
         )
         print(f"{'='*50}")
+        return True, output_path
         
     except Exception as api_error:
         print(f"\n⚠️  API method failed: {api_error}")
@@ -317,7 +626,405 @@ def main():
         
         if not success:
             print(f"\n❌ Both separation methods failed.")
+            events.emit("error", message=f"Both separation methods failed. API error: {api_error}")
+        return success, None
+
+def separate_batch(input_files, stem_count, quality, audio_format, bitrate, requested_device, output_dir, use_cache=True, max_pending=1, results=None, clip_batch=0):
+    """Separate several files with one loaded model, pipelined.
+
+    While one file is in inference the next one is decoded and the previous
+    one's stems are encoded (see core.pipeline). Every file ends with a
+    "file_done" event. results maps input file -> (ok, output_path) and is
+    filled in as files finish; the list of (input_file, ok, output_path) is
+    returned in input order.
+
+    With clip_batch > 1, files move through the pipeline in groups of that
+    size and clips that fit in one model segment are separated together in
+    a single forward pass (see core.segment_batch).
+    """
+    from core.pipeline import run_pipeline, SKIP
+
+    if results is None:
+        results = {}
+    # Input file -> [audio seconds, separate + save seconds]
+    spent = {}
+    
+    print(f"[API] Pipelined separation of {len(input_files)} files")
+    
+    settings = resolve_settings(stem_count, quality, audio_format, bitrate, requested_device)
+    model_name = settings["model_name"]
+    shifts = settings["shifts"]
+    ext = settings["ext"]
+    cache_settings = cache_settings_for(stem_count, audio_format, settings)
+    
+    events.emit("stage", stage="load")
+    start_load = time.time()
+    separator = get_separator(model_name, settings["device"], shifts, settings["quantize"])
+    events.emit("timing", stage="load", seconds=round(time.time() - start_load, 3))
+    print(f"{'='*50}")
+    
+    def finish(input_file, ok, output_path):
+        results[input_file] = (ok, output_path)
+        events.emit("file_done", file=input_file, ok=ok, output_path=output_path)
+    
+    def decode(input_file):
+        name = os.path.basename(input_file)
+        output_path = output_path_for(input_file, output_dir, model_name)
+        cache = key = None
+        if use_cache:
+            cache, key, hit = lookup_cached_result(input_file, cache_settings, output_path)
+            if hit:
+                print(f"✅ Cache hit for {name} - reused stems from an earlier run")
+                events.emit("progress", percent=100, file=input_file)
+                events.emit("output", path=output_path, file=input_file)
+                finish(input_file, True, output_path)
+                return SKIP
+        start = time.time()
+        wav = separator._load_audio(input_file)
+        events.emit("timing", stage="decode", seconds=round(time.time() - start, 3), file=input_file)
+        print(f"Decoded: {name}")
+        return wav, output_path, cache, key
+    
+    def collect(decoded, separated):
+        wav, output_path, cache, key = decoded
+        # Only keep the stems that get written
+        output_files = stem_output_files(separator.model.sources, stem_count, output_path, ext)
+        stems = {stem: separated[stem] for stem in output_files}
+        return stems, output_files, output_path, cache, key
+    
+    def infer(input_file, decoded):
+        print(f"Separating: {os.path.basename(input_file)}")
+        events.emit("stage", stage="separate", file=input_file)
+        reset_progress(shifts, file=input_file)
+        wav = decoded[0]
+        apply_tuning(separator, settings["device"], shifts, wav.shape[-1] / separator.samplerate, wav.shape[0])
+        start = time.time()
+        _, separated = separator.separate_tensor(wav, separator.samplerate)
+        seconds = time.time() - start
+        events.emit("timing", stage="separate", seconds=round(seconds, 3), file=input_file)
+        spent[input_file] = [decoded[0].shape[-1] / separator.samplerate, seconds]
+        return collect(decoded, separated)
+    
+    def encode(input_file, inferred):
+        stems, output_files, output_path, cache, key = inferred
+        events.emit("stage", stage="save", file=input_file)
+        start = time.time()
+        # Created only now, so inputs that fail to decode leave no empty folder
+        os.makedirs(output_path, exist_ok=True)
+        with StemWriter(output_files, separator.samplerate, separator.audio_channels,
+                        bitrate=settings["bitrate"]) as writer:
+            for stem in list(stems):
+                writer.write({stem: stems.pop(stem)}, rescale=True)
+        save_time = time.time() - start
+        events.emit("timing", stage="save", seconds=round(save_time, 3), file=input_file)
+        if cache is not None:
+            store_cached_result(cache, key, output_files, input_file, settings, audio_format)
+        if input_file in spent:
+            duration, sep_time = spent.pop(input_file)
+            events.emit("audio", seconds=round(duration, 3), elapsed=round(sep_time + save_time, 3),
+                        file=input_file)
+        print(f"  ✓ Saved: {os.path.basename(input_file)} -> {output_path}")
+        events.emit("progress", percent=100, file=input_file)
+        events.emit("output", path=output_path, file=input_file)
+        finish(input_file, True, output_path)
+    
+    def on_error(input_file, error):
+        print(f"[API ERROR] {os.path.basename(input_file)} failed: {error}")
+        events.emit("error", message=str(error), file=input_file)
+        finish(input_file, False, None)
+    
+    start_total = time.time()
+    if clip_batch and clip_batch > 1:
+        from core.segment_batch import fits_segment, separate_clips
+        
+        def decode_group(group):
+            decoded = []
+            for input_file in group:
+                try:
+                    item = decode(input_file)
+                except Exception as e:
+                    on_error(input_file, e)
+                    continue
+                if item is not SKIP:
+                    decoded.append((input_file, item))
+            return decoded or SKIP
+        
+        def infer_group(group, decoded):
+            short = [(f, item) for f, item in decoded if fits_segment(separator, item[0], shifts)]
+            inferred = []
+            if short:
+                print(f"Separating {len(short)} clips in one batch")
+                for input_file, _ in short:
+                    events.emit("stage", stage="separate", file=input_file)
+                start = time.time()
+                try:
+                    separated_clips = separate_clips(separator, [item[0] for _, item in short], shifts)
+                except Exception as e:
+                    for input_file, _ in short:
+                        on_error(input_file, e)
+                else:
+                    seconds = time.time() - start
+                    for (input_file, item), separated in zip(short, separated_clips):
+                        events.emit("timing", stage="separate", seconds=round(seconds, 3),
+                                    batch=len(short), file=input_file)
+                        # The forward pass is shared; each clip is charged its share
+                        spent[input_file] = [item[0].shape[-1] / separator.samplerate, seconds / len(short)]
+                        inferred.append((input_file, collect(item, separated)))
+            # Clips longer than a segment take the regular path
+            for input_file, item in decoded:
+                if any(input_file == f for f, _ in short):
+                    continue
+                try:
+                    inferred.append((input_file, infer(input_file, item)))
+                except Exception as e:
+                    on_error(input_file, e)
+            return inferred
+        
+        def encode_group(group, inferred):
+            for input_file, item in inferred:
+                try:
+                    encode(input_file, item)
+                except Exception as e:
+                    on_error(input_file, e)
+        
+        def on_group_error(group, error):
+            for input_file in group:
+                if input_file not in results:
+                    on_error(input_file, error)
+        
+        groups = [input_files[i:i + clip_batch] for i in range(0, len(input_files), clip_batch)]
+        run_pipeline(groups, decode_group, infer_group, encode_group,
+                     max_pending=max_pending, on_error=on_group_error)
+    else:
+        run_pipeline(input_files, decode, infer, encode, max_pending=max_pending, on_error=on_error)
+    done = sum(1 for ok, _ in results.values() if ok)
+    print(f"{'='*50}")
+    print(f"✅ Pipelined separation finished: {done}/{len(input_files)} files in {time.time() - start_total:.1f}s")
+    
+    return [(input_file,) + results.get(input_file, (False, None)) for input_file in input_files]
+
+def process_batch(input_files, stem_count, quality, audio_format, bitrate, requested_device, output_dir, use_cache=True, clip_batch=0):
+    """Separate several files through the pipeline, one at a time as fallback"""
+    print(f"\n{'='*50}")
+    print(f"STEM SPLITTER - Processing {len(input_files)} files")
+    print(f"{'='*50}")
+    
+    results = {}
+    try:
+        return separate_batch(
+            input_files, stem_count, quality, audio_format,
+            bitrate, requested_device, output_dir, use_cache=use_cache, results=results,
+            clip_batch=clip_batch
+        )
+    except Exception as api_error:
+        import traceback
+        traceback.print_exc()
+        print(f"\n⚠️  Pipelined separation failed: {api_error}")
+        print("Falling back to one file at a time...")
+    
+    for input_file in input_files:
+        if input_file in results:
+            continue
+        success, output_path = process_file(
+            input_file, stem_count, quality, audio_format,
+            bitrate, requested_device, output_dir, use_cache=use_cache
+        )
+        results[input_file] = (success, output_path)
+        events.emit("file_done", file=input_file, ok=success, output_path=output_path)
+    return [(input_file,) + results[input_file] for input_file in input_files]
+
+def serve():
+    """Run as a long-lived host: read one JSON job per line from stdin.
+
+    The loaded model stays in memory between jobs and is only reloaded
+    when the model, device or shifts setting changes. Every job ends with
+    a "done" event.
+    """
+    import json
+
+    print("[HOST] Separation host ready")
+    startup_profile.mark("host ready")
+    events.emit("ready")
+    for raw in sys.stdin:
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            job = json.loads(raw)
+            if job.get("inputs"):
+                # Several files with the same settings: one pipelined run
+                if "on" in (job.get("stream"), job.get("parallel_shifts")):
+                    print("[WARNING] Batched inputs are decoded whole and their shifts run in "
+                          "sequence; stream and parallel_shifts are ignored")
+                results = process_batch(
+                    job["inputs"],
+                    int(job["stem_count"]),
+                    job["quality"],
+                    job["audio_format"],
+                    job.get("bitrate", ""),
+                    job["device"],
+                    job.get("output_dir", ""),
+                    use_cache=job.get("cache", True),
+                    clip_batch=int(job.get("clip_batch", 0) or 0),
+                )
+                events.emit("done", ok=all(ok for _, ok, _ in results),
+                            output_path=results[-1][2] if results else None)
+                continue
+            success, output_path = process_file(
+                job["input_file"],
+                int(job["stem_count"]),
+                job["quality"],
+                job["audio_format"],
+                job.get("bitrate", ""),
+                job["device"],
+                job.get("output_dir", ""),
+                stream=job.get("stream", "auto"),
+                use_cache=job.get("cache", True),
+                parallel_shifts=job.get("parallel_shifts", "auto"),
+                profile=job.get("profile"),
+            )
+            events.emit("done", ok=success, output_path=output_path)
+        except Exception as e:
+            print(f"[HOST ERROR] {e}")
+            events.emit("error", message=str(e))
+            events.emit("done", ok=False, output_path=None)
+        finally:
+            # Hosts are usually terminated, so atexit would never run
+            startup_profile.write_report()
+            metrics.write_textfile()
+
+def configure_threads(threads, interop_threads):
+    """Limit torch's intra-op and inter-op thread pools for this process"""
+    if threads and threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads and interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Can only be set once, before any inter-op work has started
+            print(f"[WARNING] Could not set inter-op threads: {e}")
+    if (threads and threads > 0) or (interop_threads and interop_threads > 0):
+        print(f"[INFO] Torch threads: {torch.get_num_threads()} intra-op, "
+              f"{torch.get_num_interop_threads()} inter-op")
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Separate an audio file into stems with Demucs")
+    parser.add_argument("input_file", nargs="?")
+    parser.add_argument("stem_count", nargs="?", type=int)
+    parser.add_argument("quality", nargs="?", choices=QUALITIES,
+                        help="fast, balanced or best; turbo is fast with an int8 model on CPU")
+    parser.add_argument("audio_format", nargs="?")
+    parser.add_argument("bitrate", nargs="?")
+    parser.add_argument("device", nargs="?")
+    parser.add_argument("output_dir", nargs="?")
+    parser.add_argument("--stream", choices=["auto", "on", "off"], default="auto",
+                        help="separate in overlapping windows with bounded memory "
+                             "(auto: only for very long inputs)")
+    parser.add_argument("--parallel-shifts", choices=["auto", "on", "off"], default="auto",
+                        help="run the shift passes of multi-shift qualities in parallel "
+                             "worker processes on CPU (auto: when there are spare cores)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="skip the local result cache for this file")
+    parser.add_argument("--inputs-from", metavar="PATH",
+                        help="file listing more inputs, one per line; all inputs are "
+                             "separated together through the decode/infer/encode pipeline")
+    parser.add_argument("--clip-batch", type=int, default=0, metavar="N",
+                        help="with --inputs-from: separate up to N short clips "
+                             "(one model segment or less) in a single forward pass")
+    parser.add_argument("--fake-model", action="store_true",
+                        help="use the deterministic test model instead of Demucs (no weights needed)")
+    parser.add_argument("--backend", choices=onnx_backend.BACKENDS, default=None,
+                        help="run the model in torch or ONNX Runtime (CPU only; the model is "
+                             "exported to ONNX once and cached)")
+    parser.add_argument("--compile", action="store_true",
+                        help="run the model through torch.compile on CPU; compiled kernels "
+                             "are cached on disk and reused by later runs")
+    parser.add_argument("--profile", choices=job_profile.MODES, default=None,
+                        help="profile the separation with torch.profiler or cProfile and "
+                             "save the trace next to the stems")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="write Prometheus metrics (stage times, audio seconds, "
+                             "real-time factor) of this process to PATH")
+    parser.add_argument("--serve", action="store_true",
+                        help="run as a long-lived host reading JSON jobs from stdin")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--cpus", metavar="LIST", default=None,
+                        help="pin this process to these CPU ids, e.g. 0-3,8-11 (Linux); "
+                             "--threads defaults to their count")
+    parser.add_argument("--interop-threads", type=int, default=0,
+                        help="torch inter-op threads (0 = torch default)")
+    args = parser.parse_args(argv)
+    if args.inputs_from and "on" in (args.stream, args.parallel_shifts):
+        parser.error("--inputs-from cannot be combined with --stream on or --parallel-shifts on")
+
+    if args.cpus:
+        from core.threads import parse_cpulist
+        try:
+            if not parse_cpulist(args.cpus):
+                raise ValueError
+        except ValueError:
+            parser.error(f"invalid --cpus list: {args.cpus}")
+    if not args.serve and args.output_dir is None:
+        parser.error("input_file, stem_count, quality, audio_format, bitrate, "
+                     "device and output_dir are required")
+    return args
+
+def main():
+    args = parse_args()
+    if args.cpus:
+        from core.threads import parse_cpulist, pin_to_cpus, interop_threads_for
+
+        cpus = parse_cpulist(args.cpus)
+        # Before the thread pools grow, so every torch thread inherits the set
+        if pin_to_cpus(cpus):
+            print(f"[INFO] Pinned to CPUs {args.cpus}")
+            if not args.threads:
+                args.threads = len(cpus)
+                args.interop_threads = args.interop_threads or interop_threads_for(len(cpus))
+    configure_threads(args.threads, args.interop_threads)
+    if args.fake_model:
+        from core.fake_model import ENV_FAKE
+        os.environ[ENV_FAKE] = "1"
+    if args.compile:
+        os.environ[compiled.ENV_VAR] = "1"
+    if args.backend:
+        os.environ[onnx_backend.ENV_VAR] = args.backend
+    if args.metrics_file:
+        events.set_tap(metrics.record_event)
+        metrics.start_exporter(path=args.metrics_file, port=0)
+
+    if args.serve:
+        serve()
+        return
+
+    if args.inputs_from:
+        with open(args.inputs_from, "r", encoding="utf-8") as f:
+            extra = [line.strip() for line in f if line.strip()]
+        results = process_batch(
+            [args.input_file] + extra, args.stem_count, args.quality, args.audio_format,
+            args.bitrate, args.device, args.output_dir, use_cache=not args.no_cache,
+            clip_batch=args.clip_batch
+        )
+        success = all(ok for _, ok, _ in results)
+        events.emit("done", ok=success, output_path=results[-1][2])
+        if not success:
             sys.exit(1)
+        return
+
+    success, output_path = process_file(
+        args.input_file, args.stem_count, args.quality, args.audio_format,
+        args.bitrate, args.device, args.output_dir, stream=args.stream,
+        use_cache=not args.no_cache, parallel_shifts=args.parallel_shifts,
+        profile=args.profile
+    )
+    events.emit("done", ok=success, output_path=output_path)
+    if not success:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Running as a subprocess: stdout carries JSON events, logs go to stderr
+    events.open_channel()
+    main()
@@ -0,0 +1,61 @@
+"""Entry point of the parallel shift worker processes (see core.parallel_shifts).
+
+Kept small on purpose: spawned workers import this module, and, while the
+pool starts, run it as their __main__ instead of separator.py, so they load
+torch and the model but none of the separator's imports or patches.
+"""
+import os
+import sys
+import time
+import threading
+
+import torch
+
+# Model loaded once per worker process
+_worker_model = None
+
+
+def _watch_parent(parent_pid):
+    """Exit if the process that started us goes away (e.g. a terminated host)"""
+    while True:
+        time.sleep(2)
+        if os.getppid() != parent_pid:
+            os._exit(0)
+
+
+def init_worker(model_name, threads, parent_pid, options):
+    """Pool initializer: load model_name with the parent's (quantize, backend, compile)"""
+    global _worker_model
+    # stdout of the parent process is the event channel; keep it clean
+    sys.stdout = sys.stderr
+    torch.set_num_threads(threads)
+    threading.Thread(target=_watch_parent, args=(parent_pid,), daemon=True).start()
+
+    from core.model_setup import load_model, prepare_model
+
+    quantize, backend, compile = options
+    _worker_model = prepare_model(model_name, load_model(model_name, quantize), "cpu",
+                                  quantize=quantize, backend=backend, compile=compile)
+
+
+def ready():
+    """No-op task; returns once the worker has loaded its model"""
+    return os.getpid()
+
+
+def run_pass(padded, offset, max_shift, split, overlap, segment):
+    """One shift pass of demucs' apply_model, on a worker process"""
+    from core.fake_model import FakeModel, apply_fake_model
+
+    if isinstance(_worker_model, FakeModel):
+        apply_model = apply_fake_model
+    else:
+        from demucs.apply import apply_model
+
+    padded = torch.from_numpy(padded)
+    length = padded.shape[-1] - 2 * max_shift
+    shifted = padded[..., offset:length + max_shift]
+    with torch.no_grad():
+        out = apply_model(_worker_model, shifted[None], shifts=0, split=split,
+                          overlap=overlap, device="cpu", segment=segment)
+    return out[0, ..., max_shift - offset:].numpy()
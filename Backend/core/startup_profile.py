@@ -0,0 +1,151 @@
+"""Opt-in startup profiler for app.py and separator.py.
+
+Set STEM_SPLITTER_PROFILE_STARTUP to a folder (or to 1 for the current
+folder) and every process writes startup_<process>_<pid>.json there. The
+report lists wall times of the big imports (torch, torchaudio, demucs.api,
+PyQt6), window construction, model load, first segment latency and so on.
+
+    python -m core.startup_profile compare old.json new.json
+
+prints the per-step difference between two reports, for tracking startup
+regressions between releases. When the variable is not set, every function
+here is a cheap no-op.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+from contextlib import contextmanager
+
+ENV_VAR = "STEM_SPLITTER_PROFILE_STARTUP"
+
+_t0 = time.perf_counter()
+_state = {"process": None, "events": [], "seen": set(), "registered": False}
+
+
+def enabled():
+    return bool(os.environ.get(ENV_VAR))
+
+
+def set_process(name):
+    """Name used in the report file; the first caller wins"""
+    if _state["process"] is None:
+        _state["process"] = name
+
+
+def record(name, seconds=None, **extra):
+    """Add one step; seconds is its duration, None for a point in time"""
+    if not enabled():
+        return
+    event = {"name": name, "at": round(time.perf_counter() - _t0, 4)}
+    if seconds is not None:
+        event["seconds"] = round(seconds, 4)
+    event.update(extra)
+    _state["events"].append(event)
+    if not _state["registered"]:
+        _state["registered"] = True
+        atexit.register(write_report)
+
+
+def record_once(name, seconds=None, **extra):
+    """Like record(), but only the first occurrence of name counts"""
+    if not enabled() or name in _state["seen"]:
+        return
+    _state["seen"].add(name)
+    record(name, seconds, **extra)
+
+
+def mark(name):
+    """Record the time since the profiler was imported"""
+    record(name)
+
+
+@contextmanager
+def timed(name):
+    """Record the wall time of a with-block, e.g. an import"""
+    if not enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def report():
+    return {
+        "process": _state["process"] or "python",
+        "pid": os.getpid(),
+        "python": sys.version.split()[0],
+        "frozen": bool(getattr(sys, "frozen", False)),
+        "created": time.time(),
+        "elapsed": round(time.perf_counter() - _t0, 4),
+        "events": list(_state["events"]),
+    }
+
+
+def report_path():
+    target = os.environ.get(ENV_VAR, "")
+    folder = os.getcwd() if target in ("1", "true", "yes") else target
+    return os.path.join(folder, f"startup_{_state['process'] or 'python'}_{os.getpid()}.json")
+
+
+def write_report(path=None):
+    """Write the report so far; safe to call repeatedly (e.g. after every job)"""
+    if not enabled() or not _state["events"]:
+        return None
+    path = path or report_path()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report(), f, indent=2)
+    except OSError as e:
+        print(f"[WARNING] Could not write startup profile: {e}")
+        return None
+    return path
+
+
+def _durations(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    result = {}
+    for event in data.get("events", []):
+        value = event.get("seconds", event.get("at"))
+        result.setdefault(event["name"], value)
+    return result
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare startup profile reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compare = sub.add_parser("compare", help="per-step difference between two reports")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    show = sub.add_parser("show", help="print the steps of one report")
+    show.add_argument("report")
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        for name, value in _durations(args.report).items():
+            print(f"{name:32} {value:9.3f}s")
+        return
+
+    old = _durations(args.old)
+    new = _durations(args.new)
+    print(f"{'step':32} {'old':>9} {'new':>9} {'delta':>9}")
+    for name in list(old) + [n for n in new if n not in old]:
+        before = old.get(name)
+        after = new.get(name)
+        if before is None or after is None:
+            print(f"{name:32} {before if before is not None else '-':>9} "
+                  f"{after if after is not None else '-':>9}")
+            continue
+        print(f"{name:32} {before:9.3f} {after:9.3f} {after - before:+9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import time
+
+import soundfile as sf
+
+from core.writer import StemWriter, rescale_file, scale_for_peak
+
+# Inputs longer than this are streamed when stream mode is "auto"
+STREAM_THRESHOLD_SECONDS = 20 * 60
+
+DEFAULT_WINDOW_SECONDS = 30.0
+DEFAULT_OVERLAP_SECONDS = 2.0
+
+
+def can_stream(input_file):
+    """Return the input duration in seconds if soundfile can decode it, else None"""
+    try:
+        info = sf.info(input_file)
+    except Exception:
+        return None
+    if not info.samplerate:
+        return None
+    return info.frames / info.samplerate
+
+
+def should_stream(input_file, stream):
+    """Decide whether to stream, for a stream setting of on, off or auto"""
+    if stream == "off":
+        return False
+    duration = can_stream(input_file)
+    if duration is None:
+        if stream == "on":
+            print("[WARNING] Streaming needs a format soundfile can decode; using full-file mode")
+        return False
+    return stream == "on" or duration >= STREAM_THRESHOLD_SECONDS
+
+
+def separate_streaming(separator, input_file, output_files, bitrate=None,
+                       window_seconds=DEFAULT_WINDOW_SECONDS,
+                       overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+                       on_progress=None):
+    """Separate input_file window by window with bounded memory.
+
+    The input is decoded in windows of window_seconds that overlap by
+    overlap_seconds. Each window goes through separator.separate_tensor,
+    overlaps are linearly cross-faded, and finished blocks are appended to
+    float32 temporary files next to the outputs straight away. Only one window
+    of audio and stems is held in memory, whatever the input length.
+
+    Stems are normalised like the full-file path: a stem whose peak exceeds
+    full scale is scaled down as a whole, never clipped. The peak is only
+    known at the end, so a second pass copies each temporary file to its
+    output, scaled and encoded block by block.
+
+    output_files maps source names (e.g. "vocals") to output paths; sources
+    not in the mapping are dropped. on_progress(percent) is called after
+    every window.
+    """
+    # Imported here so the job manager can call should_stream without torch
+    import torch
+
+    samplerate = separator.samplerate
+    channels = separator.audio_channels
+
+    # Per-window tqdm bars would restart at 0% every window
+    separator.update_parameter(progress=False)
+
+    writer = None
+    temp_files = {name: f"{path}.{os.getpid()}.stream.tmp" for name, path in output_files.items()}
+    try:
+        with sf.SoundFile(input_file) as source:
+            in_rate = source.samplerate
+            total_frames = source.frames
+            window = int(window_seconds * in_rate)
+            overlap = min(int(overlap_seconds * in_rate), window // 2)
+            hop = window - overlap
+            out_overlap = int(round(overlap * samplerate / in_rate))
+            fade_in = torch.linspace(0, 1, out_overlap + 2)[1:-1] if out_overlap else None
+
+            # Encoding and disk writes run on the writer thread while the
+            # next window is being separated
+            writer = StemWriter(temp_files, samplerate, channels, background=True, raw=True)
+
+            tails = {}
+            start = 0
+            window_index = 0
+            start_time = time.time()
+            while start < total_frames:
+                source.seek(start)
+                block = source.read(window, dtype="float32", always_2d=True)
+                if len(block) == 0:
+                    break
+                is_last = start + len(block) >= total_frames
+
+                wav = torch.from_numpy(block.T.copy())
+                _, separated = separator.separate_tensor(wav, in_rate)
+
+                finished = {}
+                for name in output_files:
+                    out = separated[name].cpu()
+                    if name in tails and out_overlap:
+                        tail = tails.pop(name)
+                        head_len = min(out_overlap, out.shape[-1], tail.shape[-1])
+                        ramp = fade_in[:head_len]
+                        out = out.clone()
+                        out[..., :head_len] = tail[..., :head_len] * (1 - ramp) + out[..., :head_len] * ramp
+                    if not is_last and out_overlap:
+                        # Hold back the overlap; the next window fades into it
+                        tails[name] = out[..., -out_overlap:]
+                        out = out[..., :-out_overlap]
+                    finished[name] = out
+                writer.write(finished)
+
+                window_index += 1
+                start += hop
+                done = min(total_frames, start + overlap) if not is_last else total_frames
+                percent = int(100 * done / total_frames) if total_frames else 100
+                print(f"Streaming: {percent}% (window {window_index}, "
+                      f"{done / in_rate:.0f}/{total_frames / in_rate:.0f}s, "
+                      f"{time.time() - start_time:.1f}s elapsed)")
+                if on_progress is not None:
+                    on_progress(percent)
+                if is_last:
+                    break
+
+        writer.close()
+        peaks, writer = writer.peaks, None
+        for name, path in output_files.items():
+            rescale_file(temp_files[name], path, scale_for_peak(peaks[name]), bitrate)
+    finally:
+        if writer is not None:
+            writer.close()
+        for path in temp_files.values():
+            if os.path.exists(path):
+                os.remove(path)
+        separator.update_parameter(progress=True)
@@ -0,0 +1,146 @@
+import os
+
+# Environment variables read by the OpenMP/MKL runtimes when torch is imported
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# NUMA topology as exposed by Linux
+NODE_ROOT = "/sys/devices/system/node"
+
+# Set to 0 to keep partitioned workers unpinned
+ENV_PIN = "STEM_SPLITTER_PIN_CPUS"
+
+
+def available_cpus():
+    """CPU ids this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        try:
+            return sorted(os.sched_getaffinity(0))
+        except OSError:
+            pass
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpulist(text):
+    """CPU ids of a kernel cpulist such as "0-3,8,10-11" """
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpulist(cpus):
+    """Inverse of parse_cpulist, with runs collapsed to ranges"""
+    parts = []
+    for cpu in sorted(set(cpus)):
+        if parts and parts[-1][1] == cpu - 1:
+            parts[-1][1] = cpu
+        else:
+            parts.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in parts)
+
+
+def numa_nodes(cpus=None, root=NODE_ROOT):
+    """Available CPUs grouped by NUMA node; one group without NUMA information"""
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    allowed = set(cpus)
+    nodes = []
+    try:
+        names = sorted((n for n in os.listdir(root) if n.startswith("node") and n[4:].isdigit()),
+                       key=lambda n: int(n[4:]))
+        for name in names:
+            with open(os.path.join(root, name, "cpulist"), "r", encoding="ascii") as f:
+                node = [cpu for cpu in parse_cpulist(f.read()) if cpu in allowed]
+            if node:
+                nodes.append(node)
+    except (OSError, ValueError):
+        nodes = []
+    # CPUs the topology does not list (or no topology at all) form their own group
+    listed = {cpu for node in nodes for cpu in node}
+    rest = [cpu for cpu in cpus if cpu not in listed]
+    if rest:
+        nodes.append(rest)
+    return nodes
+
+
+def _split(items, n):
+    """n contiguous slices of items, leftovers to the first; repeats when n > len(items)"""
+    if n >= len(items):
+        return [[items[i % len(items)]] for i in range(n)]
+    base, extra = divmod(len(items), n)
+    slices = []
+    start = 0
+    for i in range(n):
+        size = base + (1 if i < extra else 0)
+        slices.append(items[start:start + size])
+        start += size
+    return slices
+
+
+def partition_cores(n_workers, cpus=None, nodes=None):
+    """Split the available CPUs into n_workers disjoint, contiguous slices.
+
+    Slices follow the NUMA topology: with at least as many workers as nodes,
+    workers are spread over the nodes in proportion to their size and no
+    slice spans two nodes; with fewer, each worker gets whole nodes. Leftover
+    cores go to the first slices. With more workers than cores every worker
+    still gets one core, handed out round-robin over the cores of every
+    node, so no core is shared by two workers more than any other.
+    """
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    n_workers = max(1, int(n_workers))
+    nodes = nodes if nodes is not None else numa_nodes(cpus)
+    if n_workers > len(cpus):
+        order = [cpu for node in nodes for cpu in node] or cpus
+        return [[order[i % len(order)]] for i in range(n_workers)]
+    if len(nodes) <= 1:
+        return _split(cpus, n_workers)
+    if n_workers < len(nodes):
+        return [[cpu for node in group for cpu in node] for group in _split(nodes, n_workers)]
+
+    # Every node gets a worker, the rest go where cores per worker are highest
+    counts = [1] * len(nodes)
+    for _ in range(n_workers - len(nodes)):
+        i = max(range(len(nodes)), key=lambda i: len(nodes[i]) / counts[i])
+        counts[i] += 1
+    return [part for node, count in zip(nodes, counts) for part in _split(node, count)]
+
+
+def pinning_enabled():
+    """True if partitioned workers should be pinned to their slice (Linux only)"""
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    return os.environ.get(ENV_PIN, "1").lower() not in ("0", "false", "no", "off")
+
+
+def pin_to_cpus(cpus, pid=0):
+    """Restrict pid (0 = this process) to cpus; returns True on success"""
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(pid, cpus)
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Could not pin to CPUs {format_cpulist(cpus)}: {e}")
+        return False
+    return True
+
+
+def interop_threads_for(threads):
+    """Inter-op pool size for a worker with the given intra-op thread count"""
+    return max(1, threads // 4)
+
+
+def thread_env(threads, base_env=None):
+    """Copy of the environment limiting native thread pools to threads"""
+    env = dict(base_env if base_env is not None else os.environ)
+    if threads and threads > 0:
+        for name in THREAD_ENV_VARS:
+            env[name] = str(threads)
+    return env
+
+
+def max_parallel_files():
+    """Largest useful number of concurrent CPU separations (>= 2 cores each)"""
+    return max(1, len(available_cpus()) // 2)
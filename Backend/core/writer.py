@@ -0,0 +1,208 @@
+import queue
+import threading
+
+import numpy as np
+import soundfile as sf
+
+# Frames converted and written per call; keeps the transposed copy small
+BLOCK_FRAMES = 65536
+
+
+def _to_numpy(block):
+    """Return a (channels, frames) float32 numpy view of a tensor or array"""
+    if hasattr(block, "detach"):
+        block = block.detach().cpu().numpy()
+    return np.asarray(block, dtype=np.float32)
+
+
+class _Mp3File:
+    """Incremental MP3 encoder with the same write()/close() shape as SoundFile"""
+
+    def __init__(self, path, samplerate, channels, bitrate):
+        import lameenc
+
+        self.file = open(path, "wb")
+        self.encoder = lameenc.Encoder()
+        self.encoder.set_bit_rate(int(bitrate))
+        self.encoder.set_in_sample_rate(samplerate)
+        self.encoder.set_channels(channels)
+        self.encoder.set_quality(2)
+        self.encoder.silence()
+
+    def write(self, frames):
+        pcm = (frames * (2 ** 15 - 1)).astype(np.int16)
+        self.file.write(self.encoder.encode(pcm.tobytes()))
+
+    def close(self):
+        self.file.write(self.encoder.flush())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def open_audio_file(path, samplerate, channels, bitrate=None):
+    """Open an output file for block-wise writing based on its extension"""
+    if path.lower().endswith(".mp3"):
+        return _Mp3File(path, samplerate, channels, bitrate or "320")
+    # Default subtype for .wav is PCM_16, same as a whole-file sf.write
+    return sf.SoundFile(path, mode="w", samplerate=samplerate, channels=channels)
+
+
+def open_float_file(path, samplerate, channels):
+    """Open an unclamped float32 file for stems that are rescaled later (see rescale_file)"""
+    # RF64 has no 4 GB limit; streamed stems of long inputs can exceed it
+    return sf.SoundFile(path, mode="w", samplerate=samplerate, channels=channels,
+                        format="RF64", subtype="FLOAT")
+
+
+def peak(data):
+    """Largest absolute sample of data"""
+    if data.size == 0:
+        return 0.0
+    # max/min instead of abs() avoids a full-size temporary
+    return max(float(data.max()), -float(data.min()))
+
+
+def scale_for_peak(value):
+    """Gain that keeps a signal with this peak below full scale (demucs' "rescale" clip mode)"""
+    return 1.0 / max(1.01 * value, 1.0)
+
+
+def rescale_factor(data):
+    """Gain that keeps a whole signal below full scale"""
+    return scale_for_peak(peak(data))
+
+
+def write_blocks(handle, src, block_frames=BLOCK_FRAMES, scale=1.0, clip=True):
+    """Write a (channels, frames) signal in blocks, transposing one block at a time.
+
+    Samples are clamped to [-1, 1] unless clip=False (float files only);
+    integer formats would wrap around otherwise.
+    """
+    data = _to_numpy(src)
+    if data.ndim == 1:
+        data = data[None]
+    for start in range(0, data.shape[-1], block_frames):
+        block = data[:, start:start + block_frames].T
+        if scale != 1.0:
+            block = block * scale
+        handle.write(np.clip(block, -1.0, 1.0) if clip else block)
+
+
+def rescale_file(src_path, dst_path, scale, bitrate=None, block_frames=BLOCK_FRAMES):
+    """Copy a float file written by open_float_file to dst_path, scaled and clamped, block by block"""
+    with sf.SoundFile(src_path) as src:
+        with open_audio_file(dst_path, src.samplerate, src.channels, bitrate) as dst:
+            for block in src.blocks(blocksize=block_frames, dtype="float32", always_2d=True):
+                if scale != 1.0:
+                    block = block * scale
+                dst.write(np.clip(block, -1.0, 1.0))
+
+
+class StemWriter:
+    """Writes several stems block by block as they become available.
+
+    One output file is opened per stem. write(blocks) appends a
+    {stem: (channels, frames)} dict of tensors/arrays. With background=True
+    the actual encoding and disk writes run on a writer thread fed through a
+    bounded queue, so they overlap with the next block's computation.
+    With raw=True the files are unclamped float32 (open_float_file) and
+    peaks holds each stem's peak, for a later rescale_file pass.
+    """
+
+    def __init__(self, output_files, samplerate, channels, bitrate=None,
+                 background=False, max_pending=4, raw=False):
+        self.output_files = dict(output_files)
+        self.handles = {}
+        self.raw = raw
+        self.peaks = {stem: 0.0 for stem in self.output_files}
+        self._error = None
+        self._queue = None
+        self._thread = None
+        try:
+            for stem, path in self.output_files.items():
+                if raw:
+                    self.handles[stem] = open_float_file(path, samplerate, channels)
+                else:
+                    self.handles[stem] = open_audio_file(path, samplerate, channels, bitrate)
+        except Exception:
+            self._close_handles()
+            raise
+
+        if background:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._drain, daemon=True)
+            self._thread.start()
+
+    def write(self, blocks, rescale=False):
+        """Append one block per stem; stems without an output file are ignored.
+
+        rescale=True scales each block down to full scale instead of clamping;
+        only meaningful when the block is the whole stem.
+        """
+        if self._error is not None:
+            raise self._error
+        # Move to host memory on the caller's thread so GPU buffers can be freed
+        blocks = {stem: _to_numpy(block) for stem, block in blocks.items()
+                  if stem in self.handles}
+        if self._queue is not None:
+            self._queue.put((blocks, rescale))
+        else:
+            self._write_now(blocks, rescale)
+
+    def _write_now(self, blocks, rescale):
+        for stem, block in blocks.items():
+            if self.raw:
+                self.peaks[stem] = max(self.peaks[stem], peak(block))
+                write_blocks(self.handles[stem], block, clip=False)
+                continue
+            scale = rescale_factor(block) if rescale else 1.0
+            write_blocks(self.handles[stem], block, scale=scale)
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is not None:
+                continue
+            try:
+                self._write_now(*item)
+            except Exception as e:
+                self._error = e
+
+    def _close_handles(self):
+        for handle in self.handles.values():
+            try:
+                handle.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """Flush pending blocks and close every file"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._close_handles()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return False
+        # Do not let a writer error replace the exception already propagating
+        try:
+            self.close()
+        except Exception as e:
+            print(f"[WARNING] Stem writer failed while handling another error: {e}")
+        return False
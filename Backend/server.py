@@ -0,0 +1,385 @@
+"""Local HTTP job service for separations.
+
+    python server.py --port 8765 --workers 2 --max-jobs 50 --keep-finished 200
+
+Endpoints (JSON unless noted):
+    GET    /health                  service status and queue counts
+    POST   /jobs                    {"file": path, "settings": {...}, "priority": 0}
+    GET    /jobs                    all jobs
+    GET    /jobs/<id>               one job
+    DELETE /jobs/<id>               cancel a job (also POST /jobs/<id>/cancel)
+    GET    /jobs/<id>/result        output folder and stem files of a finished job
+    GET    /jobs/<id>/events        server-sent events: state and progress until the job ends
+    GET    /metrics                 Prometheus text format (see core.metrics)
+
+Files are paths on this machine. Jobs run on warm separation hosts (one per
+worker, each keeping its model loaded), so the service itself never imports
+torch. Admission control rejects new jobs with 429 once --max-jobs jobs are
+pending or running, and only the --keep-finished most recently finished jobs
+are remembered. Only the standard library is used and the service binds
+to localhost by default, so it runs fully offline.
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+from core import metrics
+from core.job_manager import (JobManager, HostExecutorFactory, DEFAULT_SETTINGS, SETTING_CHOICES,
+                               PENDING, RUNNING, DONE, FINAL_STATES)
+
+STATUS_TEXT = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+    429: "Too Many Requests", 500: "Internal Server Error",
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+
+STEM_EXTENSIONS = (".wav", ".mp3", ".flac")
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def validate_settings(settings):
+    """Checked copy of a job's settings; raises HttpError(400) on bad values"""
+    unknown = sorted(set(settings) - set(DEFAULT_SETTINGS))
+    if unknown:
+        raise HttpError(400, f"Unknown settings: {', '.join(unknown)}")
+    checked = dict(settings)
+    if "stems" in checked:
+        try:
+            checked["stems"] = int(checked["stems"])
+        except (TypeError, ValueError):
+            raise HttpError(400, "\"stems\" must be an integer")
+    for name, choices in SETTING_CHOICES.items():
+        if name in checked and checked[name] not in choices:
+            allowed = ", ".join("null" if c is None else str(c) for c in choices)
+            raise HttpError(400, f"\"{name}\" must be one of {allowed}")
+    bitrate = checked.get("bitrate")
+    if bitrate not in (None, ""):
+        if isinstance(bitrate, bool) or not str(bitrate).isdigit() or int(bitrate) <= 0:
+            raise HttpError(400, "\"bitrate\" must be a number of kbps")
+        checked["bitrate"] = str(int(bitrate))
+    elif "bitrate" in checked:
+        checked["bitrate"] = ""
+    if "output_dir" in checked and not isinstance(checked["output_dir"], str):
+        raise HttpError(400, "\"output_dir\" must be a path")
+    if "cache" in checked and not isinstance(checked["cache"], bool):
+        raise HttpError(400, "\"cache\" must be true or false")
+    if "clip_batch" in checked:
+        clip_batch = checked["clip_batch"]
+        if isinstance(clip_batch, bool) or not isinstance(clip_batch, int) or clip_batch < 0:
+            raise HttpError(400, "\"clip_batch\" must be a non-negative integer")
+        # Clip batches go through the batch path, which neither streams nor runs shifts in parallel
+        if clip_batch > 1 and "on" in (checked.get("stream"), checked.get("parallel_shifts")):
+            raise HttpError(400, "\"clip_batch\" cannot be combined with stream or parallel_shifts \"on\"")
+    return checked
+
+
+class JobService:
+    """Bridges the thread-based JobManager to asyncio request handlers"""
+
+    def __init__(self, workers=1, max_jobs=100, echo=False, keep_finished=200):
+        self.max_jobs = max_jobs
+        self.keep_finished = keep_finished
+        self.factory = HostExecutorFactory(echo=echo, partition_threads=workers > 1)
+        self.manager = JobManager(self.factory, max_concurrent=workers)
+        self.loop = None
+        self.subscribers = {}  # job id -> set of asyncio.Queue
+        self.sampling = None  # Set to stop resource sampling
+        self.manager.add_listener(self._on_job_event)
+
+    def start(self, loop):
+        from core.resources import start_sampling
+
+        self.loop = loop
+        self.manager.start()
+        # Resource use of the separation hosts, for GET /metrics
+        self.sampling = start_sampling()
+
+    def stop(self):
+        if self.sampling is not None:
+            self.sampling.set()
+        self.manager.cancel_all()
+        self.factory.stop()
+
+    # ----- job events (called on executor threads) -----
+
+    def _on_job_event(self, event, job):
+        if event == "finished":
+            # Finished jobs stay queryable until newer ones push them out
+            self.manager.clear_finished(keep=self.keep_finished)
+        if job is None or self.loop is None:
+            return
+        message = {"event": event, "job": job.to_dict()}
+        self.loop.call_soon_threadsafe(self._publish, job.id, message)
+
+    def _publish(self, job_id, message):
+        for queue in list(self.subscribers.get(job_id, ())):
+            queue.put_nowait(message)
+
+    def subscribe(self, job_id):
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id, queue):
+        queues = self.subscribers.get(job_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[job_id]
+
+    # ----- operations -----
+
+    def active_count(self):
+        return sum(1 for j in self.manager.jobs() if j.state in (PENDING, RUNNING))
+
+    def enqueue(self, body):
+        file = body.get("file")
+        if not isinstance(file, str) or not file:
+            raise HttpError(400, "\"file\" must be a path")
+        file = os.path.abspath(file)
+        if not os.path.isfile(file):
+            raise HttpError(400, f"File not found: {file}")
+        settings = body.get("settings") or {}
+        if not isinstance(settings, dict):
+            raise HttpError(400, "\"settings\" must be an object")
+        settings = validate_settings(settings)
+        try:
+            priority = int(body.get("priority", 0))
+        except (TypeError, ValueError):
+            raise HttpError(400, "\"priority\" must be an integer")
+        if self.active_count() >= self.max_jobs:
+            raise HttpError(429, f"Queue is full ({self.max_jobs} jobs pending or running)")
+        return self.manager.submit(file, settings, priority)
+
+    def job(self, job_id):
+        job = self.manager.get(job_id)
+        if job is None:
+            raise HttpError(404, f"No job {job_id}")
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a job; blocks while a running host is stopped"""
+        job = self.job(job_id)
+        if not self.manager.cancel(job_id):
+            raise HttpError(409, f"Job {job_id} is already {job.state}")
+        return 200, job.to_dict()
+
+    def result(self, job_id):
+        job = self.job(job_id)
+        if job.state != DONE:
+            raise HttpError(409, f"Job {job_id} is {job.state}")
+        files = []
+        if job.output_path and os.path.isdir(job.output_path):
+            files = sorted(os.path.join(job.output_path, name) for name in os.listdir(job.output_path)
+                           if name.lower().endswith(STEM_EXTENSIONS))
+        return {"id": job.id, "output_path": job.output_path, "files": files}
+
+    def health(self):
+        jobs = self.manager.jobs()
+        return {
+            "ok": True,
+            "workers": self.manager.max_concurrent,
+            "max_jobs": self.max_jobs,
+            "pending": sum(1 for j in jobs if j.state == PENDING),
+            "running": sum(1 for j in jobs if j.state == RUNNING),
+            "finished": sum(1 for j in jobs if j.state in FINAL_STATES),
+        }
+
+
+async def read_request(reader):
+    """Parse one HTTP/1.1 request; returns (method, path, body or None)"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = None
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Malformed Content-Length")
+    if length < 0:
+        raise HttpError(400, "Malformed Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Request body too large")
+    if length:
+        raw = await reader.readexactly(length)
+        try:
+            body = json.loads(raw.decode("utf-8"))
+        except ValueError:
+            raise HttpError(400, "Body must be JSON")
+        if not isinstance(body, dict):
+            raise HttpError(400, "Body must be a JSON object")
+    return method.upper(), target.split("?", 1)[0], body
+
+
+async def send_json(writer, status, payload):
+    await send_text(writer, status, json.dumps(payload), "application/json")
+
+
+async def send_text(writer, status, text, content_type="text/plain; charset=utf-8"):
+    data = text.encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: close\r\n\r\n".encode("latin-1") + data
+    )
+    await writer.drain()
+
+
+async def stream_events(service, writer, job_id):
+    """Server-sent events for one job until it reaches a final state"""
+    job = service.job(job_id)
+    queue = service.subscribe(job_id)
+    try:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        # Current state first, so late subscribers are not left waiting
+        message = {"event": "state", "job": job.to_dict()}
+        while True:
+            writer.write(f"event: {message['event']}\ndata: {json.dumps(message['job'])}\n\n".encode("utf-8"))
+            await writer.drain()
+            if message["job"]["state"] in FINAL_STATES:
+                break
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=15)
+            except asyncio.TimeoutError:
+                # Keep-alive comment so proxies and clients do not time out
+                writer.write(b": keep-alive\n\n")
+                await writer.drain()
+                message = {"event": "state", "job": job.to_dict()}
+    finally:
+        service.unsubscribe(job_id, queue)
+
+
+def route(service, method, path):
+    """Return (handler, args) for a request; handlers return (status, payload)"""
+    parts = [p for p in path.split("/") if p]
+    if parts == ["health"] and method == "GET":
+        return lambda body: (200, service.health())
+    if parts == ["metrics"] and method == "GET":
+        return "metrics", None
+    if parts == ["jobs"]:
+        if method == "GET":
+            return lambda body: (200, [j.to_dict() for j in service.manager.jobs()])
+        if method == "POST":
+            return lambda body: (201, service.enqueue(body or {}).to_dict())
+        raise HttpError(405, "Use GET or POST")
+    if len(parts) >= 2 and parts[0] == "jobs":
+        try:
+            job_id = int(parts[1])
+        except ValueError:
+            raise HttpError(404, f"No job {parts[1]}")
+        rest = parts[2:]
+        if not rest and method == "GET":
+            return lambda body: (200, service.job(job_id).to_dict())
+        if (not rest and method == "DELETE") or (rest == ["cancel"] and method == "POST"):
+            return "cancel", job_id
+        if rest == ["result"] and method == "GET":
+            return lambda body: (200, service.result(job_id))
+        if rest == ["events"] and method == "GET":
+            return "events", job_id
+    raise HttpError(404, f"No route for {method} {path}")
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            method, path, body = request
+            handler = route(service, method, path)
+            if isinstance(handler, tuple):
+                if handler[0] == "metrics":
+                    await send_text(writer, 200, metrics.render(),
+                                    "text/plain; version=0.0.4; charset=utf-8")
+                    return
+                if handler[0] == "cancel":
+                    # Stopping a host waits for its process; keep that off the event loop
+                    loop = asyncio.get_running_loop()
+                    status, payload = await loop.run_in_executor(None, service.cancel, handler[1])
+                    await send_json(writer, status, payload)
+                    return
+                await stream_events(service, writer, handler[1])
+                return
+            status, payload = handler(body)
+            await send_json(writer, status, payload)
+        except HttpError as e:
+            await send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"[ERROR] Request failed: {e}")
+            await send_json(writer, 500, {"error": str(e)})
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, service):
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(service, r, w), host, port)
+    service.start(asyncio.get_running_loop())
+    bound = server.sockets[0].getsockname()
+    print(f"[INFO] Separation service listening on http://{bound[0]}:{bound[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP job service for stem separation")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765, help="port (0 picks a free one)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="separation hosts kept warm; jobs running at once")
+    parser.add_argument("--max-jobs", type=int, default=100,
+                        help="pending + running jobs accepted before answering 429")
+    parser.add_argument("--keep-finished", type=int, default=200,
+                        help="finished jobs remembered for GET /jobs; older ones are forgotten")
+    parser.add_argument("-v", "--verbose", action="store_true", help="echo separation logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = JobService(workers=max(1, args.workers), max_jobs=max(1, args.max_jobs), echo=args.verbose,
+                         keep_finished=max(0, args.keep_finished))
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        print("[INFO] Shutting down")
+    finally:
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
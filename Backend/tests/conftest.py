@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# Allow "from core import ..." when pytest is run from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(tmp_path, monkeypatch):
+    """Every test gets its own caches and the deterministic fake model"""
+    monkeypatch.setenv("STEM_SPLITTER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("STEM_SPLITTER_HARDWARE_CACHE", str(tmp_path / "hardware.json"))
+    monkeypatch.setenv("STEM_SPLITTER_MODEL_CACHE", str(tmp_path / "models"))
+    monkeypatch.setenv("STEM_SPLITTER_FAKE_MODEL", "1")
+    monkeypatch.setenv("STEM_SPLITTER_AUTOTUNE", "0")
+    for name in ("STEM_SPLITTER_METRICS_FILE", "STEM_SPLITTER_METRICS_PORT", "STEM_SPLITTER_COMPILE",
+                 "STEM_SPLITTER_BACKEND", "STEM_SPLITTER_PROFILE_JOBS"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def write_wav(tmp_path):
+    """write_wav(name, seconds) -> path of a deterministic stereo test signal"""
+    import numpy as np
+    import soundfile as sf
+
+    def write(name, seconds=1.0, samplerate=44100, seed=0):
+        rng = np.random.default_rng(seed)
+        path = str(tmp_path / name)
+        data = (0.1 * rng.standard_normal((int(seconds * samplerate), 2))).astype(np.float32)
+        sf.write(path, data, samplerate)
+        return path
+
+    return write
@@ -0,0 +1,59 @@
+from core import autotune
+
+MEMINFO = """MemTotal:       16318540 kB
+MemFree:         1048576 kB
+MemAvailable:    {available} kB
+Buffers:          262144 kB
+Cached:          2097152 kB
+HugePages_Total:       0
+"""
+
+read_meminfo = autotune.read_meminfo
+
+
+def use_meminfo(tmp_path, monkeypatch, text):
+    path = tmp_path / "meminfo"
+    path.write_text(text, encoding="ascii")
+    monkeypatch.setattr(autotune, "read_meminfo", lambda: read_meminfo(str(path)))
+
+
+def test_read_meminfo_converts_kb(tmp_path):
+    path = tmp_path / "meminfo"
+    path.write_text(MEMINFO.format(available=4096), encoding="ascii")
+    info = read_meminfo(str(path))
+    assert info["MemAvailable"] == 4096 * 1024
+    # Counts without a unit stay as they are
+    assert info["HugePages_Total"] == 0
+
+
+def test_available_memory_falls_back_for_old_kernels(tmp_path, monkeypatch):
+    old = "\n".join(line for line in MEMINFO.splitlines() if not line.startswith("MemAvailable"))
+    use_meminfo(tmp_path, monkeypatch, old)
+    assert autotune.available_memory() == (1048576 + 2097152 + 262144) * 1024
+
+
+def test_short_clip_with_plenty_of_memory_is_one_segment(tmp_path, monkeypatch):
+    use_meminfo(tmp_path, monkeypatch, MEMINFO.format(available=8 * 1024 ** 2))
+    tuning = autotune.tune(5.0, shifts=1)
+    assert not tuning["stream"] and not tuning["split"]
+    assert tuning["overlap"] == autotune.DEFAULT_OVERLAP
+    assert tuning["budget_bytes"] == int(8 * autotune.GB * autotune.MEMORY_BUDGET)
+
+
+def test_long_input_on_a_small_machine_is_streamed(tmp_path, monkeypatch):
+    use_meminfo(tmp_path, monkeypatch, MEMINFO.format(available=4 * 1024 ** 2))
+    tuning = autotune.tune(3600.0, sources=6)
+    assert tuning["stream"] and tuning["split"]
+    assert tuning["overlap"] == autotune.LOW_MEMORY_OVERLAP
+    assert tuning["peak_bytes"] <= tuning["budget_bytes"]
+
+
+def test_concurrency_follows_free_memory(tmp_path, monkeypatch):
+    use_meminfo(tmp_path, monkeypatch, MEMINFO.format(available=64 * 1024 ** 2))
+    assert autotune.max_concurrent_jobs([180.0], cpu_limit=4) == 4
+
+    # Sized for the longest input
+    use_meminfo(tmp_path, monkeypatch, MEMINFO.format(available=8 * 1024 ** 2))
+    peak = autotune.estimate_bytes(180.0)
+    assert int(8 * autotune.GB * autotune.MEMORY_BUDGET // peak) == 2
+    assert autotune.max_concurrent_jobs([180.0, 30.0], cpu_limit=4) == 2
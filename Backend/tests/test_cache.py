@@ -0,0 +1,85 @@
+import os
+import time
+
+import numpy as np
+import soundfile as sf
+
+from core.cache import ResultCache, cache_key
+
+
+def test_output_rewrite_does_not_change_cached_entry(tmp_path, write_wav):
+    cache = ResultCache(root=str(tmp_path / "cache"))
+    stem = write_wav("vocals.wav", seconds=0.5)
+    cache.store("a" * 64, [stem])
+    cached = os.path.join(cache._entry_dir("a" * 64), "vocals.wav")
+    before = sf.read(cached)[0]
+
+    output = tmp_path / "out"
+    placed = cache.materialize("a" * 64, str(output))
+    # A second run with other settings writes the same output path in place
+    with sf.SoundFile(placed[0], mode="w", samplerate=44100, channels=2) as f:
+        f.write(np.zeros((10, 2), dtype=np.float32))
+
+    after = sf.read(cached)[0]
+    assert after.shape == before.shape
+    assert np.array_equal(after, before)
+
+
+def test_cache_key_follows_audio_and_settings(write_wav):
+    a = write_wav("a.wav", seconds=0.2, seed=1)
+    b = write_wav("b.wav", seconds=0.2, seed=2)
+    settings = {"model": "fake", "shifts": 1}
+    assert cache_key(a, settings) == cache_key(a, dict(settings))
+    assert cache_key(a, settings) != cache_key(b, settings)
+    assert cache_key(a, settings) != cache_key(a, {"model": "fake", "shifts": 2})
+
+
+def test_evict_removes_least_recently_used(tmp_path, write_wav):
+    stem = write_wav("stem.wav", seconds=0.2)
+    cache = ResultCache(root=str(tmp_path / "cache"))
+    for key in ("a" * 64, "b" * 64, "c" * 64):
+        cache.store(key, [stem])
+        time.sleep(0.01)
+    assert cache.lookup("a" * 64) is not None
+    size = cache.entries()[0]["size"]
+
+    assert cache.evict(max_bytes=2 * size) == 1
+    assert cache.lookup("b" * 64) is None
+    assert cache.lookup("a" * 64) is not None
+    assert cache.lookup("c" * 64) is not None
+
+
+def test_materialize_does_not_alias_cached_files(tmp_path, write_wav):
+    cache = ResultCache(root=str(tmp_path / "cache"))
+    cache.store("a" * 64, [write_wav("vocals.wav", seconds=0.2)])
+    cached = os.path.join(cache._entry_dir("a" * 64), "vocals.wav")
+
+    placed = cache.materialize("a" * 64, str(tmp_path / "out"))
+    assert placed == [str(tmp_path / "out" / "vocals.wav")]
+    assert not os.path.samefile(placed[0], cached)
+    assert os.stat(cached).st_nlink == 1
+    with open(placed[0], "rb") as out, open(cached, "rb") as entry:
+        assert out.read() == entry.read()
+
+
+def test_cache_settings_follow_the_execution_backend(monkeypatch):
+    from core import onnx_backend
+    from core.separator import cache_settings_for
+
+    settings = {"model_name": "htdemucs", "shifts": 1, "bitrate": "320", "device": "cpu", "quantize": False}
+    plain = cache_settings_for(4, "wav", settings)
+    assert plain["backend"] == "torch" and not plain["compile"] and not plain["int8"]
+
+    assert cache_settings_for(4, "wav", dict(settings, quantize=True))["int8"]
+
+    monkeypatch.setenv("STEM_SPLITTER_COMPILE", "1")
+    assert cache_settings_for(4, "wav", settings)["compile"]
+    # Only CPU runs are compiled
+    assert not cache_settings_for(4, "wav", dict(settings, device="cuda"))["compile"]
+
+    monkeypatch.setenv("STEM_SPLITTER_BACKEND", "onnx")
+    monkeypatch.setattr(onnx_backend, "available", lambda: True)
+    on_onnx = cache_settings_for(4, "wav", settings)
+    assert on_onnx["backend"] == "onnx" and not on_onnx["compile"]
+    monkeypatch.setattr(onnx_backend, "available", lambda: False)
+    assert cache_settings_for(4, "wav", settings)["backend"] == "torch"
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+
+import pytest
+
+import cli
+
+
+def run(capsys, *argv):
+    # main() sends logs to stderr by replacing sys.stdout
+    stdout = sys.stdout
+    try:
+        code = cli.main(list(argv) + ["--fake-model", "--json", "-q"])
+    finally:
+        sys.stdout = stdout
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_manifest_resume_skips_finished_files(tmp_path, write_wav, capsys):
+    first = write_wav("a.wav", seconds=0.5, seed=1)
+    second = write_wav("b.wav", seconds=0.5, seed=2)
+    out = str(tmp_path / "out")
+    manifest = str(tmp_path / "manifest.json")
+
+    code, summary = run(capsys, first, "-o", out, "--manifest", manifest)
+    assert code == 0 and summary["counts"]["done"] == 1
+    with open(manifest, "r", encoding="utf-8") as f:
+        entry = json.load(f)["files"][first]
+    assert entry["state"] == "done"
+    assert sorted(os.listdir(entry["output_path"])) == ["bass.wav", "drums.wav", "other.wav", "vocals.wav"]
+
+    code, summary = run(capsys, first, second, "-o", out, "--manifest", manifest, "--resume")
+    assert code == 0
+    assert summary["counts"]["done"] == 1 and summary["counts"]["skipped"] == 1
+    states = {item["file"]: item["state"] for item in summary["files"]}
+    assert states == {first: "skipped", second: "done"}
+
+    # Other settings do not count as done
+    code, summary = run(capsys, first, "-o", out, "--manifest", manifest, "--resume", "--stems", "6")
+    assert code == 0 and summary["counts"] == {"done": 1, "failed": 0, "cancelled": 0, "skipped": 0}
+
+
+
+@pytest.mark.parametrize("content", ["[]", '"done"', '{"version": 1, "files": []}'])
+def test_resume_ignores_a_manifest_that_is_not_one(tmp_path, write_wav, capsys, content):
+    path = write_wav("a.wav", seconds=0.2)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(content, encoding="utf-8")
+
+    code, summary = run(capsys, path, "-o", str(tmp_path / "out"), "--manifest", str(manifest), "--resume")
+    assert code == 0 and summary["counts"]["done"] == 1
+    with open(manifest, "r", encoding="utf-8") as f:
+        assert json.load(f)["files"][path]["state"] == "done"
+
+
+@pytest.mark.parametrize("option", [["--stream", "on"], ["--parallel-shifts", "on"]])
+def test_clip_batch_rejects_settings_the_batch_path_ignores(option):
+    with pytest.raises(SystemExit) as error:
+        cli.parse_args(["song.wav", "--clip-batch", "4"] + option)
+    assert error.value.code == 2
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+import torch
+
+from core import compiled
+from core.fake_model import FakeModel
+from core.model_setup import prepare_model
+
+
+def test_cache_dir_is_keyed_by_model_segment_and_torch(tmp_path):
+    path = compiled.cache_dir("htdemucs", 7.8)
+    assert path.startswith(str(tmp_path))
+    assert os.path.basename(path) == (f"htdemucs-seg7.8-torch{torch.__version__.replace('+', '_')}"
+                                      f"-v{compiled.COMPILE_VERSION}")
+
+
+def test_failed_compile_leaves_the_model_eager(monkeypatch):
+    monkeypatch.setenv("TORCHINDUCTOR_CACHE_DIR", "")
+
+    def broken(fn, **kwargs):
+        raise RuntimeError("no C++ compiler")
+    monkeypatch.setattr(torch, "compile", broken)
+
+    model = FakeModel(segment=0.1)
+    forward = model.forward
+    assert not compiled.compile_model("fake", model)
+    assert model.forward == forward
+
+
+@pytest.mark.skipif(not (shutil.which("g++") or shutil.which("cl")), reason="needs a C++ compiler")
+def test_compiled_model_matches_eager(monkeypatch):
+    monkeypatch.setenv("TORCHINDUCTOR_CACHE_DIR", "")
+    mix = torch.randn(1, 2, 4410, generator=torch.Generator().manual_seed(0))
+    model = FakeModel(segment=0.1).eval()
+    with torch.no_grad():
+        expected = model(mix)
+
+    assert compiled.compile_model("fake", model)
+    assert os.environ["TORCHINDUCTOR_CACHE_DIR"] == compiled.cache_dir("fake", 0.1)
+    with torch.no_grad():
+        assert torch.allclose(model(mix), expected, atol=1e-5)
+
+
+def test_prepare_model_compiles_only_on_cpu(monkeypatch):
+    calls = []
+    monkeypatch.setattr(compiled, "compile_model", lambda name, model: calls.append(name))
+    model = FakeModel()
+    assert prepare_model("fake", model, "cuda", compile=True) is model
+    assert calls == []
+    prepare_model("fake", model, "cpu", compile=True)
+    assert calls == ["fake"]
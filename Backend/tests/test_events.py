@@ -0,0 +1,63 @@
+import io
+
+from core import events
+from core.host import SeparationHost
+
+
+def test_parse_ignores_non_event_lines():
+    assert events.parse('{"event": "progress", "percent": 5}\n') == {"event": "progress", "percent": 5}
+    assert events.parse("[INFO] Loading model") is None
+    assert events.parse("{not json") is None
+    assert events.parse('{"percent": 5}') is None
+    assert events.parse("[1, 2]") is None
+
+
+def test_emit_writes_lines_to_the_channel_and_tap(monkeypatch):
+    channel = io.StringIO()
+    tapped = []
+    monkeypatch.setattr(events, "_channel", channel)
+    monkeypatch.setattr(events, "_sink", None)
+    monkeypatch.setattr(events, "_tap", tapped.append)
+
+    events.emit("stage", stage="load")
+    events.emit("done", ok=True, output_path=None)
+
+    lines = channel.getvalue().splitlines()
+    assert [events.parse(line) for line in lines] == tapped == [
+        {"event": "stage", "stage": "load"},
+        {"event": "done", "ok": True, "output_path": None},
+    ]
+
+
+def test_sink_replaces_the_channel(monkeypatch):
+    channel = io.StringIO()
+    received = []
+    monkeypatch.setattr(events, "_channel", channel)
+    monkeypatch.setattr(events, "_tap", None)
+    monkeypatch.setattr(events, "_sink", received.append)
+
+    events.emit("progress", percent=42)
+    assert received == [{"event": "progress", "percent": 42}]
+    assert channel.getvalue() == ""
+
+
+def test_host_reports_a_job_through_events(tmp_path, write_wav):
+    path = write_wav("song.wav", seconds=0.5)
+    host = SeparationHost()
+    received = []
+    logs = []
+    try:
+        result = host.run_job({"input_file": path, "stem_count": 4, "quality": "fast",
+                               "audio_format": "wav", "device": "cpu",
+                               "output_dir": str(tmp_path / "out"), "cache": False},
+                              on_event=received.append, on_log=logs.append)
+    finally:
+        host.stop()
+
+    assert result["ok"], logs
+    kinds = [event["event"] for event in received]
+    assert kinds[-1] == "done" and "output" in kinds and "progress" in kinds
+    stages = [event["stage"] for event in received if event["event"] == "stage"]
+    assert stages[0] == "load"
+    # Human-readable output goes to the log, never to the event stream
+    assert logs and all(events.parse(line) is None for line in logs)
@@ -0,0 +1,35 @@
+import torch
+
+from core.fake_model import FAKE_MODEL_6S, SOURCES, SOURCES_6S, FakeSeparator, fake_model_requested
+
+
+def noise(seconds=0.5, samplerate=44100):
+    generator = torch.Generator().manual_seed(0)
+    return 0.3 * torch.randn(2, int(seconds * samplerate), generator=generator)
+
+
+def test_stems_sum_to_the_input():
+    separator = FakeSeparator()
+    wav = noise()
+    _, stems = separator.separate_tensor(wav, separator.samplerate)
+
+    assert list(stems) == SOURCES
+    # Like Demucs, every stem gets the input's mean back after normalisation
+    mean = wav.mean()
+    assert torch.allclose(sum(stems.values()) - (len(stems) - 1) * mean, wav, atol=1e-4)
+
+
+def test_six_stem_model_and_determinism():
+    separator = FakeSeparator(FAKE_MODEL_6S)
+    wav = noise()
+    _, first = separator.separate_tensor(wav, separator.samplerate)
+    _, second = separator.separate_tensor(wav, separator.samplerate)
+
+    assert list(first) == SOURCES_6S
+    assert all(torch.equal(first[name], second[name]) for name in SOURCES_6S)
+
+
+def test_fake_model_requested_from_env(monkeypatch):
+    assert fake_model_requested()
+    monkeypatch.setenv("STEM_SPLITTER_FAKE_MODEL", "0")
+    assert not fake_model_requested()
@@ -0,0 +1,56 @@
+import json
+
+from core import hardware
+
+
+def fake_probe(calls, error=None):
+    def probe():
+        calls.append(1)
+        return {"gpu_available": False, "devices": [], "cpu_count": 8, "error": error}
+    return probe
+
+
+def test_probe_is_cached_until_the_fingerprint_changes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(hardware, "probe_hardware", fake_probe(calls))
+
+    first = hardware.get_hardware_info()
+    assert hardware.get_hardware_info() == first
+    assert len(calls) == 1
+
+    monkeypatch.setenv("CUDA_VISIBLE_DEVICES", "1")
+    hardware.get_hardware_info()
+    assert len(calls) == 2
+
+    hardware.get_hardware_info(refresh=True)
+    assert len(calls) == 3
+
+
+def test_failed_probe_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(hardware, "probe_hardware", fake_probe(calls, error="No module named 'torch'"))
+    hardware.get_hardware_info()
+    hardware.get_hardware_info()
+    assert len(calls) == 2
+
+
+def test_unreadable_or_foreign_cache_is_ignored(tmp_path):
+    path = tmp_path / "hardware.json"
+    assert hardware.load_cached_hardware(str(path)) is None
+    path.write_text("not json", encoding="utf-8")
+    assert hardware.load_cached_hardware(str(path)) is None
+    path.write_text(json.dumps(["info"]), encoding="utf-8")
+    assert hardware.load_cached_hardware(str(path)) is None
+
+    hardware.save_cached_hardware({"cpu_count": 4}, str(path))
+    assert hardware.load_cached_hardware(str(path)) == {"cpu_count": 4}
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    saved["fingerprint"]["version"] -= 1
+    path.write_text(json.dumps(saved), encoding="utf-8")
+    assert hardware.load_cached_hardware(str(path)) is None
+
+
+def test_probe_reports_the_installed_torch():
+    info = hardware.probe_hardware()
+    assert info["error"] is None and info["torch_version"]
+    assert info["gpu_available"] == bool(info["devices"])
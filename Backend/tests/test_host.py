@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import time
+
+from core.host import SeparationHost, reap
+
+# Ignores SIGTERM, so only a kill ends it
+STUBBORN = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print(flush=True); time.sleep(60)"
+
+
+def stubborn_host():
+    host = SeparationHost()
+    host.process = subprocess.Popen([sys.executable, "-c", STUBBORN], stdin=subprocess.PIPE,
+                                    stdout=subprocess.PIPE)
+    host.process.stdout.readline()  # Handler installed
+    return host
+
+
+def test_terminate_does_not_wait_and_reap_kills_together():
+    hosts = [stubborn_host(), stubborn_host()]
+
+    started = time.time()
+    processes = [host.terminate() for host in hosts]
+    assert time.time() - started < 1
+    assert all(host.process is None for host in hosts)
+    assert all(process.poll() is None for process in processes)
+
+    started = time.time()
+    reap(processes, timeout=0.5)
+    for process in processes:
+        process.wait(timeout=5)
+        process.stdout.close()
+    assert time.time() - started < 3
+
+
+def test_terminate_without_a_process():
+    assert SeparationHost().terminate() is None
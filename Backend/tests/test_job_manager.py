@@ -0,0 +1,176 @@
+import threading
+
+from core import streaming
+from core.job_manager import CANCELLED, DONE, PENDING, RUNNING, HostExecutor, JobManager
+
+
+class FakeExecutor:
+    """Executor that only records calls; tests finish jobs by hand"""
+
+    def __init__(self, job, manager):
+        self.job = job
+        self.manager = manager
+        self.cancelled = False
+
+    def start(self):
+        pass
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def make_manager(max_concurrent=1):
+    started = []
+
+    def factory(job, manager):
+        started.append(job)
+        return FakeExecutor(job, manager)
+
+    return JobManager(factory, max_concurrent=max_concurrent), started
+
+
+def test_higher_priority_runs_first():
+    manager, started = make_manager()
+    low = manager.submit("low.wav", priority=0)
+    high = manager.submit("high.wav", priority=5)
+    also_low = manager.submit("low2.wav", priority=0)
+    manager.start()
+    assert started == [high]
+
+    manager.job_finished(high, True)
+    manager.job_finished(low, True)
+    assert started == [high, low, also_low]
+    assert high.state == DONE and high.progress == 100
+
+
+def test_concurrency_limit():
+    manager, started = make_manager(max_concurrent=2)
+    jobs = [manager.submit(f"{i}.wav") for i in range(3)]
+    manager.start()
+    assert started == jobs[:2]
+    assert manager.running_count() == 2 and manager.pending_count() == 1
+
+
+def test_cancel_pending_job_never_starts():
+    manager, started = make_manager()
+    first = manager.submit("a.wav")
+    second = manager.submit("b.wav")
+    assert manager.cancel(second.id)
+    manager.start()
+    manager.job_finished(first, True)
+
+    assert started == [first]
+    assert second.state == CANCELLED
+    assert not manager.cancel(second.id)
+    assert manager.is_idle()
+
+
+def test_cancel_running_job_cancels_executor():
+    manager, started = make_manager()
+    job = manager.submit("a.wav")
+    manager.start()
+    assert manager.cancel(job.id)
+
+    assert job.state == CANCELLED and job.executor.cancelled
+    # A late report from the executor does not override the cancellation
+    manager.job_finished(job, True)
+    assert job.state == CANCELLED
+
+
+def test_claim_similar_takes_matching_pending_jobs():
+    manager, started = make_manager()
+    leader = manager.submit("a.wav")
+    other = manager.submit("b.wav", {"stems": 6})
+    same = manager.submit("c.wav")
+    duplicate = manager.submit("a.wav")
+    extra = manager.submit("d.wav")
+    manager.start()
+
+    claimed = manager.claim_similar(leader, 1)
+    assert claimed == [same]
+    assert same.state == RUNNING and same.slot == leader.slot
+    assert other.state == PENDING and duplicate.state == PENDING and extra.state == PENDING
+    assert started == [leader]
+
+
+def test_clear_finished_keeps_most_recent():
+    manager, _ = make_manager(max_concurrent=3)
+    jobs = [manager.submit(f"{i}.wav") for i in range(3)]
+    manager.start()
+    for job in jobs:
+        manager.job_finished(job, True)
+
+    manager.clear_finished(keep=1)
+    assert manager.jobs() == [jobs[2]]
+
+
+class ScriptedHost:
+    """SeparationHost stand-in finishing every file except block_on until cancelled"""
+
+    def __init__(self, block_on):
+        self.block_on = block_on
+        self.requests = []
+        self.blocked = threading.Event()
+        self.cancelled = threading.Event()
+
+    def run_job(self, request, on_event=None, on_log=None):
+        self.requests.append(request)
+        for file in request.get("inputs") or [request["input_file"]]:
+            if file == self.block_on and not self.cancelled.is_set():
+                self.blocked.set()
+                self.cancelled.wait(5)
+                return {"ok": False, "error": "Separation host exited"}
+            on_event({"event": "file_done", "file": file, "ok": True, "output_path": file + ".out"})
+        return {"ok": True}
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+def run_batch(block_on, cancel):
+    host = ScriptedHost(block_on)
+    manager = JobManager(lambda job, m: HostExecutor(job, m, host, echo=False, batch_size=3))
+    jobs = [manager.submit(f"{name}.wav") for name in "abc"]
+    manager.start()
+    assert host.blocked.wait(5)
+    assert manager.cancel(jobs["abc".index(cancel)].id)
+    assert manager.wait(timeout=5)
+    return jobs, host.requests
+
+
+def test_cancelling_claimed_job_drops_it_from_the_batch():
+    (a, b, c), requests = run_batch(block_on="b.wav", cancel="b")
+    assert [a.state, b.state, c.state] == [DONE, CANCELLED, DONE]
+    assert [r["inputs"] for r in requests] == [["a.wav", "b.wav", "c.wav"], ["c.wav"]]
+
+
+def test_cancelling_leader_cancels_claimed_jobs():
+    (a, b, c), requests = run_batch(block_on="a.wav", cancel="a")
+    assert [a.state, b.state, c.state] == [CANCELLED, CANCELLED, CANCELLED]
+    assert len(requests) == 1
+
+
+def test_long_input_queued_behind_another_file_is_still_streamed(monkeypatch, write_wav):
+    monkeypatch.setattr(streaming, "STREAM_THRESHOLD_SECONDS", 1.0)
+    short = write_wav("a.wav", seconds=0.2)
+    long = write_wav("b.wav", seconds=2.0, seed=1)
+    other = write_wav("c.wav", seconds=0.2, seed=2)
+    host = ScriptedHost(block_on=None)
+    manager = JobManager(lambda job, m: HostExecutor(job, m, host, echo=False, batch_size=3))
+    jobs = [manager.submit(file) for file in (short, long, other)]
+    manager.start()
+    assert manager.wait(timeout=5)
+
+    assert [job.state for job in jobs] == [DONE, DONE, DONE]
+    assert [r.get("inputs") for r in host.requests] == [[short, other], None]
+    # Sent on its own, so the host's single-file path streams it
+    assert host.requests[1]["input_file"] == long and host.requests[1]["stream"] == "auto"
+
+
+def test_streamed_and_parallel_shift_jobs_are_not_claimed():
+    for settings in ({"stream": "on"}, {"parallel_shifts": "on"}):
+        manager, _ = make_manager()
+        leader = manager.submit("a.wav", settings)
+        manager.submit("b.wav", settings)
+        manager.start()
+        assert manager.claim_similar(leader, 1) == []
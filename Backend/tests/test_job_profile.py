@@ -0,0 +1,36 @@
+import json
+import os
+import pstats
+
+import pytest
+import torch
+
+from core import job_profile
+from core.separator import separate_with_api
+
+
+def test_requested_mode(monkeypatch):
+    assert job_profile.requested_mode() is None
+    monkeypatch.setenv("STEM_SPLITTER_PROFILE_JOBS", " Torch ")
+    assert job_profile.requested_mode() == "torch"
+    monkeypatch.setenv("STEM_SPLITTER_PROFILE_JOBS", "perf")
+    assert job_profile.requested_mode() is None
+
+
+def test_trace_is_saved_when_the_block_raises(tmp_path):
+    with pytest.raises(RuntimeError):
+        with job_profile.profiled("torch", "song.mp3", str(tmp_path)):
+            torch.ones(64, 64) @ torch.ones(64, 64)
+            raise RuntimeError("separation failed")
+    with open(tmp_path / "song.torch-trace.json", "r", encoding="utf-8") as f:
+        assert json.load(f)["traceEvents"]
+
+
+def test_profiled_separation_saves_a_trace_next_to_the_stems(tmp_path, write_wav):
+    path = write_wav("song.wav", seconds=0.5)
+    output_path = separate_with_api(path, 4, "fast", "wav", "", "cpu", str(tmp_path / "out"),
+                                    use_cache=False, profile="cprofile")
+
+    trace = os.path.join(output_path, "song.prof")
+    assert pstats.Stats(trace).total_calls > 0
+    assert os.path.exists(os.path.join(output_path, "vocals.wav"))
@@ -0,0 +1,40 @@
+from core import metrics
+
+
+def test_render_text_format(monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", {})
+    counter = metrics._register(metrics.Counter("test_jobs_total", "Jobs"))
+    gauge = metrics._register(metrics.Gauge("test_queue", "Queued jobs"))
+    histogram = metrics._register(metrics.Histogram("test_seconds", "Durations", (1, 5)))
+
+    counter.inc(state="done")
+    counter.inc(2, state='say "hi"')
+    gauge.set(0.5)
+    histogram.observe(0.5)
+    histogram.observe(3)
+
+    assert metrics.render() == "\n".join([
+        "# HELP test_jobs_total Jobs",
+        "# TYPE test_jobs_total counter",
+        'test_jobs_total{state="done"} 1',
+        'test_jobs_total{state="say \\"hi\\""} 2',
+        "# HELP test_queue Queued jobs",
+        "# TYPE test_queue gauge",
+        "test_queue 0.5",
+        "# HELP test_seconds Durations",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{le="1"} 1',
+        'test_seconds_bucket{le="5"} 2',
+        'test_seconds_bucket{le="+Inf"} 2',
+        "test_seconds_sum 3.5",
+        "test_seconds_count 2",
+    ]) + "\n"
+
+
+def test_record_event_updates_stage_and_audio_metrics():
+    before = metrics.audio_seconds.values.get((), 0)
+    metrics.record_event({"event": "timing", "stage": "decode", "seconds": 0.2})
+    metrics.record_event({"event": "audio", "seconds": 10.0, "elapsed": 2.0})
+
+    assert metrics.audio_seconds.values[()] == before + 10.0
+    assert 'stem_splitter_stage_seconds_count{stage="decode"}' in metrics.render()
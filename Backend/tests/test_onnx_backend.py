@@ -0,0 +1,51 @@
+import os
+
+import pytest
+import torch
+
+from core import onnx_backend
+from core.fake_model import FakeModel
+
+
+def test_requested_backend(monkeypatch):
+    assert onnx_backend.requested() == "torch"
+    monkeypatch.setenv("STEM_SPLITTER_BACKEND", " ONNX ")
+    assert onnx_backend.requested() == "onnx"
+    monkeypatch.setenv("STEM_SPLITTER_BACKEND", "tensorrt")
+    assert onnx_backend.requested() == "torch"
+
+
+def test_non_htdemucs_models_stay_in_torch(monkeypatch):
+    monkeypatch.setattr(onnx_backend, "available", lambda: True)
+    model = FakeModel()
+    forward = model.forward
+    assert not onnx_backend.is_spectral(model)
+    assert not onnx_backend.use_onnx("fake", model)
+    assert model.forward == forward
+
+
+def test_missing_onnxruntime_keeps_torch(monkeypatch):
+    monkeypatch.setattr(onnx_backend, "available", lambda: False)
+    model = FakeModel()
+    assert not onnx_backend.use_onnx("fake", model)
+
+
+def test_exported_htdemucs_matches_torch(tmp_path):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    htdemucs = pytest.importorskip("demucs.htdemucs")
+
+    torch.manual_seed(0)
+    # Small random-weight HTDemucs; the export does not depend on the weights
+    model = htdemucs.HTDemucs(sources=["drums", "bass", "other", "vocals"], channels=8, depth=2,
+                              t_layers=1, segment=1, samplerate=8000, nfft=512).eval()
+    mix = 0.1 * torch.randn(1, 2, 6000)
+    with torch.no_grad():
+        expected = model(mix)
+
+    assert onnx_backend.use_onnx("tiny", model)
+    assert os.path.exists(onnx_backend.export_path("tiny", 0, 1.0))
+    with torch.no_grad():
+        out = model(mix)
+    assert out.shape == expected.shape
+    assert torch.allclose(out, expected, atol=1e-4)
@@ -0,0 +1,23 @@
+import numpy as np
+import soundfile as sf
+import torch
+
+from core import parallel_shifts
+from core.fake_model import FakeSeparator
+
+
+def test_parallel_passes_match_in_process_separation(write_wav):
+    wav = torch.from_numpy(sf.read(write_wav("song.wav", seconds=1.0), dtype="float32")[0].T.copy())
+    separator = FakeSeparator(shifts=2)
+    try:
+        parallel = parallel_shifts.separate_shifts_parallel(separator, "fake", wav, 2)
+        assert parallel_shifts._pool_key[-1] == (False, "torch", False)
+    finally:
+        parallel_shifts.shutdown_pool()
+
+    _, expected = separator.separate_tensor(wav, separator.samplerate)
+    for name, stem in expected.items():
+        assert parallel[name].shape == stem.shape
+        # The fake model sees other padding at the edges of a shifted window
+        inner = slice(200, -200)
+        assert np.abs(parallel[name][..., inner].numpy() - stem[..., inner].numpy()).max() < 1e-4
@@ -0,0 +1,41 @@
+import sys
+import types
+
+import pytest
+import torch
+
+from core import model_setup, quantize
+
+
+@pytest.fixture
+def demucs_version(monkeypatch):
+    """Installs a stand-in demucs package whose float model must never be loaded"""
+    demucs = types.ModuleType("demucs")
+    demucs.__version__ = "9.9"
+    pretrained = types.ModuleType("demucs.pretrained")
+
+    def get_model(name):
+        raise AssertionError("float model loaded")
+
+    pretrained.get_model = get_model
+    monkeypatch.setitem(sys.modules, "demucs", demucs)
+    monkeypatch.setitem(sys.modules, "demucs.pretrained", pretrained)
+    return demucs
+
+
+def test_cache_key_includes_demucs_version(demucs_version):
+    assert quantize.cache_path("htdemucs").endswith("-demucs9.9.pt")
+    demucs_version.__version__ = "10.0"
+    assert quantize.cache_path("htdemucs").endswith("-demucs10.0.pt")
+
+
+@pytest.mark.skipif(not quantize.supported(), reason="no int8 engine")
+def test_cached_int8_model_is_loaded_without_the_float_model(demucs_version):
+    float_model = torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 4))
+    quantize.quantize_and_cache("htdemucs", float_model)
+
+    model = model_setup.load_model("htdemucs", quantize=True)
+    assert quantize.quantized_layers(model) == 2
+    assert model_setup.prepare_model("htdemucs", model, "cpu", quantize=True) is model
+    with pytest.raises(AssertionError):
+        model_setup.load_model("htdemucs")
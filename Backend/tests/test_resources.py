@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+from core import resources
+
+
+def test_sampler_measures_this_process():
+    sampler = resources.ResourceSampler(include_root=True, gpu=False)
+    sampler.sample()
+    sum(i * i for i in range(200000))
+    sample = sampler.sample()
+
+    assert sample["processes"] >= 1
+    assert sample["rss_bytes"] > 0
+    assert sample["cpu_seconds"] >= 0
+    assert "CPU" in resources.format_sample(sample)
+    assert resources.format_sample({"time": 0, "processes": 0}) == ""
+
+
+def test_no_gpu_figures_without_pynvml(monkeypatch):
+    def spawn(*args, **kwargs):
+        raise AssertionError("sampling spawned a process")
+
+    monkeypatch.setitem(sys.modules, "pynvml", None)
+    monkeypatch.setattr(subprocess, "run", spawn)
+    monkeypatch.setattr(subprocess, "Popen", spawn)
+    monkeypatch.setattr(resources, "_nvml", {"handle": None, "failed": False})
+
+    assert resources.read_gpu() is None
+    sample = resources.ResourceSampler(include_root=True).sample()
+    assert "gpu_used_bytes" not in sample
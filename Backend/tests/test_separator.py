@@ -0,0 +1,15 @@
+import os
+
+from core.separator import separate_batch
+
+
+def test_failed_decode_leaves_no_output_folder(tmp_path, write_wav):
+    good = write_wav("good.wav", seconds=0.5)
+    bad = str(tmp_path / "bad.wav")
+    with open(bad, "wb") as f:
+        f.write(b"not audio")
+    out = str(tmp_path / "out")
+
+    results = separate_batch([good, bad], 4, "fast", "wav", "", "cpu", out, use_cache=False)
+    assert [(os.path.basename(file), ok) for file, ok, _ in results] == [("good.wav", True), ("bad.wav", False)]
+    assert os.listdir(os.path.join(out, "fake")) == ["good"]
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+import pytest
+
+from server import HttpError, JobService, handle_connection, read_request
+
+
+@pytest.fixture
+def service():
+    # Never started, so submitted jobs stay pending and no host is spawned
+    service = JobService(max_jobs=2)
+    yield service
+    service.stop()
+
+
+@pytest.mark.parametrize("settings", [
+    {"stems": 3},
+    {"stems": "four"},
+    {"quality": "ultra"},
+    {"audio_format": "ogg"},
+    {"device": "tpu"},
+    {"bitrate": "fast"},
+    {"bitrate": -128},
+    {"stream": "maybe"},
+    {"cache": "yes"},
+    {"clip_batch": -1},
+    {"clip_batch": 4, "stream": "on"},
+    {"clip_batch": 4, "parallel_shifts": "on"},
+    {"colour": "blue"},
+])
+def test_bad_settings_are_rejected(service, write_wav, settings):
+    with pytest.raises(HttpError) as error:
+        service.enqueue({"file": write_wav("a.wav", seconds=0.1), "settings": settings})
+    assert error.value.status == 400
+    assert not service.manager.jobs()
+
+
+def test_valid_job_is_queued(service, write_wav):
+    job = service.enqueue({"file": write_wav("a.wav", seconds=0.1), "priority": 3,
+                           "settings": {"stems": 6, "quality": "best", "audio_format": "mp3", "bitrate": 192}})
+    assert job.settings["stems"] == 6 and job.settings["bitrate"] == "192"
+    assert job.priority == 3
+    assert service.health()["pending"] == 1
+
+
+def test_missing_file_and_full_queue(service, write_wav, tmp_path):
+    with pytest.raises(HttpError) as error:
+        service.enqueue({"file": str(tmp_path / "missing.wav")})
+    assert error.value.status == 400
+
+    path = write_wav("a.wav", seconds=0.1)
+    service.enqueue({"file": path})
+    service.enqueue({"file": path})
+    with pytest.raises(HttpError) as error:
+        service.enqueue({"file": path})
+    assert error.value.status == 429
+
+
+def read(data):
+    async def parse():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(parse())
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_malformed_content_length_is_a_bad_request(length):
+    with pytest.raises(HttpError) as error:
+        read(b"POST /jobs HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert error.value.status == 400
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_cancel_runs_off_the_event_loop(service, write_wav, monkeypatch):
+    job = service.enqueue({"file": write_wav("a.wav", seconds=0.1)})
+    cancel = service.manager.cancel
+    threads = []
+
+    def record(job_id):
+        threads.append(threading.current_thread())
+        return cancel(job_id)
+    monkeypatch.setattr(service.manager, "cancel", record)
+
+    async def request():
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"POST /jobs/{job.id}/cancel HTTP/1.1\r\n\r\n".encode("latin-1"))
+        reader.feed_eof()
+        writer = FakeWriter()
+        await handle_connection(service, reader, writer)
+        return writer.data
+    response = asyncio.run(request())
+
+    assert response.startswith(b"HTTP/1.1 200")
+    assert threads and threads[0] is not threading.main_thread()
+    assert job.state == "cancelled"
+
+    with pytest.raises(HttpError) as error:
+        service.cancel(job.id)
+    assert error.value.status == 409
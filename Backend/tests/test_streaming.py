@@ -0,0 +1,44 @@
+import numpy as np
+import soundfile as sf
+
+from core.fake_model import FakeSeparator, SOURCES
+from core.streaming import separate_streaming
+
+
+def test_crossfaded_windows_reconstruct_the_input(tmp_path, write_wav):
+    # The fake model's stems sum to its input, so the stems of the streamed
+    # windows must too, across every cross-faded overlap
+    path = write_wav("song.wav", seconds=3.0)
+    separator = FakeSeparator(shifts=0)
+    files = {name: str(tmp_path / f"{name}.wav") for name in SOURCES}
+    percents = []
+    separate_streaming(separator, path, files, window_seconds=1.0, overlap_seconds=0.25,
+                       on_progress=percents.append)
+
+    original = sf.read(path, dtype="float32")[0]
+    total = sum(sf.read(files[name], dtype="float32")[0] for name in SOURCES)
+    assert total.shape == original.shape
+    assert np.abs(total - original).max() < 1e-3
+    assert percents[-1] == 100 and percents == sorted(percents)
+
+
+def test_loud_stems_are_rescaled_like_the_full_file_path(tmp_path, write_wav):
+    import torch
+    from core.writer import rescale_factor
+
+    path = str(tmp_path / "loud.wav")
+    quiet = sf.read(write_wav("quiet.wav", seconds=2.0), dtype="float32")[0]
+    sf.write(path, 12 * quiet, 44100, subtype="FLOAT")
+    separator = FakeSeparator(shifts=0)
+    files = {name: str(tmp_path / f"{name}.wav") for name in SOURCES}
+    separate_streaming(separator, path, files, window_seconds=0.5, overlap_seconds=0.1)
+
+    _, full = separator.separate_tensor(torch.from_numpy(12 * quiet.T.copy()), 44100)
+    assert any(rescale_factor(full[name].numpy()) < 1 for name in SOURCES)
+    for name in SOURCES:
+        stem = full[name].numpy()
+        expected = (stem * rescale_factor(stem)).T
+        streamed = sf.read(files[name], dtype="float32")[0]
+        assert np.abs(streamed).max() < 1
+        assert np.abs(streamed - expected).max() < 0.01
+    assert sorted(p.name for p in tmp_path.iterdir() if "stream" in p.name) == []
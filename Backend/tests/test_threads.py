@@ -0,0 +1,45 @@
+from core.threads import format_cpulist, numa_nodes, parse_cpulist, partition_cores
+
+
+def test_parse_cpulist():
+    assert parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpulist("5") == [5]
+    assert parse_cpulist("") == []
+
+
+def test_format_cpulist_collapses_runs():
+    assert format_cpulist([3, 0, 1, 2, 8, 10, 11]) == "0-3,8,10-11"
+    assert parse_cpulist(format_cpulist([7, 1, 2, 4])) == [1, 2, 4, 7]
+
+
+def test_numa_nodes_reads_sysfs(tmp_path):
+    for name, cpulist in (("node0", "0-3"), ("node1", "4-7")):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "cpulist").write_text(cpulist + "\n")
+    (tmp_path / "possible").write_text("0-1\n")
+
+    assert numa_nodes(range(8), root=str(tmp_path)) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    # Only allowed CPUs are listed, empty nodes are dropped
+    assert numa_nodes([1, 2], root=str(tmp_path)) == [[1, 2]]
+    assert numa_nodes([0, 1], root=str(tmp_path / "missing")) == [[0, 1]]
+
+
+def test_partition_cores_single_node():
+    assert partition_cores(2, cpus=range(8), nodes=[list(range(8))]) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert partition_cores(3, cpus=range(8), nodes=[list(range(8))]) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+
+
+def test_partition_cores_keeps_slices_within_nodes():
+    nodes = [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert partition_cores(1, cpus=range(8), nodes=nodes) == [list(range(8))]
+    assert partition_cores(2, cpus=range(8), nodes=nodes) == nodes
+    assert partition_cores(4, cpus=range(8), nodes=nodes) == [[0, 1], [2, 3], [4, 5], [6, 7]]
+    # The larger node gets the extra worker
+    assert partition_cores(3, cpus=range(6), nodes=[[0, 1, 2, 3], [4, 5]]) == [[0, 1], [2, 3], [4, 5]]
+
+
+def test_partition_cores_more_workers_than_cores():
+    nodes = [[0, 1], [2, 3]]
+    assert partition_cores(5, cpus=range(4), nodes=nodes) == [[0], [1], [2], [3], [0]]
+    assert partition_cores(4, cpus=range(4), nodes=nodes) == [[0], [1], [2], [3]]
+    assert partition_cores(3, cpus=[0, 1], nodes=[[0, 1]]) == [[0], [1], [0]]
@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from core import hardware
+from core.worker import HardwareProbe
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def test_hardware_probe_runs_off_the_calling_thread(app, monkeypatch):
+    threads = []
+
+    def probe():
+        threads.append(threading.current_thread())
+        return {"gpu_available": False, "devices": [], "cpu_count": 2, "error": None}
+    monkeypatch.setattr(hardware, "probe_hardware", probe)
+
+    results = []
+    worker = HardwareProbe()
+    worker.probed.connect(results.append)
+    worker.start()
+    assert worker.wait(5000)
+    # Queued to this thread's event loop
+    app.processEvents()
+
+    assert results and results[0]["cpu_count"] == 2
+    assert threads[0] is not threading.current_thread()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+from core.writer import StemWriter, rescale_factor, write_blocks
+
+
+def test_stem_writer_appends_blocks(tmp_path):
+    rng = np.random.default_rng(0)
+    stems = {name: (0.2 * rng.standard_normal((2, 5000))).astype(np.float32) for name in ("bass", "vocals")}
+    files = {name: str(tmp_path / f"{name}.wav") for name in stems}
+
+    for background in (False, True):
+        with StemWriter(files, 44100, 2, background=background) as writer:
+            for start in range(0, 5000, 1200):
+                blocks = {name: torch.from_numpy(data[:, start:start + 1200]) for name, data in stems.items()}
+                # Stems without an output file are ignored
+                blocks["drums"] = torch.zeros(2, 1200)
+                writer.write(blocks)
+
+        for name, data in stems.items():
+            written, samplerate = sf.read(files[name], dtype="float32")
+            assert samplerate == 44100
+            assert written.shape == (5000, 2)
+            # 16-bit PCM
+            assert np.abs(written - data.T).max() < 1e-4
+
+
+def test_write_blocks_clamps_and_rescales(tmp_path):
+    loud = np.array([[2.0, -0.5, 0.25]], dtype=np.float32)
+    with sf.SoundFile(str(tmp_path / "clamped.wav"), mode="w", samplerate=8000, channels=1,
+                      subtype="FLOAT") as f:
+        write_blocks(f, loud, block_frames=2)
+    assert sf.read(str(tmp_path / "clamped.wav"))[0].tolist() == [1.0, -0.5, 0.25]
+
+    scale = rescale_factor(loud)
+    assert scale == 1 / (1.01 * 2.0)
+    assert rescale_factor(np.array([[0.5, -0.2]])) == 1.0
+
+
+def test_writer_error_does_not_mask_the_original_exception(tmp_path):
+    class Failing:
+        def write(self, data):
+            raise OSError("disk full")
+
+        def close(self):
+            pass
+
+    def failing_writer():
+        writer = StemWriter({"bass": str(tmp_path / "bass.wav")}, 44100, 2, background=True)
+        writer.handles["bass"].close()
+        writer.handles["bass"] = Failing()
+        writer.write({"bass": np.zeros((2, 10), dtype=np.float32)})
+        return writer
+
+    with pytest.raises(KeyboardInterrupt):
+        with failing_writer():
+            raise KeyboardInterrupt
+
+    # On a clean exit the writer error still surfaces
+    with pytest.raises(OSError, match="disk full"):
+        with failing_writer():
+            pass
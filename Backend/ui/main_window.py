@@ -1,6 +1,8 @@
 import os
+import sys
 import subprocess
 import platform
+import threading
 from pathlib import Path
 from PyQt6.QtCore import Qt, QTimer, QSize, pyqtSignal
 from PyQt6.QtWidgets import (
@@ -12,7 +14,12 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QFont, QIcon, QPixmap
 
-from core.worker import SplitterWorker
+from core import startup_profile
+from core.worker import SplitterWorker, HardwareProbe, ResourceMonitor
+from core.host import SeparationHost, reap
+from core.job_profile import requested_mode as requested_profile_mode
+from core.job_manager import JobManager, DONE, RUNNING
+from core.threads import partition_cores, max_parallel_files, pinning_enabled
 
 AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".aacc", ".ogg", ".m4a")
 
@@ -35,6 +42,50 @@ class ModernProgressBar(QProgressBar):
         """)
         
 
+class WorkerProgressRow(QWidget):
+    """Progress display for one parallel worker slot"""
+    
+    def __init__(self, slot, parent=None):
+        super().__init__(parent)
+        self.slot = slot
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+        
+        header = QHBoxLayout()
+        header.setSpacing(8)
+        self.name_label = QLabel(f"Worker {slot + 1}: idle")
+        self.name_label.setStyleSheet(
+            "color: #7a5f4b; font-size: 12px; background: transparent; border: none;"
+        )
+        header.addWidget(self.name_label, 1)
+        self.percent_label = QLabel("")
+        self.percent_label.setStyleSheet(
+            "color: #2f6f6d; font-size: 12px; font-weight: 600; "
+            "background: transparent; border: none;"
+        )
+        header.addWidget(self.percent_label)
+        layout.addLayout(header)
+        
+        self.progress_bar = ModernProgressBar()
+        layout.addWidget(self.progress_bar)
+    
+    def set_job(self, filename):
+        self.name_label.setText(f"Worker {self.slot + 1}: {filename}")
+        self.progress_bar.setValue(0)
+        self.percent_label.setText("0%")
+    
+    def set_progress(self, value):
+        self.progress_bar.setValue(value)
+        self.percent_label.setText(f"{value}%")
+    
+    def set_idle(self):
+        self.name_label.setText(f"Worker {self.slot + 1}: idle")
+        self.progress_bar.setValue(0)
+        self.percent_label.setText("")
+
+
 class FileItemWidget(QWidget):
     """Custom widget for file items with delete button"""
     delete_requested = pyqtSignal(str)  # Signal to emit when delete is clicked
@@ -261,11 +312,16 @@ class MainWindow(QMainWindow):
 
         
         # Queue and state
-        self.queue = []  # List of file paths
-        self.current_index = 0
-        self.worker = None
+        self.queue = []  # List of file paths shown in the queue list
+        self.job_manager = JobManager(self.create_job_executor, max_concurrent=1)
+        self.job_manager.add_listener(self.on_job_event)
+        self.hosts = {}  # Warm separation host per concurrency slot
         self.output_dir = None
-        self.gpu_available = self.check_gpu_availability()
+        # Filled in by the background hardware probe once the window is up
+        self.gpu_available = False
+        self.hardware_info = None
+        self.hardware_probe = None
+        self.resource_monitor = None  # Samples the separator processes while jobs run
         self.is_processing = False  # Guard to prevent multiple starts
         self.error_shown = False  # Prevent showing multiple error dialogs
         
@@ -278,6 +334,9 @@ class MainWindow(QMainWindow):
 
         contact_action = help_menu.addAction("Contact")
         contact_action.triggered.connect(self.show_contact_dialog)
+        
+        # Importing torch and querying CUDA takes seconds; do it after the first paint
+        QTimer.singleShot(0, self.start_hardware_probe)
     
     def set_app_icon(self):
         """Set the application window icon"""
@@ -322,21 +381,39 @@ class MainWindow(QMainWindow):
                 print(f"     {exists} {lp}")
             print("   Using default icon.")
     
-    def check_gpu_availability(self):
-        """Check if CUDA GPU is available"""
-        try:
-            import torch
-            if torch.cuda.is_available():
-                gpu_name = torch.cuda.get_device_name(0)
-                gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1e9
-                print(f"[OK] GPU Available: {gpu_name} ({gpu_memory:.1f} GB)")
-                return True
-            else:
-                print("[WARNING] No GPU available, using CPU only")
-                return False
-        except Exception as e:
-            print(f"[WARNING] Error checking GPU: {e}")
-            return False
+    def start_hardware_probe(self):
+        """Probe torch/CUDA once on a background thread"""
+        if self.hardware_probe is not None:
+            return
+        self.hardware_probe = HardwareProbe()
+        self.hardware_probe.probed.connect(self.on_hardware_probed)
+        self.hardware_probe.start()
+    
+    def on_hardware_probed(self, info):
+        """Fill in device widgets with the probe result"""
+        self.hardware_info = info
+        self.gpu_available = info.get("gpu_available", False)
+        startup_profile.mark("hardware probe done")
+        if info.get("error"):
+            print(f"[WARNING] Error checking GPU: {info['error']}")
+        elif self.gpu_available:
+            print(f"[OK] GPU Available: {info['gpu_name']} ({info['gpu_memory_gb']:.1f} GB)")
+        else:
+            print("[WARNING] No GPU available, using CPU only")
+        self.populate_device_box()
+        if hasattr(self, "status_label"):
+            text, color = self.hardware_status()
+            self.status_label.setText(text)
+            self.style_status_label(color)
+    
+    def hardware_status(self):
+        """Text and color for the hardware status label"""
+        info = self.hardware_info
+        if info is None:
+            return "Detecting hardware...", "#7a5f4b"
+        if self.gpu_available:
+            return f"GPU Available\n{info['gpu_name']}\n{info['gpu_memory_gb']:.1f} GB VRAM", "#4CAF50"
+        return "CPU Only Mode", "#FF9800"
         
     def init_ui(self):
         # Central widget with horizontal layout
@@ -378,9 +455,13 @@ class MainWindow(QMainWindow):
         left_layout.addWidget(stem_count_group)
         
         # Processing Quality
-        quality_group = self.create_option_group("Processing Quality", ["Fast", "Balanced", "Best"])
+        quality_group = self.create_option_group("Processing Quality", ["Fast", "Balanced", "Best", "Turbo (CPU int8)"])
         left_layout.addWidget(quality_group)
         
+        # Parallel files (CPU only; each file gets its own slice of cores)
+        parallel_group = self.create_option_group("Parallel Files (CPU)", self.parallel_options())
+        left_layout.addWidget(parallel_group)
+        
         # Output Audio Quality
         output_group = self.create_output_group()
         left_layout.addWidget(output_group)
@@ -551,14 +632,20 @@ class MainWindow(QMainWindow):
         self.current_file_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         progress_container_layout.addWidget(self.current_file_label)
         
+        # Per-worker progress rows, rebuilt for each batch
+        self.worker_rows = []
+        self.worker_rows_layout = QVBoxLayout()
+        self.worker_rows_layout.setSpacing(10)
+        progress_container_layout.addLayout(self.worker_rows_layout)
+        
         # Hardware Usage Label (no border)
-        # self.hardware_label = QLabel("")
-        # self.hardware_label.setStyleSheet(
-        #     f"color: {self.text_secondary}; font-size: 11px; text-align: center; "
-        #     f"background: transparent; border: none;"
-        # )
-        # self.hardware_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        # progress_container_layout.addWidget(self.hardware_label)
+        self.hardware_label = QLabel("")
+        self.hardware_label.setStyleSheet(
+            f"color: {self.text_secondary}; font-size: 11px; text-align: center; "
+            f"background: transparent; border: none;"
+        )
+        self.hardware_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        progress_container_layout.addWidget(self.hardware_label)
         
         right_layout.addWidget(progress_container)
         
@@ -634,28 +721,8 @@ class MainWindow(QMainWindow):
         # Make it non-editable so users can select from dropdown
         self.device_box.setEditable(False)
         
-        reason = self.get_gpu_unavailable_reason()
-        if reason:
-            self.device_box.setToolTip(reason)
-      
-        if self.gpu_available:
-            try:
-                import torch
-                gpu_name = torch.cuda.get_device_name(0)
-                gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1e9
-                self.device_box.addItems([
-                    f"Auto (GPU Recommended) - {gpu_name}",
-                    "Force CPU",
-                    f"Force GPU - {gpu_name} ({gpu_memory:.1f}GB)"
-                ])
-            except:
-                self.device_box.addItems(["Auto (Recommended)", "Force CPU", "Force GPU"])
-        else:
-            self.device_box.addItems(["Auto (CPU Only)", "Force CPU"])
-            # Disable GPU option
-            for i in range(self.device_box.count()):
-                if "GPU" in self.device_box.itemText(i):
-                    self.device_box.model().item(i).setEnabled(False)
+        # Placeholder entries until the hardware probe reports back
+        self.populate_device_box()
         
         # Try to set dropdown icon - use absolute path directly
         dropdown_icon_path = self.get_asset_path("dropdown-svgrepo-com.svg")
@@ -697,6 +764,31 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.device_box)
         group.setLayout(layout)
         return group
+    def populate_device_box(self):
+        """(Re)fill the device combo box from the hardware probe result"""
+        previous = self.device_box.currentText()
+        self.device_box.clear()
+        info = self.hardware_info
+        
+        if info is None:
+            self.device_box.addItems(["Auto (Detecting hardware...)", "Force CPU"])
+            self.device_box.setToolTip("Checking for a CUDA GPU...")
+        elif self.gpu_available:
+            gpu_name = info["gpu_name"]
+            self.device_box.addItems([
+                f"Auto (GPU Recommended) - {gpu_name}",
+                "Force CPU",
+                f"Force GPU - {gpu_name} ({info['gpu_memory_gb']:.1f}GB)"
+            ])
+            self.device_box.setToolTip("")
+        else:
+            self.device_box.addItems(["Auto (CPU Only)", "Force CPU"])
+            self.device_box.setToolTip(self.get_gpu_unavailable_reason())
+        
+        # Keep "Force CPU" selected if the user picked it before the probe finished
+        if "CPU" in previous and "Auto" not in previous:
+            self.device_box.setCurrentIndex(1)
+    
     def show_about_dialog(self):
         QMessageBox.information(
             self,
@@ -763,22 +855,17 @@ class MainWindow(QMainWindow):
         status_label.setStyleSheet(f"color: {self.text_secondary}; font-size: 14px; font-weight: bold;")
         layout.addWidget(status_label)
         
-        # GPU/CPU status
-        if self.gpu_available:
-            try:
-                import torch
-                gpu_name = torch.cuda.get_device_name(0)
-                gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1e9
-                status_text = f"GPU Available\n{gpu_name}\n{gpu_memory:.1f} GB VRAM"
-                color = "#4CAF50"
-            except:
-                status_text = "GPU Available"
-                color = "#4CAF50"
-        else:
-            status_text = "CPU Only Mode"
-            color = "#FF9800"
+        # GPU/CPU status (updated when the hardware probe finishes)
+        status_text, color = self.hardware_status()
         
         self.status_label = QLabel(status_text)
+        self.style_status_label(color)
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        
+        return group
+    
+    def style_status_label(self, color):
         self.status_label.setStyleSheet(f"""
             color: {color};
             font-size: 12px;
@@ -787,10 +874,6 @@ class MainWindow(QMainWindow):
             border-radius: 4px;
             border: 1px solid #333;
         """)
-        self.status_label.setWordWrap(True)
-        layout.addWidget(self.status_label)
-        
-        return group
     
     def create_option_group(self, title, options):
         group = QGroupBox(title)
@@ -857,6 +940,12 @@ class MainWindow(QMainWindow):
         
         if title == "Processing Quality":
             self.quality_box = combo
+        elif title == "Parallel Files (CPU)":
+            self.parallel_box = combo
+            if getattr(sys, 'frozen', False):
+                # Frozen builds run the separator in-process, one file at a time
+                combo.setEnabled(False)
+                combo.setToolTip("Parallel processing is not available in this build")
         
         layout.addWidget(combo)
         group.setLayout(layout)
@@ -1002,7 +1091,7 @@ class MainWindow(QMainWindow):
     
     
     def get_gpu_unavailable_reason(self):
-        import torch, platform
+        import platform
 
         return (
         "GPU acceleration is unavailable.\n\n"
@@ -1193,23 +1282,33 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         self.progress_label.setText("Ready")
         self.hardware_label.setText("")
+        for row in self.worker_rows:
+            row.set_idle()
     
     def update_hardware_usage(self, device_type):
-        """Update hardware usage display"""
+        """Show the device until the first resource sample arrives"""
         if device_type == "cuda":
-            try:
-                import torch
-                if torch.cuda.is_available():
-                    memory_allocated = torch.cuda.memory_allocated() / 1e9
-                    memory_reserved = torch.cuda.memory_reserved() / 1e9
-                    self.hardware_label.setText(f"GPU Memory: {memory_allocated:.2f}/{memory_reserved:.2f} GB")
-                else:
-                    self.hardware_label.setText("Using GPU (fallback to CPU)")
-            except:
-                self.hardware_label.setText("Using GPU")
+            self.hardware_label.setText("Using GPU")
         else:
             self.hardware_label.setText("Using CPU")
     
+    def start_resource_monitor(self):
+        """Sample CPU, memory, IO and GPU use of the separators while jobs run"""
+        if self.resource_monitor is not None:
+            return
+        self.resource_monitor = ResourceMonitor()
+        self.resource_monitor.sampled.connect(self.update_hardware_label)
+        self.resource_monitor.start()
+    
+    def stop_resource_monitor(self):
+        if self.resource_monitor is None:
+            return
+        # Samples still queued for the GUI thread must not overwrite the reset label
+        self.resource_monitor.sampled.disconnect()
+        self.resource_monitor.stop()
+        self.resource_monitor.wait()
+        self.resource_monitor = None
+    
     def show_output_folder(self, output_folder):
         """Display output folder path and enable open button"""
         # If these widgets are not present (current UI hides them), just skip
@@ -1261,8 +1360,8 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Folder Not Found", "The output folder does not exist.")
     
     def cancel_processing(self):
-        if self.worker:
-            self.worker.cancel()
+        if self.is_processing:
+            self.on_cancelled()
     
     def start_processing(self):
         # Prevent multiple starts
@@ -1283,9 +1382,6 @@ class MainWindow(QMainWindow):
         
         print(f"DEBUG: Starting processing for {len(self.queue)} files")
         
-        # Reset state
-        self.current_index = 0
-        
         # Disable UI elements during processing
         self.start_btn.setEnabled(False)
         self.add_btn.setEnabled(False)
@@ -1295,23 +1391,26 @@ class MainWindow(QMainWindow):
         
         # Show progress
         self.progress_bar.show()
+        self.progress_bar.setValue(0)
         self.progress_label.setText("0%")
         
         # Reset progress display
         self.current_file_label.setText("")
         self.hardware_label.setText("")
         
-        # Clean up any existing worker
-        if self.worker:
-            try:
-                self.worker.disconnect()
-                self.worker.deleteLater()
-            except:
-                pass
-            self.worker = None
-        
-        # Start processing first file
-        self.process_next_file()
+        # Settings are read once per batch and stored on each job
+        settings = self.current_settings()
+        self.update_hardware_usage(self.resolve_display_device(settings["device"]))
+        self.start_resource_monitor()
+        
+        parallel = self.parallel_count(settings)
+        self.job_manager.set_max_concurrent(parallel)
+        self.build_worker_rows(parallel)
+        
+        self.job_manager.clear_finished()
+        for file_path in self.queue:
+            self.job_manager.submit(file_path, settings)
+        self.job_manager.start()
     
     def update_current_file(self, filename):
         """Update the current file being processed"""
@@ -1322,24 +1421,8 @@ class MainWindow(QMainWindow):
             self.current_file_label.setText("")
             self.current_file_label.hide()
     
-    def process_next_file(self):
-        print(f"DEBUG: process_next_file called, index: {self.current_index}")
-        self.progress_bar.setValue(0)
-
-        if self.current_index >= len(self.queue):
-            print(f"DEBUG: No more files to process. Index: {self.current_index}, Queue length: {len(self.queue)}")
-            self.on_all_jobs_finished()
-            return
-        
-        # Get current file
-        file_path = self.queue[self.current_index]
-        file_name = os.path.basename(file_path)
-        print(f"DEBUG: Processing file {self.current_index + 1}/{len(self.queue)}: {file_name}")
-    
-    # Update current file display
-        self.update_current_file(file_name)
-     
-        
+    def current_settings(self):
+        """Collect separation settings from the sidebar widgets"""
         # Get stem count from combo box
         stem_count_text = self.stem_count_combo.currentText()
         if "2 Stems" in stem_count_text:
@@ -1355,6 +1438,8 @@ class MainWindow(QMainWindow):
             quality = "fast"
         elif quality_text == "Best":
             quality = "best"
+        elif quality_text.startswith("Turbo"):
+            quality = "turbo"
         else:
             quality = "balanced"
         
@@ -1374,41 +1459,167 @@ class MainWindow(QMainWindow):
         device_text = self.device_box.currentText()
         if "CPU" in device_text:
             device = "cpu"
-            self.update_hardware_usage("cpu")
         elif "GPU" in device_text:
             device = "cuda"
-            self.update_hardware_usage("cuda")
         else:
             device = "auto"
-            # Auto-detect based on availability
-            if self.gpu_available:
-                self.update_hardware_usage("cuda")
-            else:
-                self.update_hardware_usage("cpu")
-        
-        output_dir = self.output_dir or ""
-        
-        # Create and start worker
-        self.worker = SplitterWorker(
-            file_path,
-            stems,
-            quality,
-            audio_format,
-            bitrate,
-            device,
-            output_dir
+        
+        return {
+            "stems": stems,
+            "quality": quality,
+            "audio_format": audio_format,
+            "bitrate": bitrate,
+            "device": device,
+            "output_dir": self.output_dir or "",
+            "profile": requested_profile_mode(),
+        }
+    
+    def parallel_options(self):
+        """Choices for the Parallel Files combo box"""
+        options = ["1 file at a time", "Auto (fit to memory)"]
+        count = 2
+        while count <= max_parallel_files():
+            options.append(f"{count} files")
+            count *= 2
+        return options
+    
+    def parallel_count(self, settings):
+        """Number of files to process at once for these settings"""
+        # GPU jobs share one device, frozen builds run in-process
+        if self.resolve_display_device(settings["device"]) == "cuda" or getattr(sys, 'frozen', False):
+            return 1
+        text = self.parallel_box.currentText()
+        if text.startswith("Auto"):
+            return self.auto_parallel_count(settings)
+        try:
+            return max(1, int(text.split()[0]))
+        except (ValueError, IndexError):
+            return 1
+    
+    def auto_parallel_count(self, settings):
+        """Files at once that fit in free memory and cores (see core.autotune)"""
+        from core.autotune import audio_info, max_concurrent_jobs
+        
+        durations = [(audio_info(path) or (0.0,))[0] for path in self.queue]
+        count = max_concurrent_jobs(durations, settings["stems"], settings["quality"])
+        print(f"[INFO] Auto parallel files: {count}")
+        return count
+    
+    def build_worker_rows(self, count):
+        """Create one progress row per parallel worker slot"""
+        for row in self.worker_rows:
+            self.worker_rows_layout.removeWidget(row)
+            row.deleteLater()
+        self.worker_rows = []
+        for slot in range(count):
+            row = WorkerProgressRow(slot)
+            self.worker_rows_layout.addWidget(row)
+            self.worker_rows.append(row)
+    
+    def worker_row(self, slot):
+        if slot is not None and 0 <= slot < len(self.worker_rows):
+            return self.worker_rows[slot]
+        return None
+    
+    def batch_progress(self):
+        """Overall progress of the current batch in percent"""
+        jobs = self.job_manager.jobs()
+        if not jobs:
+            return 0
+        return int(sum(job.progress for job in jobs) / len(jobs))
+    
+    def update_running_files(self):
+        """Show the names of all files currently being processed"""
+        running = [job.name for job in self.job_manager.jobs() if job.state == RUNNING]
+        self.update_current_file(", ".join(running))
+    
+    def resolve_display_device(self, device):
+        """Device shown in the hardware label for a device setting"""
+        if device == "auto":
+            return "cuda" if self.gpu_available else "cpu"
+        return device
+    
+    def create_job_executor(self, job, manager):
+        """JobManager executor factory: run each job on a SplitterWorker"""
+        # Keep one separation host alive per slot so the model is loaded once.
+        # Frozen builds run the separator in-process, which already keeps it loaded.
+        # With several slots each worker gets a disjoint share of the CPU cores,
+        # and its process is pinned to them (grouped by NUMA node).
+        threads = 0
+        cpus = None
+        if manager.max_concurrent > 1:
+            cores = partition_cores(manager.max_concurrent)[job.slot]
+            threads = len(cores)
+            if pinning_enabled():
+                cpus = cores
+        
+        host = None
+        if not getattr(sys, 'frozen', False):
+            host = self.hosts.get(job.slot)
+            if host is not None and (host.threads != threads or host.cpus != cpus):
+                host.stop()
+                host = None
+            if host is None:
+                host = self.hosts[job.slot] = SeparationHost(threads=threads, cpus=cpus)
+        
+        settings = job.settings
+        worker = SplitterWorker(
+            job.file,
+            settings["stems"],
+            settings["quality"],
+            settings["audio_format"],
+            settings["bitrate"],
+            settings["device"],
+            settings["output_dir"],
+            host=host,
+            threads=threads,
+            profile=settings["profile"],
+            cpus=cpus
         )
-        self.worker.current_file.connect(self.update_current_file)
-        self.worker.progress_changed.connect(self.update_progress)
-        self.worker.output_ready.connect(self.show_output_folder)
-        self.worker.gpu_memory_update.connect(self.update_hardware_label)  # NEW
-        self.worker.error_occurred.connect(self.on_worker_error)
-        self.worker.finished.connect(self.on_worker_finished)
-        self.worker.start()
+        worker.progress_changed.connect(lambda percent, job=job: manager.job_progress(job, percent))
+        worker.output_ready.connect(lambda path, job=job: manager.job_output(job, path))
+        worker.error_occurred.connect(lambda message, job=job: self.on_job_error(job, message))
+        worker.finished.connect(lambda job=job: manager.job_finished(job, True))
+        worker.finished.connect(worker.deleteLater)
+        return worker
+    
+    def on_job_event(self, event, job):
+        """JobManager listener: mirror job state changes in the UI"""
+        if event == "started":
+            print(f"[INFO] Processing {job.name} on worker {job.slot + 1}")
+            row = self.worker_row(job.slot)
+            if row:
+                row.set_job(job.name)
+            self.update_running_files()
+        elif event == "progress":
+            row = self.worker_row(job.slot)
+            if row:
+                row.set_progress(job.progress)
+            self.update_progress(self.batch_progress())
+        elif event == "output":
+            self.show_output_folder(job.output_path)
+        elif event == "finished":
+            print(f"[INFO] Job {job.id} ({job.name}) {job.state}")
+            row = self.worker_row(job.slot)
+            if row:
+                row.set_idle()
+            self.update_running_files()
+            if job.state == DONE:
+                self.update_progress(self.batch_progress())
+                if job.file in self.queue:
+                    self.remove_file(job.file)
+        elif event == "idle" and self.is_processing:
+            self.on_all_jobs_finished()
+    
+    def on_job_error(self, job, error_message):
+        """Mark the job failed and stop the rest of the batch"""
+        self.job_manager.pause()
+        self.job_manager.job_finished(job, False, error_message)
+        self.on_worker_error(error_message)
     
     def on_worker_error(self, error_message):
         """Called when a worker encounters an error"""
-        print(f"DEBUG: Worker error: {error_message}")
+        print(f"[ERROR] Worker error: {error_message}")
         
         # Prevent showing multiple error dialogs
         if self.error_shown:
@@ -1426,54 +1637,13 @@ class MainWindow(QMainWindow):
         # Stop processing on error
         self.on_cancelled()
     
-    def on_worker_finished(self):
-        """Called when a worker finishes processing one file"""
-        print(f"DEBUG: Worker finished for file {self.current_index + 1} of {len(self.queue)}")
-        
-        # Check if worker was cancelled
-        if self.worker and getattr(self.worker, "_cancel_requested", False):
-            print("DEBUG: Worker was cancelled")
-            self.on_cancelled()
-            return
-        
-        # Check if there was an error (worker might have finished due to error)
-        # Errors are handled by on_worker_error, so if we get here without cancellation,
-        # assume success and continue
-        
-        # Move to next file
-        self.current_index += 1
-        
-        # Process next file if any remaining
-        if self.current_index < len(self.queue):
-            print(f"DEBUG: Processing next file {self.current_index + 1}/{len(self.queue)}")
-            # Clean up the worker before starting next one
-            if self.worker:
-                try:
-                    self.worker.disconnect()
-                    self.worker.deleteLater()
-                except:
-                    pass
-                self.worker = None
-            
-            # Add a small delay before starting next file
-            QTimer.singleShot(500, self.process_next_file)
-        else:
-            print("DEBUG: All files processed, finishing up")
-            # Clean up worker
-            if self.worker:
-                try:
-                    self.worker.disconnect()
-                    self.worker.deleteLater()
-                except:
-                    pass
-                self.worker = None
-            
-            # Show completion
-            QTimer.singleShot(1000, self.on_all_jobs_finished)
-                
     def on_cancelled(self):
         self.is_processing = False  # Reset processing flag
         self.error_shown = False  # Reset error flag
+        # Terminate the hosts first so cancelling their workers does not wait on them
+        self.stop_hosts()
+        self.job_manager.cancel_all()
+        self.stop_resource_monitor()
         
         # Don't clear queue on cancellation - let user decide
         # self.queue.clear()
@@ -1492,7 +1662,7 @@ class MainWindow(QMainWindow):
 
             
     def update_hardware_label(self, text):
-        """Update hardware label with GPU memory info"""
+        """Update hardware label with the latest resource sample"""
         self.hardware_label.setText(text)
 
     
@@ -1502,6 +1672,7 @@ class MainWindow(QMainWindow):
         
         # Reset processing flag
         self.is_processing = False
+        self.stop_resource_monitor()
         
         # Re-enable UI
         self.start_btn.setEnabled(True)
@@ -1516,17 +1687,36 @@ class MainWindow(QMainWindow):
         self.hardware_label.setText("")
         
         # Show completion message if we processed any files
-        if len(self.queue) > 0:
+        done_count = sum(1 for job in self.job_manager.jobs() if job.state == DONE)
+        if done_count > 0:
             QMessageBox.information(
                 self,
                 "Processing Complete",
-                f"Successfully processed {len(self.queue)} file(s)."
+                f"Successfully processed {done_count} file(s)."
             )
         
-        # Clear queue and reset index
+        # Clear queue for next batch
         self.queue.clear()
         self.queue_list.clear()
-        self.current_index = 0  # Reset index for next batch
+        self.job_manager.clear_finished()
         
         # Reset progress bar after delay
         QTimer.singleShot(2000, self.reset_progress_display)
+
+    def stop_hosts(self):
+        """Terminate every separation host at once and reap them off the GUI thread"""
+        processes = [process for process in (host.terminate() for host in self.hosts.values())
+                     if process is not None]
+        if processes:
+            threading.Thread(target=reap, args=(processes,), name="host-reaper").start()
+
+    def closeEvent(self, event):
+        """Stop running jobs and the separation hosts when the window closes"""
+        self.stop_hosts()
+        self.hosts.clear()
+        self.job_manager.cancel_all()
+        self.stop_resource_monitor()
+        # A QThread must not be destroyed while it is still probing
+        if self.hardware_probe is not None:
+            self.hardware_probe.wait()
+        super().closeEvent(event)